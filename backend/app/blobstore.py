@@ -0,0 +1,121 @@
+"""Content-addressed storage for proof images.
+
+Files live at ``<upload_dir>/blobs/<h[:2]>/<h[2:4]>/<sha256><ext>`` and are
+served as ``/uploads/blobs/...``. A path names exactly one content, so the URL
+can be cached as immutable. Identical uploads share one file; ``Blob.ref_count``
+tracks how many proofs and chat messages show it and ``release`` (called when a
+proof is deleted) deletes the file at zero. Messages cannot be deleted, so a
+blob a message shows is never released. A new file is moved into place only
+after its row is inserted; if the caller's transaction then fails,
+``discard_orphan`` removes it.
+Resized variants (see ``app.derivatives``) sit next to the original as
+``<sha256>.<variant>.webp``.
+"""
+from __future__ import annotations
+
+import os
+import re
+from datetime import datetime
+from typing import BinaryIO, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, update
+
+from . import uploads
+from .models.blob import Blob
+
+BLOB_PREFIX = "blobs"
+DERIVATIVE_VARIANTS = ("thumb", "medium")
+_URL_RE = re.compile(r"^/uploads/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z]+$")
+
+
+def blob_relpath(sha256: str, content_type: str) -> str:
+    return "/".join((BLOB_PREFIX, sha256[:2], sha256[2:4], sha256 + uploads.extension_for(content_type)))
+
+
+def blob_url(blob: Blob) -> str:
+    return "/uploads/" + blob_relpath(blob.sha256, blob.content_type)
+
+
+def blob_path(upload_dir: str, blob: Blob) -> str:
+    return os.path.join(upload_dir, *blob_relpath(blob.sha256, blob.content_type).split("/"))
+
+
+def derivative_relpath(sha256: str, variant: str) -> str:
+    return "/".join((BLOB_PREFIX, sha256[:2], sha256[2:4], f"{sha256}.{variant}.webp"))
+
+
+def derivative_path(upload_dir: str, sha256: str, variant: str) -> str:
+    return os.path.join(upload_dir, *derivative_relpath(sha256, variant).split("/"))
+
+
+def sha_from_url(url: Optional[str]) -> Optional[str]:
+    m = _URL_RE.match(url or "")
+    return m.group(1) if m else None
+
+
+def store(session: Session, src: BinaryIO, upload_dir: str, max_bytes: int) -> Blob:
+    """Stream ``src`` into the store and take one reference on its blob (caller commits)."""
+    with uploads.staged_upload(src, upload_dir, max_bytes) as staged:
+        if session.get(Blob, staged.sha256) is None:
+            insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(Blob).values(
+                sha256=staged.sha256, content_type=staged.content_type, size=staged.size, ref_count=1,
+                derivative_state="pending", created_at=datetime.utcnow(),
+            )
+            # no row when a concurrent upload of the same bytes won; it places the file
+            if session.exec(stmt.on_conflict_do_nothing(index_elements=["sha256"])).rowcount == 1:
+                blob = session.get(Blob, staged.sha256)
+                # row first: a failed insert never leaves a file behind
+                staged.commit(blob_path(upload_dir, blob))
+                return blob
+    _add_ref(session, staged.sha256, 1)
+    blob = session.get(Blob, staged.sha256)
+    session.refresh(blob)
+    return blob
+
+
+def _add_ref(session: Session, sha256: str, delta: int) -> None:
+    session.exec(update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count + delta))
+
+
+def acquire(session: Session, sha256: str) -> bool:
+    """Take another reference on an existing blob, e.g. a proof or message posted by URL (caller commits)."""
+    if session.get(Blob, sha256) is None:
+        return False
+    _add_ref(session, sha256, 1)
+    return True
+
+
+def _blob_files(upload_dir: str, blob: Blob) -> list:
+    return [blob_path(upload_dir, blob)] + [derivative_path(upload_dir, blob.sha256, v) for v in DERIVATIVE_VARIANTS]
+
+
+def _unlink(paths: list) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def discard_orphan(session: Session, blob: Blob, upload_dir: str) -> None:
+    """The transaction of a ``store`` failed: roll back, then delete the file unless a committed row uses it."""
+    sha256, paths = blob.sha256, _blob_files(upload_dir, blob)
+    session.rollback()
+    if session.get(Blob, sha256) is None:
+        _unlink(paths)
+
+
+def release(session: Session, sha256: str, upload_dir: str) -> None:
+    """Drop one reference; the row and file go once nothing points at them (commits)."""
+    _add_ref(session, sha256, -1)
+    paths = []
+    # commits even when the row is already gone: the caller's delete rides on it
+    blob = session.get(Blob, sha256)
+    if blob is not None:
+        session.refresh(blob)
+        if blob.ref_count <= 0:
+            paths = _blob_files(upload_dir, blob)
+            session.delete(blob)
+    session.commit()
+    _unlink(paths)
@@ -1,6 +1,7 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
 
 # Resolve repo root (two levels up from this file: backend/app -> repo)
 _REPO_ROOT = Path(__file__).resolve().parents[2]
@@ -13,6 +14,62 @@ class Settings(BaseSettings):
     jwt_secret: str = "change_me"
     cors_origins: list[str] = ["*"]
     upload_dir: str = _DEFAULT_UPLOAD_DIR
+    proof_max_bytes: int = 10 * 1024 * 1024
+    # Proof image variants rendered off the request path (see app.derivatives); 0 workers renders inline
+    derivative_workers: int = 2
+    derivative_thumb_px: int = 320
+    derivative_medium_px: int = 1280
+    derivative_webp_quality: int = 80
+    # /uploads serving (see app.media); blob URLs are always cached as immutable
+    media_max_age: int = 86400
+    media_precompressed: bool = False
+    media_accel_redirect_prefix: Optional[str] = None
+    # /ai/suggest: results per query when the request does not pass k
+    suggest_top_k: int = 3
+    # Auth caches (see app.deps): verified tokens, and user rows for get_current_user
+    auth_token_cache_size: int = 10000
+    auth_token_cache_ttl_seconds: float = 300.0
+    auth_user_cache_size: int = 10000
+    auth_user_cache_ttl_seconds: float = 30.0
+    # Password hashing (see app.passwords); existing hashes are upgraded on login when the cost changes
+    bcrypt_rounds: int = 12
+    password_workers: int = 2
+    password_max_pending: int = 64
+    password_queue_timeout_seconds: float = 10.0
+    # /summary trusted insights: top K learnings by likes from trusted users, within the window
+    trusted_insights_k: int = 5
+    trusted_insights_window_days: int = 90
+    # GET /learnings: first page served from memory for up to this long (post_message invalidates it)
+    learnings_cache_ttl_seconds: float = 30.0
+    # Message likes: reaction counts are batched in memory and added to likes_count this often
+    likes_flush_interval_seconds: float = 2.0
+    # Token lifetimes: short-lived JWT access tokens, rotating refresh tokens (see app.refresh_tokens)
+    access_token_minutes: int = 30
+    refresh_token_days: int = 30
+    # Run Alembic migrations on startup; disable when deploys run `alembic upgrade head`
+    auto_migrate: bool = True
+
+    # Keep per-year completion bitsets next to habitlog and serve week/range reads from them
+    habit_bitmap_enabled: bool = True
+
+    # Live group events (WebSocket/SSE): "memory" for one worker, "redis" across workers
+    pubsub_backend: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    pubsub_queue_size: int = 100
+    live_heartbeat_seconds: float = 15.0
+    live_send_timeout_seconds: float = 10.0
+
+    # Connection pool (one engine per process, see db.get_engine)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = False
+    # SQLite connect-time tuning
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
 
     class Config:
         env_file = ".env"
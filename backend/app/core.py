@@ -2,12 +2,14 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from jose import jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
+from .config import get_settings
+
+# bcrypt runs in a process pool; these stay importable from here
+from .passwords import hash_password, hash_password_async, needs_rehash, verify_password, verify_password_async  # noqa: F401
+
 SECRET_ALG = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class Token(BaseModel):
@@ -15,16 +17,8 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
-
-
 def create_access_token(subject: str, *, secret_key: str, expires_delta: Optional[timedelta] = None) -> str:
-    expire = expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = expires_delta or timedelta(minutes=get_settings().access_token_minutes)
     now = datetime.now(timezone.utc)
     to_encode = {"sub": subject, "iat": int(now.timestamp()), "exp": int((now + expire).timestamp())}
     return jwt.encode(to_encode, secret_key, algorithm=SECRET_ALG)
@@ -1,25 +1,253 @@
-from typing import Generator
+import threading
+import time
+from typing import AsyncGenerator, Generator, Optional
 
-from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .config import get_settings
 
 
+class PoolMetrics:
+    """Process-wide counters for connection checkouts and time spent waiting on the pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.wait_count = 0
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+            self.timeouts = 0
+
+    def on_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_s += seconds
+            if seconds > self.wait_max_s:
+                self.wait_max_s = seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if self.checked_out > self.max_checked_out:
+                self.max_checked_out = self.checked_out
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg_ms = (self.wait_total_s / self.wait_count * 1000.0) if self.wait_count else 0.0
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "wait_avg_ms": round(avg_ms, 3),
+                "wait_max_ms": round(self.wait_max_s * 1000.0, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers block waiting for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            pool_metrics.on_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.on_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """The same wait accounting for the async engine's pool."""
+
+
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
 def _get_engine_url() -> str:
     settings = get_settings()
     return settings.database_url
 
 
-def get_engine():
-    return create_engine(_get_engine_url(), echo=False)
+def _is_memory_sqlite(url: str) -> bool:
+    u = make_url(url)
+    return u.get_backend_name() == "sqlite" and (u.database in (None, "", ":memory:") or "mode=memory" in url)
 
 
-def init_db() -> None:
+def _async_url(url: str) -> str:
+    """The async driver for the configured database: aiosqlite or psycopg 3 (which does both)."""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return u.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for {backend}")
+
+
+def _install_sqlite_pragmas(engine: Engine) -> None:
+    settings = get_settings()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record) -> None:
+        cur = dbapi_conn.cursor()
+        try:
+            cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            cur.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cur.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        finally:
+            cur.close()
+
+
+def _install_pool_metrics(engine: Engine) -> None:
+    event.listen(engine, "connect", lambda *_: pool_metrics.on_connect())
+    event.listen(engine, "checkout", lambda *_: pool_metrics.on_checkout())
+    event.listen(engine, "checkin", lambda *_: pool_metrics.on_checkin())
+
+
+def _create_engine() -> Engine:
+    settings = get_settings()
+    url = _get_engine_url()
+    backend = make_url(url).get_backend_name()
+    kwargs: dict = {"echo": False, "pool_pre_ping": settings.db_pool_pre_ping}
+    if backend == "sqlite":
+        # FastAPI runs sync endpoints in a threadpool, so connections cross threads
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    engine = create_engine(url, **kwargs)
+    if backend == "sqlite":
+        _install_sqlite_pragmas(engine)
+    _install_pool_metrics(engine)
+    return engine
+
+
+def get_engine() -> Engine:
+    """Return the process-wide engine, creating it (and its pool) on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def _create_async_engine() -> AsyncEngine:
+    settings = get_settings()
+    url = _get_engine_url()
+    kwargs: dict = {"echo": False, "pool_pre_ping": settings.db_pool_pre_ping}
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    engine = create_async_engine(_async_url(url), **kwargs)
+    # connect/checkout events fire on the sync facade, inside the driver's greenlet
+    if make_url(url).get_backend_name() == "sqlite":
+        _install_sqlite_pragmas(engine.sync_engine)
+    _install_pool_metrics(engine.sync_engine)
+    return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide async engine (same database, its own pool), creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = _create_async_engine()
+    return _async_engine
+
+
+def dispose_engine() -> None:
+    """Close pooled connections and drop the engine so the next call rebuilds it."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+async def dispose_async_engine() -> None:
+    """Async counterpart of ``dispose_engine``."""
+    global _async_engine
+    with _engine_lock:
+        engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+def pool_status() -> dict:
     engine = get_engine()
-    SQLModel.metadata.create_all(engine)
+    status = pool_metrics.snapshot()
+    pool = engine.pool
+    status["pool_class"] = type(pool).__name__
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_in=pool.checkedin(), overflow=pool.overflow())
+    if _async_engine is not None and isinstance(_async_engine.pool, QueuePool):
+        apool = _async_engine.pool
+        status["async"] = {"size": apool.size(), "checked_in": apool.checkedin(), "overflow": apool.overflow()}
+    return status
+
+
+def init_db() -> None:
+    """Apply pending schema migrations once per process, before serving requests."""
+    if not get_settings().auto_migrate:
+        return
+    from .migrate import upgrade
+
+    upgrade(get_engine())
 
 
 def get_session() -> Generator[Session, None, None]:
-    engine = get_engine()
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    # no expire-on-commit: attribute access after commit would need an implicit (sync) reload
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
         yield session
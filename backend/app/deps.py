@@ -1,25 +1,45 @@
+import copy
+import time
+from dataclasses import dataclass
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt, JWTError
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session, select
 
+from .cache import TTLCache
 from .config import get_settings
 from .core import SECRET_ALG
-from .db import get_session
+from .db import get_engine, get_session
 from .models.user import User
 
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    creds: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    session: Session = Depends(get_session),
-) -> User:
-    if creds is None or not creds.scheme.lower().startswith("bearer"):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token = creds.credentials
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, for endpoints that only need the user id."""
+    id: int
+
+
+_settings = get_settings()
+# verified token -> Principal; entries never outlive the token's own exp
+token_cache: TTLCache[Principal] = TTLCache(_settings.auth_token_cache_size, _settings.auth_token_cache_ttl_seconds)
+# user id -> column values; update_me and user deletion invalidate, other workers catch up within the TTL
+user_cache: TTLCache[dict] = TTLCache(_settings.auth_user_cache_size, _settings.auth_user_cache_ttl_seconds)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+def decode_token_subject(token: str) -> int:
+    """Validate an access token and return its user id, or raise 401."""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.id
     settings = get_settings()
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[SECRET_ALG])
@@ -28,8 +48,57 @@ def get_current_user(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    principal = Principal(int(sub))
+    exp = payload.get("exp")
+    token_cache.put(token, principal, expires_at=time.monotonic() + (exp - time.time()) if exp else None)
+    return principal.id
+
 
-    user = session.exec(select(User).where(User.id == int(sub))).first()
+def require_user(user_id: int) -> int:
+    """401 unless the token's user still exists; a ``user_cache`` hit answers without a query."""
+    if user_cache.get(user_id) is not None:
+        return user_id
+    with Session(get_engine()) as session:
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user_cache.put(user_id, copy.deepcopy(user.model_dump()))
+    return user_id
+
+
+def get_principal(creds: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> Principal:
+    """Bearer-token caller for endpoints that only need the id; the user's existence comes from ``user_cache``."""
+    if creds is None or not creds.scheme.lower().startswith("bearer"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return Principal(require_user(decode_token_subject(creds.credentials)))
+
+
+def get_current_user(
+    principal: Principal = Depends(get_principal),
+    session: Session = Depends(get_session),
+) -> User:
+    data = user_cache.get(principal.id)
+    if data is not None:
+        # a fresh instance per request, attached without a SELECT; callers may modify and commit it
+        user = User(**copy.deepcopy(data))
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    user = session.exec(select(User).where(User.id == principal.id)).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user_cache.put(principal.id, copy.deepcopy(user.model_dump()))
     return user
+
+
+def get_stream_user_id(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    token: Optional[str] = Query(None),
+) -> int:
+    """User id for streaming endpoints; EventSource cannot set headers, so ``?token=`` is accepted too."""
+    if creds is not None and creds.scheme.lower().startswith("bearer"):
+        return require_user(decode_token_subject(creds.credentials))
+    if token:
+        return require_user(decode_token_subject(token))
+    raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
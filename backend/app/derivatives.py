@@ -0,0 +1,176 @@
+"""Resized WebP variants of proof images, rendered in a worker process pool.
+
+Uploads return as soon as the original is stored; ``schedule`` hands the blob to
+a ``ProcessPoolExecutor`` that writes ``thumb`` and ``medium`` variants next to
+it (EXIF and other metadata dropped, orientation applied) and then flips
+``Blob.derivative_state`` to ``ready``. Read endpoints use ``variant_urls``,
+which falls back to the original URL until that happens or if rendering failed.
+
+``python -m app.derivatives backfill`` renders anything still pending, e.g.
+after a restart dropped queued work.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session, select, update
+
+from . import blobstore
+from .config import get_settings
+from .models.blob import Blob
+
+log = logging.getLogger(__name__)
+
+
+def render(src_path: str, targets: List[Tuple[str, int]], quality: int) -> List[str]:
+    """Write a WebP no larger than ``max_px`` on either side for each ``(dest_path, max_px)``.
+
+    Runs in a worker process, so it only touches the filesystem.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)
+        im = im.convert("RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB")
+        written = []
+        for dest, max_px in targets:
+            out = im.copy()
+            out.thumbnail((max_px, max_px))
+            tmp = dest + ".part"
+            # a fresh image carries no info dict, so EXIF/XMP/ICC are not copied over
+            out.save(tmp, "WEBP", quality=quality, method=4)
+            os.replace(tmp, dest)
+            written.append(dest)
+    return written
+
+
+def _targets(upload_dir: str, sha256: str) -> List[Tuple[str, int]]:
+    settings = get_settings()
+    sizes = {"thumb": settings.derivative_thumb_px, "medium": settings.derivative_medium_px}
+    return [(blobstore.derivative_path(upload_dir, sha256, v), sizes[v]) for v in blobstore.DERIVATIVE_VARIANTS]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_lock = threading.Lock()
+_pending: set = set()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: forking a process that holds DB connections and server threads is unsafe
+            _executor = ProcessPoolExecutor(get_settings().derivative_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _mark(sha256: str, state: str) -> None:
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        session.exec(update(Blob).where(Blob.sha256 == sha256).values(derivative_state=state))
+        session.commit()
+
+
+def _finish(sha256: str, future: Future) -> None:
+    try:
+        future.result()
+        state = "ready"
+    except Exception as exc:
+        # typically an upload Pillow cannot decode; readers keep getting the original
+        log.warning("rendering derivatives for blob %s failed: %r", sha256, exc)
+        state = "failed"
+    try:
+        _mark(sha256, state)
+    finally:
+        with _lock:
+            _pending.discard(sha256)
+
+
+def schedule(blob: Blob) -> None:
+    """Queue variant rendering for a committed blob; returns immediately."""
+    if blob.derivative_state != "pending":
+        return
+    with _lock:
+        if blob.sha256 in _pending:
+            return
+        _pending.add(blob.sha256)
+    settings = get_settings()
+    args = (blobstore.blob_path(settings.upload_dir, blob), _targets(settings.upload_dir, blob.sha256), settings.derivative_webp_quality)
+    if settings.derivative_workers <= 0:
+        future: Future = Future()
+        try:
+            future.set_result(render(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        _finish(blob.sha256, future)
+        return
+    try:
+        future = _get_executor().submit(render, *args)
+    except Exception:
+        with _lock:
+            _pending.discard(blob.sha256)
+        raise
+    future.add_done_callback(lambda f, sha=blob.sha256: _finish(sha, f))
+
+
+def wait_idle(timeout: float = 30.0) -> bool:
+    """Block until every scheduled render has been recorded; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with _lock:
+            if not _pending:
+                return True
+        time.sleep(0.02)
+    return False
+
+
+def shutdown(wait: bool = True) -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def variant_urls(session: Session, urls: Iterable[Optional[str]]) -> Dict[str, Dict[str, str]]:
+    """Map each image URL to ``{"thumb_url", "medium_url"}``, using the original where no variant exists."""
+    urls = {u for u in urls if u}
+    shas = {u: blobstore.sha_from_url(u) for u in urls}
+    wanted = {s for s in shas.values() if s}
+    ready = set()
+    if wanted:
+        ready = set(session.exec(select(Blob.sha256).where(Blob.sha256.in_(wanted), Blob.derivative_state == "ready")).all())
+    result = {}
+    for url, sha in shas.items():
+        if sha in ready:
+            result[url] = {f"{v}_url": "/uploads/" + blobstore.derivative_relpath(sha, v) for v in blobstore.DERIVATIVE_VARIANTS}
+        else:
+            result[url] = {f"{v}_url": url for v in blobstore.DERIVATIVE_VARIANTS}
+    return result
+
+
+def backfill(session: Session) -> int:
+    """Render every pending blob, waiting for the pool; returns how many were queued."""
+    blobs = session.exec(select(Blob).where(Blob.derivative_state == "pending")).all()
+    for blob in blobs:
+        schedule(blob)
+    wait_idle(timeout=max(30.0, 5.0 * len(blobs)))
+    return len(blobs)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("usage: python -m app.derivatives backfill")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"rendered derivatives for {backfill(session)} blobs")
+    shutdown()
@@ -0,0 +1,108 @@
+"""Compact completion history: one bitset per habit per calendar year.
+
+Bit ``n`` of ``HabitYearBits.bits`` is day-of-year ``n`` (0 = Jan 1), stored
+little-endian in 46 bytes, with ``completed_count`` kept equal to the popcount.
+``app.habit_calendar`` answers week and calendar views from at most two rows
+per habit through ``year_bits``. ``HabitLog`` stays the source of truth;
+``toggle_day`` writes both when ``settings.habit_bitmap_enabled`` is on.
+
+    python -m app.habit_bits rebuild
+"""
+from __future__ import annotations
+
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List
+
+from sqlmodel import Session, select
+
+from .models.habit import HabitLog, HabitYearBits
+
+YEAR_BYTES = 46  # 366 bits
+
+
+def _empty() -> bytearray:
+    return bytearray(YEAR_BYTES)
+
+
+def _day_index(d: date) -> int:
+    return d.timetuple().tm_yday - 1
+
+
+def popcount(bits: bytes) -> int:
+    return int.from_bytes(bits, "little").bit_count()
+
+
+def is_set(bits: bytes, d: date) -> bool:
+    i = _day_index(d)
+    return bool(bits[i >> 3] & (1 << (i & 7)))
+
+
+def set_day(session: Session, habit_id: int, day: date, completed: bool) -> HabitYearBits:
+    """Set or clear ``day`` in the habit's bitset for that year (caller commits)."""
+    row = session.exec(
+        select(HabitYearBits)
+        .where(HabitYearBits.habit_id == habit_id, HabitYearBits.year == day.year)
+        .with_for_update()
+    ).first()
+    bits = bytearray(row.bits) if row else _empty()
+    i = _day_index(day)
+    if completed:
+        bits[i >> 3] |= 1 << (i & 7)
+    else:
+        bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+    row = row or HabitYearBits(habit_id=habit_id, year=day.year, bits=b"")
+    row.bits = bytes(bits)
+    row.completed_count = popcount(bits)
+    session.add(row)
+    return row
+
+
+def year_bits(session: Session, habit_ids: List[int], first_year: int, last_year: int) -> Dict[int, Dict[int, bytes]]:
+    """``{habit_id: {year: bits}}`` for the given years, from one query. Missing years are absent."""
+    result: Dict[int, Dict[int, bytes]] = {hid: {} for hid in habit_ids}
+    if not habit_ids:
+        return result
+    rows = session.exec(
+        select(HabitYearBits).where(
+            HabitYearBits.habit_id.in_(habit_ids),
+            HabitYearBits.year >= first_year,
+            HabitYearBits.year <= last_year,
+        )
+    ).all()
+    for r in rows:
+        result[r.habit_id][r.year] = r.bits
+    return result
+
+
+def rebuild(session: Session, batch_size: int = 500) -> int:
+    """Rewrite every bitset from ``HabitLog``; returns the number of (habit, year) rows written."""
+    habit_ids = sorted(set(session.exec(select(HabitLog.habit_id).distinct()).all()))
+    written = 0
+    for i in range(0, len(habit_ids), batch_size):
+        batch = habit_ids[i:i + batch_size]
+        for row in session.exec(select(HabitYearBits).where(HabitYearBits.habit_id.in_(batch))).all():
+            session.delete(row)
+        session.flush()
+        grouped: Dict[tuple, bytearray] = defaultdict(_empty)
+        logs = session.exec(
+            select(HabitLog.habit_id, HabitLog.day).where(HabitLog.habit_id.in_(batch), HabitLog.completed == True)  # noqa: E712
+        )
+        for habit_id, day in logs:
+            idx = _day_index(day)
+            grouped[(habit_id, day.year)][idx >> 3] |= 1 << (idx & 7)
+        for (habit_id, year), bits in grouped.items():
+            session.add(HabitYearBits(habit_id=habit_id, year=year, bits=bytes(bits), completed_count=popcount(bits)))
+            written += 1
+        session.commit()
+    return written
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m app.habit_bits rebuild")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"rebuilt {rebuild(session)} habit-year bitsets")
@@ -0,0 +1,63 @@
+"""Completion calendars for date ranges, served from a single range query.
+
+A range is encoded per habit as a bitstring (``"0110..."``, one char per day
+starting at ``start``) or as runs of completed days (``[[offset, length], ...]``).
+Reads come from the per-year bitsets when ``habit_bitmap_enabled`` is on and
+from one ``(habit_id, day)`` index range scan over ``habitlog`` otherwise.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlmodel import Session, select
+
+from . import habit_bits
+from .config import get_settings
+from .models.habit import HabitLog
+
+MAX_RANGE_DAYS = 366
+
+
+def completion_strings(session: Session, habit_ids: List[int], start: date, end: date) -> Dict[int, str]:
+    """``{habit_id: "0101..."}`` covering every day in ``[start, end]``."""
+    span = (end - start).days + 1
+    if get_settings().habit_bitmap_enabled:
+        years = habit_bits.year_bits(session, habit_ids, start.year, end.year)
+        days = [start + timedelta(days=i) for i in range(span)]
+        out: Dict[int, str] = {}
+        for hid in habit_ids:
+            by_year = years[hid]
+            out[hid] = "".join(
+                "1" if (d.year in by_year and habit_bits.is_set(by_year[d.year], d)) else "0" for d in days
+            )
+        return out
+    flags = {hid: ["0"] * span for hid in habit_ids}
+    if habit_ids:
+        rows = session.exec(
+            select(HabitLog.habit_id, HabitLog.day).where(
+                HabitLog.habit_id.in_(habit_ids),
+                HabitLog.day >= start,
+                HabitLog.day <= end,
+                HabitLog.completed == True,  # noqa: E712
+            )
+        )
+        for hid, day in rows:
+            flags[hid][(day - start).days] = "1"
+    return {hid: "".join(f) for hid, f in flags.items()}
+
+
+def run_lengths(bits: str) -> List[List[int]]:
+    """Completed runs of a bitstring as ``[offset, length]`` pairs."""
+    runs: List[List[int]] = []
+    i, n = 0, len(bits)
+    while i < n:
+        if bits[i] == "1":
+            j = i
+            while j < n and bits[j] == "1":
+                j += 1
+            runs.append([i, j - i])
+            i = j
+        else:
+            i += 1
+    return runs
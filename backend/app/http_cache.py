@@ -0,0 +1,145 @@
+"""Conditional GETs for the hot read endpoints, answered from version stamps.
+
+For a GET matching one of ``POLICIES`` the middleware reads the route's stamps
+(see app.versions; one primary-key query) and derives a weak ETag from them,
+the path and query string, the caller for private routes and, for week views,
+the current week. A matching ``If-None-Match`` gets a 304 without running the
+handler, so nothing is loaded or serialised; otherwise the handler runs and its
+200 carries the ETag and the route's ``Cache-Control``.
+
+Stamps are read before the handler runs. A write racing the request can only
+leave the tag older than the body, which costs the client one refetch and
+never produces a stale 304. Private routes need a valid bearer token to be
+answered here; without one the request goes straight to the handler, which
+answers 401 as usual.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import versions
+from .cache import etag_matches
+from .db import get_async_engine
+from .deps import decode_token_subject, require_user, user_cache
+from .rollups import week_start
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    pattern: "re.Pattern[str]"
+    # stamp keys, formatted with the path's named groups
+    keys: Tuple[str, ...]
+    cache_control: str
+    # the tag covers the caller and requires a valid token
+    private: bool = True
+    # the body also depends on the current week
+    weekly: bool = False
+
+
+def _route(path: str, keys: Sequence[str], cache_control: str, **options) -> CachePolicy:
+    return CachePolicy(re.compile(path + r"\Z"), tuple(keys), cache_control, **options)
+
+
+POLICIES: Tuple[CachePolicy, ...] = (
+    # curated catalogue, rarely written: let clients reuse it for a minute
+    _route(r"/tools", ["tools"], "public, max-age=60", private=False),
+    _route(r"/habits(?:/public)?/discover", ["habits:public"], "private, no-cache"),
+    _route(r"/groups", ["groups"], "private, no-cache"),
+    # other people's profiles; your own edits go through /users/me
+    _route(r"/users/(?P<user_id>\d+)", ["user:{user_id}"], "private, max-age=30"),
+    _route(r"/habits/(?P<habit_id>\d+)/week", ["habit:{habit_id}"], "private, no-cache", weekly=True),
+    _route(r"/learnings", ["learnings"], "public, no-cache", private=False),
+)
+
+
+def _match(policies: Sequence[CachePolicy], path: str) -> Optional[Tuple[CachePolicy, Dict[str, str]]]:
+    for policy in policies:
+        m = policy.pattern.match(path)
+        if m:
+            return policy, m.groupdict()
+    return None
+
+
+async def _caller(authorization: Optional[str]) -> Optional[int]:
+    """The caller's id, as ``get_principal`` would accept it, or None."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if not scheme.lower().startswith("bearer") or not token:
+        return None
+    try:
+        user_id = decode_token_subject(token.strip())
+        if user_cache.get(user_id) is None:
+            # the existence check may query; keep it off the loop
+            await run_in_threadpool(require_user, user_id)
+    except HTTPException:
+        return None
+    return user_id
+
+
+async def _read_stamps(keys: Sequence[str]) -> Dict[str, int]:
+    async with AsyncSession(get_async_engine()) as session:
+        return await session.run_sync(versions.read, keys)
+
+
+def _etag(scope: Scope, policy: CachePolicy, caller: Optional[int], stamps: Dict[str, int]) -> str:
+    parts = [scope["path"], scope.get("query_string", b"").decode("latin-1"), str(caller or "")]
+    if policy.weekly:
+        parts.append(week_start(date.today()).isoformat())
+    parts += [f"{key}={version}" for key, version in sorted(stamps.items())]
+    return f'W/"{hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+class ConditionalGetMiddleware:
+    """ETag / ``If-None-Match`` and ``Cache-Control`` for the routes in ``policies``."""
+
+    def __init__(self, app: ASGIApp, policies: Sequence[CachePolicy] = POLICIES) -> None:
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        found = _match(self.policies, scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if found is None:
+            await self.app(scope, receive, send)
+            return
+        policy, params = found
+        headers = Headers(scope=scope)
+        caller = None
+        if policy.private:
+            caller = await _caller(headers.get("authorization"))
+            if caller is None:
+                await self.app(scope, receive, send)
+                return
+
+        stamps = await _read_stamps([key.format(**params) for key in policy.keys])
+        # handlers can reuse them (app.versions.current) instead of reading again
+        scope.setdefault("state", {})["versions"] = stamps
+        etag = _etag(scope, policy, caller, stamps)
+
+        def add_validators(target: MutableHeaders) -> None:
+            target.setdefault("etag", etag)
+            target.setdefault("cache-control", policy.cache_control)
+            if policy.private:
+                target.add_vary_header("Authorization")
+
+        if etag_matches(headers.get("if-none-match"), etag):
+            response = Response(status_code=304)
+            add_validators(response.headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_validators(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                add_validators(MutableHeaders(scope=message))
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
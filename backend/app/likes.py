@@ -0,0 +1,149 @@
+"""Message likes with write-behind counters.
+
+A like is one ``MessageReaction`` row, made idempotent by the unique
+``(message_id, user_id)`` index: liking twice or unliking something never liked
+changes nothing. The denormalised ``Message.likes_count`` is not updated per
+request; each recorded change adds to an in-memory delta and a background
+thread folds all pending deltas into ``likes_count`` every
+``LIKES_FLUSH_INTERVAL_SECONDS`` in one short transaction. A viral message then
+costs one counter UPDATE per interval instead of one per like, and like
+requests never queue behind each other on its row. ``pending`` lets handlers
+report counts that include unflushed likes.
+
+Deltas not yet flushed are lost if the process dies; repair with
+
+    python -m app.likes recount
+"""
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, delete, select, update
+
+from . import versions
+from .config import get_settings
+from .models.group import Message, MessageReaction
+
+log = logging.getLogger(__name__)
+
+_deltas: Counter = Counter()
+_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def record(session: Session, message_id: int, user_id: int, liked: bool) -> bool:
+    """Like or unlike; True if this changed anything (caller commits, then calls ``add``)."""
+    if liked:
+        insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert(MessageReaction).values(message_id=message_id, user_id=user_id).on_conflict_do_nothing(
+            index_elements=["message_id", "user_id"]
+        )
+    else:
+        stmt = delete(MessageReaction).where(MessageReaction.message_id == message_id, MessageReaction.user_id == user_id)
+    return session.exec(stmt).rowcount == 1
+
+
+def add(message_id: int, delta: int) -> None:
+    """Queue a committed change to ``message_id``'s like count."""
+    with _lock:
+        _deltas[message_id] += delta
+    _ensure_flusher()
+
+
+def pending(message_id: int) -> int:
+    with _lock:
+        return _deltas.get(message_id, 0)
+
+
+def flush(session: Optional[Session] = None) -> int:
+    """Apply every pending delta in one transaction; returns the number of messages updated."""
+    with _lock:
+        batch: Dict[int, int] = {mid: d for mid, d in _deltas.items() if d}
+        _deltas.clear()
+    if not batch:
+        return 0
+    try:
+        if session is None:
+            from .db import get_engine
+
+            with Session(get_engine()) as own:
+                _apply(own, batch)
+        else:
+            _apply(session, batch)
+    except Exception:
+        # put them back for the next round rather than dropping likes
+        with _lock:
+            _deltas.update(batch)
+        raise
+    return len(batch)
+
+
+def _apply(session: Session, batch: Dict[int, int]) -> None:
+    for message_id, delta in sorted(batch.items()):
+        session.exec(update(Message).where(Message.id == message_id).values(likes_count=Message.likes_count + delta))
+    # the learnings feed shows likes_count
+    if session.exec(select(Message.id).where(Message.id.in_(list(batch)), Message.type == "learning").limit(1)).first():
+        versions.bump(session, "learnings")
+    session.commit()
+
+
+def _run() -> None:
+    interval = get_settings().likes_flush_interval_seconds
+    while not _stop.wait(interval):
+        try:
+            flush()
+        except Exception as exc:
+            log.warning("flushing like counters failed, will retry: %r", exc)
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _stop.clear()
+            _flusher = threading.Thread(target=_run, name="likes-flusher", daemon=True)
+            _flusher.start()
+
+
+def shutdown() -> None:
+    """Stop the flusher and write out what is pending."""
+    global _flusher
+    with _lock:
+        thread, _flusher = _flusher, None
+    _stop.set()
+    if thread is not None:
+        thread.join(timeout=5)
+    flush()
+
+
+def recount(session: Session) -> int:
+    """Reset every ``likes_count`` from the reaction rows; returns the number of messages changed."""
+    flush(session)
+    counts = dict(
+        session.exec(select(MessageReaction.message_id, func.count()).group_by(MessageReaction.message_id)).all()
+    )
+    changed = 0
+    for message_id, likes_count in session.exec(select(Message.id, Message.likes_count)).all():
+        actual = counts.get(message_id, 0)
+        if actual != likes_count:
+            session.exec(update(Message).where(Message.id == message_id).values(likes_count=actual))
+            changed += 1
+    session.commit()
+    return changed
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["recount"]:
+        sys.exit("usage: python -m app.likes recount")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"recounted likes on {recount(session)} messages")
@@ -1,15 +1,23 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
 
 from .config import get_settings
-from .db import init_db
-from .routers import health, auth, habits, groups, toolbox, users, social, learnings, summary, ai
+from . import derivatives, likes, passwords
+from .media import media_app
+from .db import get_engine, init_db, dispose_async_engine, dispose_engine
+from .http_cache import ConditionalGetMiddleware
+from .pubsub import close_broker
+from .tool_index import get_index
+from .routers import health, auth, habits, groups, live, toolbox, users, social, learnings, summary, ai
 
 app = FastAPI(title="HabitLink API", version="0.1.0")
 
 settings = get_settings()
 
+# ETag/304 and Cache-Control for the hot read endpoints (see app.http_cache);
+# added first so CORS wraps its 304s too
+app.add_middleware(ConditionalGetMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -23,11 +31,28 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    with Session(get_engine()) as session:
+        get_index().rebuild(session)
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    derivatives.shutdown(wait=False)
+    passwords.shutdown()
+    likes.shutdown()
+    dispose_engine()
+
+
+@app.on_event("shutdown")
+async def on_shutdown_async() -> None:
+    await close_broker()
+    await dispose_async_engine()
 
 app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(habits.router)
 app.include_router(groups.router)
+app.include_router(live.router)
 app.include_router(toolbox.router)
 app.include_router(users.router)
 app.include_router(social.router)
@@ -40,5 +65,5 @@ app.include_router(ai.router)
 def root():
     return {"message": "HabitLink API"}
 
-# Static file serving for uploaded proofs
-app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
+# Uploaded proofs: ETag/304, Range and long-lived caching (see app.media)
+app.mount("/uploads", media_app(), name="uploads")
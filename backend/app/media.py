@@ -0,0 +1,136 @@
+"""Serving for ``/uploads``: validators, caching headers, ranges and zero-copy hand-off.
+
+``MediaFiles`` is a drop-in ``StaticFiles`` with:
+
+* strong ETags: content-addressed blobs (see ``app.blobstore``) use their hash,
+  anything else ``<size>-<mtime_ns>``; ``If-None-Match`` answers 304;
+* ``Cache-Control: immutable`` for blob URLs, whose bytes never change, and a
+  shorter max-age for legacy filenames;
+* byte ranges (206/416) via Starlette's ``FileResponse``;
+* zero-copy bodies: the ASGI ``pathsend`` extension when the server offers it,
+  or ``X-Accel-Redirect`` when a fronting nginx is configured
+  (``MEDIA_ACCEL_REDIRECT_PREFIX``), so the proxy ``sendfile()``s the file;
+* optional ``.br``/``.gz`` siblings picked by ``Accept-Encoding``.
+
+In-progress writes (dotfiles, ``*.part``) are never served.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+import stat
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .blobstore import BLOB_PREFIX
+from .config import get_settings
+
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})(?:\.(\w+))?\.\w+$")
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class MediaFileResponse(FileResponse):
+    # larger reads mean fewer loop round-trips per file when pathsend is unavailable
+    chunk_size = 256 * 1024
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class MediaFiles(StaticFiles):
+    def __init__(
+        self,
+        *,
+        directory: str,
+        max_age: int = 86400,
+        precompressed: bool = False,
+        accel_redirect_prefix: Optional[str] = None,
+    ) -> None:
+        super().__init__(directory=directory, check_dir=False)
+        self.max_age = max_age
+        self.precompressed = precompressed
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/") + "/" if accel_redirect_prefix else None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        parts = path.replace("\\", "/").split("/")
+        if any(p.startswith(".") or p.endswith(".part") for p in parts if p):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def cache_control(self, rel_path: str) -> str:
+        parts = rel_path.split("/")
+        if parts[0] == BLOB_PREFIX and _BLOB_NAME.match(parts[-1]):
+            return IMMUTABLE
+        return f"public, max-age={self.max_age}"
+
+    @staticmethod
+    def etag(rel_path: str, stat_result: os.stat_result) -> str:
+        m = _BLOB_NAME.match(os.path.basename(rel_path))
+        if rel_path.startswith(BLOB_PREFIX + "/") and m:
+            return f'"{m.group(1)}{"-" + m.group(2) if m.group(2) else ""}"'
+        return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+    def _precompressed(self, full_path: str, request_headers: Headers):
+        accept = request_headers.get("accept-encoding", "")
+        for coding, suffix in _ENCODINGS:
+            if _accepts(accept, coding):
+                try:
+                    st = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    return coding, suffix, st
+        return None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        rel_path = os.path.relpath(full_path, os.path.realpath(str(self.directory))).replace(os.sep, "/")
+        headers = {"cache-control": self.cache_control(rel_path), "etag": self.etag(rel_path, stat_result)}
+        media_type = None
+        suffix = ""
+        if self.precompressed:
+            variant = self._precompressed(full_path, request_headers)
+            headers["vary"] = "Accept-Encoding"
+            if variant is not None:
+                coding, suffix, variant_stat = variant
+                media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+                headers["content-encoding"] = coding
+                headers["etag"] = headers["etag"][:-1] + f'-{coding}"'
+                full_path, stat_result = full_path + suffix, variant_stat
+
+        if self.accel_redirect_prefix is not None:
+            response: Response = Response(status_code=status_code, headers=headers, media_type=media_type)
+            # points at the chosen variant, so nginx serves the same bytes the ETag names
+            response.headers["x-accel-redirect"] = self.accel_redirect_prefix + rel_path + suffix
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        response = MediaFileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers, media_type=media_type)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def media_app() -> MediaFiles:
+    settings = get_settings()
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    return MediaFiles(
+        directory=settings.upload_dir,
+        max_age=settings.media_max_age,
+        precompressed=settings.media_precompressed,
+        accel_redirect_prefix=settings.media_accel_redirect_prefix,
+    )
@@ -0,0 +1,53 @@
+"""Run Alembic migrations programmatically (startup, tests, deploy scripts).
+
+    python -m app.migrate            # upgrade to head
+    python -m app.migrate current    # print the recorded schema version
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _alembic_config() -> Config:
+    cfg = Config(str(_BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(_BACKEND_DIR / "migrations"))
+    return cfg
+
+
+def head_revision() -> Optional[str]:
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    """Bring the database schema up to ``revision``; a no-op when already there."""
+    if revision == "head" and current_revision(engine) == head_revision():
+        return
+    cfg = _alembic_config()
+    with engine.begin() as conn:
+        cfg.attributes["connection"] = conn
+        command.upgrade(cfg, revision)
+
+
+if __name__ == "__main__":
+    from .db import get_engine
+
+    if len(sys.argv) > 1 and sys.argv[1] == "current":
+        print(current_revision(get_engine()))
+    else:
+        upgrade(get_engine())
+        print(current_revision(get_engine()))
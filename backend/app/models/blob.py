@@ -0,0 +1,15 @@
+from __future__ import annotations
+from datetime import datetime
+
+from sqlmodel import SQLModel, Field
+
+
+class Blob(SQLModel, table=True):
+    """Content-addressed upload; ``ref_count`` counts the proofs and messages pointing at it."""
+    sha256: str = Field(primary_key=True, max_length=64)
+    content_type: str
+    size: int
+    ref_count: int = 0
+    # "pending" until app.derivatives has rendered the resized WebP variants, then "ready" or "failed"
+    derivative_state: str = "pending"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
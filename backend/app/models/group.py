@@ -2,15 +2,20 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 
 
 class Group(SQLModel, table=True):
+    __table_args__ = (Index("ix_group_is_public_id", "is_public", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     is_public: bool = True
     owner_id: int = Field(index=True)
     description: Optional[str] = None
+    # maintained by create_group/join_group so listings never count groupmember rows
+    member_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -30,22 +35,40 @@ class Proof(SQLModel, table=True):
     user_id: int = Field(index=True)
     day: date = Field(index=True)
     image_url: str
+    # set when image_url points into the blob store (see app.blobstore)
+    blob_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
     caption: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Message(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_message_group_created_id", "group_id", "created_at", "id"),
+        Index("ix_message_group_type_created_id", "group_id", "type", "created_at", "id"),
+        Index("ix_message_type_user_likes", "type", "user_id", "likes_count", "id"),
+        # partial: only learnings, for the global /learnings feed; queries must compare type to a literal
+        Index(
+            "ix_message_learning_created_id", "created_at", "id",
+            sqlite_where=text("type = 'learning'"), postgresql_where=text("type = 'learning'"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     group_id: int = Field(index=True)
     user_id: int = Field(index=True)
     content: str
     type: str = Field(default="chat", description="chat|learning|challenge|proof")
     image_url: Optional[str] = None
+    # set when image_url points into the blob store; the message holds a reference like a proof
+    blob_sha256: Optional[str] = Field(default=None, index=True, max_length=64)
     likes_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class MessageReaction(SQLModel, table=True):
+    """One like per (message, user); ``Message.likes_count`` is maintained write-behind (see app.likes)."""
+    __table_args__ = (Index("uq_messagereaction_message_user", "message_id", "user_id", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     message_id: int = Field(index=True)
     user_id: int = Field(index=True)
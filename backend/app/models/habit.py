@@ -2,6 +2,7 @@ from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional, Dict
 
+from sqlalchemy import Index, LargeBinary
 from sqlmodel import SQLModel, Field, Column, JSON
 
 
@@ -20,6 +21,8 @@ class Habit(SQLModel, table=True):
 
 
 class HabitLog(SQLModel, table=True):
+    __table_args__ = (Index("ix_habitlog_habit_id_day", "habit_id", "day"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     habit_id: int = Field(index=True)
     day: date = Field(index=True)
@@ -27,6 +30,44 @@ class HabitLog(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class HabitStreak(SQLModel, table=True):
+    """Streak state per habit, kept up to date by toggle_day (see app.streaks)."""
+    habit_id: int = Field(primary_key=True)
+    current: int = 0
+    longest: int = 0
+    last_completed: Optional[date] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class HabitYearBits(SQLModel, table=True):
+    """Completed days of one habit in one calendar year, one bit per day (see app.habit_bits)."""
+    habit_id: int = Field(primary_key=True)
+    year: int = Field(primary_key=True)
+    bits: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    completed_count: int = 0
+
+
+class HabitWeekRollup(SQLModel, table=True):
+    """Completions of one habit in one ISO week (week_start is the Monday); see app.rollups."""
+    __table_args__ = (Index("ix_habitweekrollup_user_week", "user_id", "week_start"),)
+
+    habit_id: int = Field(primary_key=True)
+    week_start: date = Field(primary_key=True)
+    user_id: int
+    completions: int = 0
+
+
+class UserWeekRollup(SQLModel, table=True):
+    """Per-user totals for one ISO week, read by /summary (see app.rollups)."""
+    user_id: int = Field(primary_key=True)
+    week_start: date = Field(primary_key=True)
+    completions: int = 0
+    habit_count: int = 0
+    best_habit_id: Optional[int] = None
+    best_completions: int = 0
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class HabitSubscription(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)
@@ -15,3 +15,16 @@ class User(SQLModel, table=True):
     big_why: Optional[str] = None
     lifebook: Optional[Dict] = Field(default=None, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class RefreshToken(SQLModel, table=True):
+    """One link in a rotation chain; only the SHA-256 of the opaque token is stored (see app.refresh_tokens)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(index=True)
+    token_hash: str = Field(unique=True, max_length=64)
+    # every token rotated from the same login shares a family; reuse revokes the family
+    family_id: str = Field(index=True, max_length=32)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+    revoked_at: Optional[datetime] = None
+    replaced_by_id: Optional[int] = None
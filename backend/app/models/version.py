@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from sqlmodel import SQLModel, Field
+
+
+class ResourceVersion(SQLModel, table=True):
+    """Change counter for one cacheable resource, e.g. ``groups`` or ``user:42`` (see app.versions)."""
+    key: str = Field(primary_key=True, max_length=64)
+    version: int = 0
@@ -0,0 +1,112 @@
+"""bcrypt off the request threads: a small process pool with its own admission limit.
+
+A bcrypt hash or verify burns ~250 ms of CPU at cost 12. Run inline, each one
+pins a threadpool worker (and holds the GIL), so a login burst starves every
+other sync endpoint. Here the work goes to ``PASSWORD_WORKERS`` processes;
+async callers await the result without occupying a thread, and at most
+``PASSWORD_MAX_PENDING`` operations may be queued — beyond that callers get
+``PasswordPoolBusy`` (the auth router answers 503 + Retry-After) instead of an
+ever-growing backlog.
+
+``BCRYPT_ROUNDS`` sets the cost for new hashes; ``needs_rehash`` reports
+hashes made with other parameters so login can upgrade them transparently.
+``PASSWORD_WORKERS=0`` hashes in the caller (the threadpool, for async callers).
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_settings
+
+
+class PasswordPoolBusy(RuntimeError):
+    """Too many hash/verify operations are already queued."""
+
+
+@lru_cache(maxsize=8)
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(password: str, password_hash: str) -> bool:
+    # verify reads the cost from the hash itself
+    return _context(4).verify(password, password_hash)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    return _context(get_settings().bcrypt_rounds).needs_update(password_hash)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+_lock = threading.Lock()
+
+
+def _pool() -> tuple[Optional[ProcessPoolExecutor], threading.BoundedSemaphore]:
+    global _executor, _slots
+    with _lock:
+        settings = get_settings()
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(max(1, settings.password_max_pending))
+        if _executor is None and settings.password_workers > 0:
+            _executor = ProcessPoolExecutor(settings.password_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor, _slots
+
+
+def shutdown() -> None:
+    global _executor, _slots
+    with _lock:
+        executor, _executor, _slots = _executor, None, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_sync(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(timeout=get_settings().password_queue_timeout_seconds):
+        raise PasswordPoolBusy()
+    try:
+        return fn(*args) if executor is None else executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+async def _run_async(fn, *args):
+    executor, slots = _pool()
+    # never block the event loop on the semaphore: full means busy
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        if executor is None:
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.wrap_future(executor.submit(fn, *args))
+    finally:
+        slots.release()
+
+
+def hash_password(password: str) -> str:
+    return _run_sync(_hash, password, get_settings().bcrypt_rounds)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return _run_sync(_verify, password, password_hash)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_async(_hash, password, get_settings().bcrypt_rounds)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_async(_verify, password, password_hash)
@@ -0,0 +1,266 @@
+"""Pub/sub fan-out for live group events (chat, learnings, proofs).
+
+Handlers call ``get_broker().publish(channel, event)`` after committing; it is
+thread-safe and never blocks on consumers, so sync endpoints can use it
+directly; async endpoints ``await publish_async(...)``. Fan-out is best-effort:
+a publish that fails is logged and dropped, never turned into an error for a
+write that already committed. WebSocket/SSE endpoints ``subscribe`` to a channel and drain a
+bounded queue.
+
+Backends (``settings.pubsub_backend``):
+
+* ``memory`` – in-process fan-out, for a single worker.
+* ``redis``  – publishes through Redis so every worker sees every event; each
+  worker holds one Redis subscription per channel it has local listeners for.
+
+Slow consumers never hold up publishers: when a subscriber's queue is full the
+oldest event is dropped and the next read yields ``{"event": "lagged", ...}``
+so the client can resync (e.g. ``GET /groups/{id}/messages?after_id=``).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_settings
+
+log = logging.getLogger(__name__)
+
+
+def group_channel(group_id: int) -> str:
+    return f"group:{group_id}"
+
+
+class Subscription:
+    """A bounded per-consumer queue. Only touched from the event loop thread."""
+
+    def __init__(self, maxsize: int) -> None:
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, event: dict) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Next event, a ``lagged`` notice if events were dropped, or None on timeout."""
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"event": "lagged", "dropped": dropped}
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """Fan-out to subscribers living on this process's event loop."""
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._subs: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, channel: str, event: dict) -> None:
+        self._dispatch(channel, event)
+
+    async def publish_async(self, channel: str, event: dict) -> None:
+        """``publish`` for async endpoints; never blocks the event loop."""
+        self.publish(channel, event)
+
+    def _dispatch(self, channel: str, event: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed() or channel not in self._subs:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(channel, event)
+        else:
+            loop.call_soon_threadsafe(self._fanout, channel, event)
+
+    def _fanout(self, channel: str, event: dict) -> None:
+        for sub in list(self._subs.get(channel, ())):
+            sub.offer(event)
+
+    async def _on_first_subscriber(self, channel: str) -> None:
+        pass
+
+    async def _on_last_unsubscribe(self, channel: str) -> None:
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        self._loop = asyncio.get_running_loop()
+        sub = Subscription(self.queue_size)
+        first = channel not in self._subs
+        self._subs[channel].add(sub)
+        if first:
+            try:
+                await self._on_first_subscriber(channel)
+            except BaseException:
+                self._forget(channel, sub)
+                raise
+        try:
+            yield sub
+        finally:
+            if self._forget(channel, sub):
+                await self._on_last_unsubscribe(channel)
+
+    def _forget(self, channel: str, sub: Subscription) -> bool:
+        """Drop ``sub``; True when it was the channel's last subscriber."""
+        subs = self._subs.get(channel)
+        if subs is None:
+            return False
+        subs.discard(sub)
+        if subs:
+            return False
+        del self._subs[channel]
+        return True
+
+    async def close(self) -> None:
+        self._subs.clear()
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis; a reader task feeds local subscribers.
+
+    ``client_factory(async_=bool)`` returns a sync or asyncio Redis client, so
+    tests can pass a local stand-in (e.g. fakeredis) instead of a server.
+    """
+
+    def __init__(self, client_factory: Callable[..., object], queue_size: int = 100, prefix: str = "habitlink:") -> None:
+        super().__init__(queue_size)
+        self._factory = client_factory
+        self._prefix = prefix
+        self._sync_client = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._closing = False
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: dict) -> None:
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = self._factory(async_=False)
+        try:
+            self._sync_client.publish(self._prefix + channel, json.dumps(event, default=str))
+        except Exception as exc:
+            # the write behind the event has committed; a 500 would only invite a duplicate retry
+            log.warning("redis publish to %s failed, event dropped: %r", channel, exc)
+
+    async def publish_async(self, channel: str, event: dict) -> None:
+        # the sync client does a network round trip; keep it off the loop
+        await run_in_threadpool(self.publish, channel, event)
+
+    async def _on_first_subscriber(self, channel: str) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._factory(async_=True).pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self._prefix + channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def _on_last_unsubscribe(self, channel: str) -> None:
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._prefix + channel)
+
+    async def _resubscribe(self) -> None:
+        pubsub = self._factory(async_=True).pubsub(ignore_subscribe_messages=True)
+        channels = [self._prefix + channel for channel in self._subs]
+        if channels:
+            await pubsub.subscribe(*channels)
+        self._pubsub = pubsub
+
+    async def _drop_pubsub(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def _read(self) -> None:
+        # one reader serves every local subscriber, so it must outlive Redis hiccups;
+        # it stops with the last channel and _on_first_subscriber starts it again
+        backoff = 0.0
+        while not self._closing and self._subs:
+            try:
+                if self._pubsub is None:
+                    await self._resubscribe()
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as exc:
+                backoff = min(max(backoff * 2, 0.1), 5.0)
+                log.warning("redis pub/sub read failed, resubscribing in %.1fs: %r", backoff, exc)
+                await self._drop_pubsub()
+                await asyncio.sleep(backoff)
+                continue
+            backoff = 0.0
+            if not msg or msg.get("type") != "message":
+                continue
+            channel = msg["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            self._fanout(channel[len(self._prefix):], json.loads(msg["data"]))
+
+    async def close(self) -> None:
+        await super().close()
+        self._closing = True
+        if self._reader is not None:
+            # the client may swallow a cancel mid-read; the flag ends the loop within one poll
+            self._reader.cancel()
+            await asyncio.wait({self._reader}, timeout=2.0)
+            self._reader = None
+        await self._drop_pubsub()
+
+
+def _redis_factory(url: str) -> Callable[..., object]:
+    def factory(async_: bool = False):
+        if async_:
+            import redis.asyncio as aioredis
+
+            return aioredis.from_url(url)
+        import redis
+
+        return redis.from_url(url)
+
+    return factory
+
+
+_broker: Optional[InProcessBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> InProcessBroker:
+    """Process-wide broker selected by ``settings.pubsub_backend``."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                settings = get_settings()
+                if settings.pubsub_backend == "redis":
+                    _broker = RedisBroker(_redis_factory(settings.redis_url), queue_size=settings.pubsub_queue_size)
+                else:
+                    _broker = InProcessBroker(queue_size=settings.pubsub_queue_size)
+    return _broker
+
+
+def set_broker(broker: Optional[InProcessBroker]) -> None:
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+
+async def close_broker() -> None:
+    if _broker is not None:
+        await _broker.close()
@@ -0,0 +1,127 @@
+"""Rotating refresh tokens.
+
+Tokens are 256-bit random strings handed to the client once; the database
+keeps only their SHA-256 (a slow KDF buys nothing for secrets with this much
+entropy). Each ``/auth/refresh`` spends the presented token and returns a new
+one in the same family. Presenting an already-spent token means it leaked or
+was replayed, so the whole family is revoked and the client has to log in
+again. ``python -m app.refresh_tokens prune`` deletes long-dead rows.
+"""
+from __future__ import annotations
+
+import hashlib
+import secrets
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlmodel import Session, delete, select, update
+
+from .config import get_settings
+from .models.user import RefreshToken
+
+
+class RefreshTokenError(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue(session: Session, user_id: int, family_id: Optional[str] = None) -> Tuple[str, RefreshToken]:
+    """Create a token (a new family unless given) and flush its row; caller commits."""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=digest(token),
+        family_id=family_id or uuid.uuid4().hex,
+        created_at=now,
+        expires_at=now + timedelta(days=get_settings().refresh_token_days),
+    )
+    session.add(row)
+    session.flush()
+    return token, row
+
+
+def revoke_family(session: Session, family_id: str) -> None:
+    session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def revoke_user(session: Session, user_id: int) -> None:
+    session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def _lookup(session: Session, token: str) -> Optional[RefreshToken]:
+    return session.exec(select(RefreshToken).where(RefreshToken.token_hash == digest(token))).first()
+
+
+def rotate(session: Session, token: str) -> Tuple[int, str]:
+    """Spend ``token`` and return ``(user_id, new_token)``; commits. Raises RefreshTokenError."""
+    row = _lookup(session, token)
+    if row is None:
+        raise RefreshTokenError("invalid")
+    family_id = row.family_id
+    if row.revoked_at is not None:
+        revoke_family(session, family_id)
+        session.commit()
+        raise RefreshTokenError("reused")
+    if row.expires_at <= datetime.utcnow():
+        raise RefreshTokenError("expired")
+
+    new_token, new_row = issue(session, row.user_id, family_id)
+    # compare-and-set, so two concurrent refreshes with one token cannot both win
+    spent = session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow(), replaced_by_id=new_row.id)
+    )
+    if spent.rowcount != 1:
+        session.rollback()
+        revoke_family(session, family_id)
+        session.commit()
+        raise RefreshTokenError("reused")
+    user_id = row.user_id
+    session.commit()
+    return user_id, new_token
+
+
+def revoke(session: Session, token: str) -> bool:
+    """Log out: revoke the family ``token`` belongs to; commits."""
+    row = _lookup(session, token)
+    if row is None:
+        return False
+    revoke_family(session, row.family_id)
+    session.commit()
+    return True
+
+
+def prune(session: Session, older_than_days: int = 7) -> int:
+    """Delete tokens that expired or were revoked more than ``older_than_days`` ago."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    result = session.exec(
+        delete(RefreshToken).where((RefreshToken.expires_at < cutoff) | (RefreshToken.revoked_at < cutoff))
+    )
+    session.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["prune"]:
+        sys.exit("usage: python -m app.refresh_tokens prune")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"pruned {prune(session)} refresh tokens")
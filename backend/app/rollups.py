@@ -0,0 +1,171 @@
+"""Per-user, per-ISO-week completion rollups behind ``/summary``.
+
+``HabitWeekRollup`` counts completions per habit and week; ``UserWeekRollup``
+holds the week's total, the best habit and the number of habits the user had
+by the end of that week (the completion-rate denominator). ``toggle_day``
+updates both through ``apply_toggle`` and paths that add or remove habits call
+``adjust_habit_count``, so the summary is a primary-key read and a trend over
+N weeks is one range scan. Weeks start on Monday.
+
+``HabitLog`` stays the source of truth; ``rebuild`` recomputes rollups in bulk:
+
+    python -m app.rollups backfill
+"""
+from __future__ import annotations
+
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, delete, select, update
+
+from .models.habit import Habit, HabitLog, HabitWeekRollup, UserWeekRollup
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+@dataclass(frozen=True)
+class WeekStats:
+    week_start: date
+    completions: int = 0
+    habit_count: int = 0
+    best_habit_id: Optional[int] = None
+    best_completions: int = 0
+
+    @property
+    def completion_rate(self) -> float:
+        possible = self.habit_count * 7
+        return round(self.completions / possible, 4) if possible else 0.0
+
+
+def _as_stats(week: date, row: Optional[UserWeekRollup]) -> WeekStats:
+    if row is None:
+        return WeekStats(week_start=week)
+    return WeekStats(week, row.completions, row.habit_count, row.best_habit_id, row.best_completions)
+
+
+def _habit_count(session: Session, user_id: int, week: date) -> int:
+    end = datetime.combine(week + timedelta(days=7), time.min)
+    return session.exec(select(func.count()).select_from(Habit).where(Habit.user_id == user_id, Habit.created_at < end)).one()
+
+
+def _bump(session: Session, model, key: dict, delta: int, **insert_values) -> None:
+    """Atomically add ``delta`` to ``completions`` of the row at ``key``, creating it if missing."""
+    where = [getattr(model, k) == v for k, v in key.items()]
+    if session.exec(update(model).where(*where).values(completions=model.completions + delta)).rowcount:
+        return
+    try:
+        with session.begin_nested():
+            session.add(model(**key, completions=max(delta, 0), **insert_values))
+    except IntegrityError:
+        # a concurrent toggle created it first
+        session.exec(update(model).where(*where).values(completions=model.completions + delta))
+
+
+def apply_toggle(session: Session, user_id: int, habit_id: int, day: date, completed: bool) -> WeekStats:
+    """Account for ``day`` flipping to ``completed`` in that week's rollups (caller commits)."""
+    week = week_start(day)
+    delta = 1 if completed else -1
+    _bump(session, HabitWeekRollup, {"habit_id": habit_id, "week_start": week}, delta, user_id=user_id)
+    _bump(session, UserWeekRollup, {"user_id": user_id, "week_start": week}, delta)
+    best = session.exec(
+        select(HabitWeekRollup.habit_id, HabitWeekRollup.completions)
+        .where(HabitWeekRollup.user_id == user_id, HabitWeekRollup.week_start == week, HabitWeekRollup.completions > 0)
+        .order_by(HabitWeekRollup.completions.desc(), HabitWeekRollup.habit_id)
+        .limit(1)
+    ).first()
+    row = session.get(UserWeekRollup, (user_id, week))
+    session.refresh(row)
+    row.best_habit_id, row.best_completions = best if best else (None, 0)
+    row.habit_count = _habit_count(session, user_id, week)
+    row.updated_at = datetime.utcnow()
+    session.add(row)
+    return _as_stats(week, row)
+
+
+def adjust_habit_count(session: Session, user_id: int, created_at: datetime, delta: int) -> None:
+    """Habits created at ``created_at`` were added (``delta`` > 0) or removed: fix every stored week they count in (caller commits)."""
+    session.exec(
+        update(UserWeekRollup)
+        .where(UserWeekRollup.user_id == user_id, UserWeekRollup.week_start >= week_start(created_at.date()))
+        .values(habit_count=UserWeekRollup.habit_count + delta)
+    )
+
+
+def forget_user(session: Session, user_id: int) -> None:
+    """Drop a deleted user's rollups (caller commits)."""
+    session.exec(delete(HabitWeekRollup).where(HabitWeekRollup.user_id == user_id))
+    session.exec(delete(UserWeekRollup).where(UserWeekRollup.user_id == user_id))
+
+
+def week_stats(session: Session, user_id: int, week: date) -> WeekStats:
+    """The rollup for the ISO week starting ``week`` (zeros if nothing was logged)."""
+    return _as_stats(week, session.get(UserWeekRollup, (user_id, week)))
+
+
+def trend(session: Session, user_id: int, first_week: date, last_week: date) -> List[WeekStats]:
+    """Every week from ``first_week`` to ``last_week`` inclusive, oldest first, from one range read."""
+    rows = {
+        r.week_start: r
+        for r in session.exec(
+            select(UserWeekRollup).where(
+                UserWeekRollup.user_id == user_id,
+                UserWeekRollup.week_start >= first_week,
+                UserWeekRollup.week_start <= last_week,
+            )
+        ).all()
+    }
+    weeks = (last_week - first_week).days // 7 + 1
+    return [_as_stats(w, rows.get(w)) for w in (first_week + timedelta(weeks=i) for i in range(weeks))]
+
+
+def rebuild(session: Session, user_ids: Optional[List[int]] = None, batch_size: int = 200) -> int:
+    """Recompute rollups from ``HabitLog`` for ``user_ids`` (default: everyone); returns user-weeks written."""
+    if user_ids is None:
+        user_ids = sorted(set(session.exec(select(Habit.user_id).distinct()).all()))
+    written = 0
+    for i in range(0, len(user_ids), batch_size):
+        batch = user_ids[i:i + batch_size]
+        session.exec(delete(HabitWeekRollup).where(HabitWeekRollup.user_id.in_(batch)))
+        session.exec(delete(UserWeekRollup).where(UserWeekRollup.user_id.in_(batch)))
+        per_habit: Dict[tuple, int] = defaultdict(int)
+        logs = session.exec(
+            select(Habit.user_id, HabitLog.habit_id, HabitLog.day)
+            .join(Habit, Habit.id == HabitLog.habit_id)
+            .where(Habit.user_id.in_(batch), HabitLog.completed == True)  # noqa: E712
+        )
+        for user_id, habit_id, day in logs:
+            per_habit[(user_id, habit_id, week_start(day))] += 1
+        created: Dict[int, List[datetime]] = defaultdict(list)
+        for user_id, created_at in session.exec(select(Habit.user_id, Habit.created_at).where(Habit.user_id.in_(batch))):
+            created[user_id].append(created_at)
+        per_user: Dict[tuple, UserWeekRollup] = {}
+        for (user_id, habit_id, week), n in sorted(per_habit.items()):
+            session.add(HabitWeekRollup(habit_id=habit_id, week_start=week, user_id=user_id, completions=n))
+            row = per_user.get((user_id, week))
+            if row is None:
+                end = datetime.combine(week + timedelta(days=7), time.min)
+                count = sum(1 for c in created[user_id] if c is None or c < end)
+                row = per_user[(user_id, week)] = UserWeekRollup(user_id=user_id, week_start=week, habit_count=count)
+            row.completions += n
+            if n > row.best_completions:
+                row.best_habit_id, row.best_completions = habit_id, n
+        session.add_all(per_user.values())
+        written += len(per_user)
+        session.commit()
+    return written
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("usage: python -m app.rollups backfill")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"rebuilt {rebuild(session)} user-week rollups")
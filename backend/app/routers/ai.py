@@ -1,33 +1,34 @@
 from __future__ import annotations
-from typing import List
+import time
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Response
+from pydantic import BaseModel, Field
 from sqlmodel import Session, select
 
+from ..config import get_settings
 from ..db import get_session
 from ..routers.toolbox import Tool
+from ..tool_index import get_index
 
 router = APIRouter(prefix="/ai", tags=["ai"]) 
 
 
 class SuggestRequest(BaseModel):
     query: str
+    k: Optional[int] = Field(default=None, ge=1, le=50)
 
 
 @router.post("/suggest", response_model=List[Tool])
-def suggest_tools(payload: SuggestRequest, session: Session = Depends(get_session)):
-    q = payload.query.lower()
-    tools = session.exec(select(Tool)).all()
-    scored = []
-    for t in tools:
-        score = 0
-        if q in (t.title or '').lower():
-            score += 2
-        if t.keywords:
-            score += sum(1 for kw in t.keywords if kw.lower() in q)
-        if q in (t.description or '').lower():
-            score += 1
-        if score:
-            scored.append((score, t))
-    return [t for _, t in sorted(scored, key=lambda x: -x[0])][:3]
+def suggest_tools(payload: SuggestRequest, response: Response, session: Session = Depends(get_session)):
+    """Best-matching tools for a free-text problem description (BM25, see app.tool_index)."""
+    index = get_index()
+    index.sync(session)
+    start = time.perf_counter()
+    hits = index.search(payload.query, k=payload.k or get_settings().suggest_top_k)
+    response.headers["Server-Timing"] = f"search;dur={(time.perf_counter() - start) * 1000:.3f}"
+    if not hits:
+        return []
+    ids = [tool_id for tool_id, _ in hits]
+    tools = {t.id: t for t in session.exec(select(Tool).where(Tool.id.in_(ids))).all()}
+    return [tools[i] for i in ids if i in tools]
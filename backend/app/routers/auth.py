@@ -1,38 +1,21 @@
-from datetime import timedelta
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from sqlmodel import Session, select
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from .. import refresh_tokens
 from ..config import get_settings
-from ..core import create_access_token, hash_password, verify_password
-from ..db import get_session
+from ..core import create_access_token, hash_password_async, needs_rehash, verify_password_async
+from ..db import get_async_session
+from ..deps import Principal, get_principal, invalidate_user
 from ..models.user import User
+from ..passwords import PasswordPoolBusy
 
 router = APIRouter(prefix="/auth", tags=["auth"]) 
 
 
-def _ensure_user_profile_columns(session: Session) -> None:
-    """SQLite dev helper: add newly introduced nullable columns if missing."""
-    try:
-        conn = session.get_bind().raw_connection()
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(user)")
-        cols = [r[1] for r in cur.fetchall()]
-        if "description" not in cols:
-            cur.execute("ALTER TABLE user ADD COLUMN description TEXT")
-        if "big_why" not in cols:
-            cur.execute("ALTER TABLE user ADD COLUMN big_why TEXT")
-        if "lifebook" not in cols:
-            # JSON in SQLite is TEXT under the hood; SQLModel maps via Column(JSON)
-            cur.execute("ALTER TABLE user ADD COLUMN lifebook TEXT")
-        conn.commit()
-        cur.close()
-    except Exception:
-        # best effort only in dev
-        pass
-
-
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
@@ -43,34 +26,103 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class AuthResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: int
+    refresh_token: str
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _access_response(user_id: int, refresh_token: str) -> AuthResponse:
+    settings = get_settings()
+    token = create_access_token(str(user_id), secret_key=settings.jwt_secret)
+    return AuthResponse(access_token=token, expires_in=settings.access_token_minutes * 60, refresh_token=refresh_token)
+
+
+async def _issue_tokens(session: AsyncSession, user_id: int) -> AuthResponse:
+    refresh_token, _ = await session.run_sync(refresh_tokens.issue, user_id)
+    await session.commit()
+    return _access_response(user_id, refresh_token)
+
+
+# bcrypt is awaited from the password pool, so these endpoints hold neither a
+# thread nor, once ``_lookup`` has closed the session, a pooled connection while
+# a hash is computed.
+
+async def _lookup(session: AsyncSession, email: str) -> Optional[Tuple[int, str]]:
+    found = (await session.exec(select(User.id, User.password_hash).where(User.email == email))).first()
+    await session.close()
+    return tuple(found) if found else None
 
 
 @router.post("/register", response_model=AuthResponse)
-def register(payload: RegisterRequest, session: Session = Depends(get_session)):
-    _ensure_user_profile_columns(session)
-    existing = session.exec(select(User).where(User.email == payload.email)).first()
-    if existing:
+async def register(payload: RegisterRequest, session: AsyncSession = Depends(get_async_session)):
+    if await _lookup(session, payload.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-    user = User(email=payload.email, password_hash=hash_password(payload.password))
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except PasswordPoolBusy:
+        raise _busy()
+    user = User(email=payload.email, password_hash=password_hash)
     session.add(user)
-    session.commit()
-    session.refresh(user)
-
-    settings = get_settings()
-    token = create_access_token(str(user.id), secret_key=settings.jwt_secret, expires_delta=timedelta(minutes=30))
-    return AuthResponse(access_token=token)
+    await session.commit()
+    await session.refresh(user)
+    return await _issue_tokens(session, user.id)
 
 
 @router.post("/login", response_model=AuthResponse)
-def login(payload: LoginRequest, session: Session = Depends(get_session)):
-    _ensure_user_profile_columns(session)
-    user = session.exec(select(User).where(User.email == payload.email)).first()
-    if not user or not verify_password(payload.password, user.password_hash):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+async def login(payload: LoginRequest, session: AsyncSession = Depends(get_async_session)):
+    found = await _lookup(session, payload.email)
+    try:
+        if not found or not await verify_password_async(payload.password, found[1]):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        user_id, password_hash = found
+        if needs_rehash(password_hash):
+            # cost changed since this hash was made; the plaintext is only in hand right now
+            new_hash = await hash_password_async(payload.password)
+            await _store_hash(session, user_id, new_hash)
+    except PasswordPoolBusy:
+        raise _busy()
+    return await _issue_tokens(session, user_id)
 
-    settings = get_settings()
-    token = create_access_token(str(user.id), secret_key=settings.jwt_secret, expires_delta=timedelta(minutes=30))
-    return AuthResponse(access_token=token)
+
+async def _store_hash(session: AsyncSession, user_id: int, password_hash: str) -> None:
+    await session.exec(update(User).where(User.id == user_id).values(password_hash=password_hash))
+    await session.commit()
+    invalidate_user(user_id)
+
+
+# Refresh and logout never touch bcrypt: the refresh token is high-entropy, so
+# looking up its SHA-256 is the whole check.
+
+@router.post("/refresh", response_model=AuthResponse)
+async def refresh(payload: RefreshRequest, session: AsyncSession = Depends(get_async_session)):
+    try:
+        user_id, refresh_token = await session.run_sync(refresh_tokens.rotate, payload.refresh_token)
+    except refresh_tokens.RefreshTokenError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Refresh token {exc.reason}")
+    return _access_response(user_id, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(payload: RefreshRequest, session: AsyncSession = Depends(get_async_session)):
+    await session.run_sync(refresh_tokens.revoke, payload.refresh_token)
+
+
+@router.delete("/sessions", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_sessions(user: Principal = Depends(get_principal), session: AsyncSession = Depends(get_async_session)):
+    """Sign out everywhere: revoke every refresh token of the current user."""
+    await session.run_sync(refresh_tokens.revoke_user, user.id)
+    await session.commit()
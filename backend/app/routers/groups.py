@@ -2,56 +2,39 @@ from __future__ import annotations
 from datetime import date, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, status
 from pydantic import BaseModel
 from fastapi import Form
-from sqlmodel import Session, select
+from sqlalchemy import func, literal, tuple_
+from sqlmodel import Session, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..deps import get_current_user
-from ..db import get_session
+from .. import blobstore, derivatives, likes, versions
+from ..deps import Principal, get_principal
+from ..db import get_async_session, get_session
 from ..config import get_settings
 from ..models.group import Group, GroupMember, Proof, Message, MessageReaction
-from ..models.user import User
+from ..pubsub import get_broker, group_channel
+from ..search import load_ranked, ranked_ids
 
 router = APIRouter(prefix="/groups", tags=["groups"]) 
 
-def _ensure_group_columns(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection()
-        cur = conn.cursor()
-        # group table (name is reserved, quote it)
-        cur.execute("PRAGMA table_info(\"group\")")
-        cols = [r[1] for r in cur.fetchall()]
-        if "description" not in cols:
-            cur.execute("ALTER TABLE \"group\" ADD COLUMN description TEXT")
-        # groupmember table
-        cur.execute("PRAGMA table_info(groupmember)")
-        cols2 = [r[1] for r in cur.fetchall()]
-        if "habit_title" not in cols2:
-            cur.execute("ALTER TABLE groupmember ADD COLUMN habit_title TEXT")
-        if "frequency_per_week" not in cols2:
-            cur.execute("ALTER TABLE groupmember ADD COLUMN frequency_per_week INTEGER DEFAULT 7")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
 
-def _ensure_proof_message_columns(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection()
-        cur = conn.cursor()
-        # proof.caption
-        cur.execute("PRAGMA table_info(proof)")
-        cols = [r[1] for r in cur.fetchall()]
-        if "caption" not in cols:
-            cur.execute("ALTER TABLE proof ADD COLUMN caption TEXT")
-        # message.image_url and extended type already tolerated by app; add image_url if missing
-        cur.execute("PRAGMA table_info(message)")
-        mcols = [r[1] for r in cur.fetchall()]
-        if "image_url" not in mcols:
-            cur.execute("ALTER TABLE message ADD COLUMN image_url TEXT")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
+def _message_dict(m: Message, variants: Optional[dict] = None) -> dict:
+    d = {
+        "id": m.id, "user_id": m.user_id, "content": m.content, "type": m.type, "image_url": m.image_url,
+        "likes_count": m.likes_count, "created_at": m.created_at.isoformat(),
+    }
+    if variants is not None:
+        d.update(variants.get(m.image_url) or {"thumb_url": None, "medium_url": None})
+    return d
+
+
+def _proof_event(p: Proof) -> dict:
+    return {
+        "event": "proof",
+        "data": {"id": p.id, "user_id": p.user_id, "day": p.day.isoformat(), "image_url": p.image_url, "caption": p.caption},
+    }
 
 
 class GroupCreate(BaseModel):
@@ -76,60 +59,64 @@ class GroupDetail(BaseModel):
 
 
 @router.post("", response_model=GroupRead)
-def create_group(
+async def create_group(
     payload: GroupCreate,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_group_columns(session)
-    _ensure_proof_message_columns(session)
-    _ensure_proof_message_columns(session)
-    _ensure_proof_message_columns(session)
-    g = Group(name=payload.name, is_public=payload.is_public, owner_id=user.id, description=payload.description) 
+    g = Group(name=payload.name, is_public=payload.is_public, owner_id=user.id, description=payload.description, member_count=1)
     session.add(g)
-    session.commit()
-    session.refresh(g)
+    await session.flush()
 
     m = GroupMember(group_id=g.id, user_id=user.id, role="owner")
     session.add(m)
-    session.commit()
+    # one transaction for the group, its owner and the stamps
+    await session.run_sync(versions.bump, "groups", f"user:{user.id}")
+    await session.commit()
 
     return GroupRead(id=g.id, name=g.name, members=1, owner_id=g.owner_id, description=g.description)
 
 
 @router.get("", response_model=List[GroupRead])
-def list_groups(is_public: Optional[bool] = None, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_group_columns(session)
-    try:
-        conn = session.get_bind().raw_connection(); cur = conn.cursor()
-        cur.execute("PRAGMA table_info(\"group\")"); cur.fetchall(); cur.close()
-    except Exception:
-        pass
-    q = select(Group).order_by(Group.created_at.desc())
+async def list_groups(
+    response: Response,
+    is_public: Optional[bool] = None,
+    before_id: Optional[int] = Query(None, description="Keyset cursor: return groups with a smaller id"),
+    limit: int = Query(50, ge=1, le=200),
+    search: Optional[str] = Query(None, description="Full-text match on name/description, best first"),
+    offset: int = Query(0, ge=0, description="Page offset for search results"),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """Newest groups first. Pass the last id of a page as ``before_id`` (also sent as ``X-Next-Before-Id``).
+
+    With ``search`` results are ranked instead and paged by ``offset`` (``X-Next-Offset``).
+    """
+    if search:
+        where = [Group.is_public == is_public] if is_public is not None else []
+        ids = await session.run_sync(ranked_ids, "group", search, where=where, limit=limit, offset=offset)
+        groups = await session.run_sync(load_ranked, "group", ids)
+        if len(groups) == limit:
+            response.headers["X-Next-Offset"] = str(offset + limit)
+        return [GroupRead(id=g.id, name=g.name, members=g.member_count, owner_id=g.owner_id, description=g.description) for g in groups]
+    q = select(Group)
     if is_public is not None:
         q = q.where(Group.is_public == is_public)
-    groups = session.exec(q).all()
-    result: List[GroupRead] = []
-    for g in groups:
-        count = session.exec(select(GroupMember).where(GroupMember.group_id == g.id)).all()
-        result.append(GroupRead(id=g.id, name=g.name, members=len(count), owner_id=g.owner_id, description=g.description))
-    return result
+    if before_id is not None:
+        q = q.where(Group.id < before_id)
+    groups = (await session.exec(q.order_by(Group.id.desc()).limit(limit))).all()
+    if len(groups) == limit:
+        response.headers["X-Next-Before-Id"] = str(groups[-1].id)
+    return [GroupRead(id=g.id, name=g.name, members=g.member_count, owner_id=g.owner_id, description=g.description) for g in groups]
 
 @router.get("/my", response_model=List[GroupRead])
 @router.get("/mine", response_model=List[GroupRead])
 @router.get("/me/list", response_model=List[GroupRead])
-def list_my_groups(session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_group_columns(session)
-    memberships = session.exec(select(GroupMember).where(GroupMember.user_id == user.id)).all()
-    if not memberships:
-        return []
-    ids = [m.group_id for m in memberships]
-    groups = session.exec(select(Group).where(Group.id.in_(ids))).all()
-    result: List[GroupRead] = []
-    for g in groups:
-        count = session.exec(select(GroupMember).where(GroupMember.group_id == g.id)).all()
-        result.append(GroupRead(id=g.id, name=g.name, members=len(count), owner_id=g.owner_id, description=g.description))
-    return result
+async def list_my_groups(session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
+    groups = (await session.exec(
+        select(Group).join(GroupMember, GroupMember.group_id == Group.id).where(GroupMember.user_id == user.id)
+    )).all()
+    return [GroupRead(id=g.id, name=g.name, members=g.member_count, owner_id=g.owner_id, description=g.description) for g in groups]
 
 
 class JoinRequest(BaseModel):
@@ -138,13 +125,11 @@ class JoinRequest(BaseModel):
 
 
 @router.post("/{group_id}/join")
-def join_group(group_id: int, payload: Optional[JoinRequest] = None, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_group_columns(session)
-    _ensure_proof_message_columns(session)
-    g = session.get(Group, group_id)
+async def join_group(group_id: int, payload: Optional[JoinRequest] = None, session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
+    g = await session.get(Group, group_id)
     if not g:
         raise HTTPException(status_code=404)
-    existing = session.exec(select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id)).first()
+    existing = (await session.exec(select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id))).first()
     if existing:
         return {"joined": True}
     session.add(GroupMember(
@@ -154,18 +139,18 @@ def join_group(group_id: int, payload: Optional[JoinRequest] = None, session: Se
         habit_title=(payload.habit_title if payload else None),
         frequency_per_week=(payload.frequency_per_week if (payload and payload.frequency_per_week) else 7)
     ))
-    session.commit()
+    await session.exec(update(Group).where(Group.id == group_id).values(member_count=Group.member_count + 1))
+    await session.run_sync(versions.bump, "groups", f"user:{user.id}")
+    await session.commit()
     return {"joined": True}
 
 
 @router.get("/{group_id}", response_model=GroupDetail)
-def get_group(group_id: int, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_group_columns(session)
-    _ensure_proof_message_columns(session)
-    g = session.get(Group, group_id)
+async def get_group(group_id: int, session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
+    g = await session.get(Group, group_id)
     if not g:
         raise HTTPException(status_code=404)
-    members = session.exec(select(GroupMember).where(GroupMember.group_id == group_id)).all()
+    members = (await session.exec(select(GroupMember).where(GroupMember.group_id == group_id))).all()
     member_dicts = [{"user_id": m.user_id, "role": m.role, "habit_title": m.habit_title, "frequency_per_week": m.frequency_per_week} for m in members]
     return GroupDetail(id=g.id, name=g.name, description=g.description, members=member_dicts)
 
@@ -175,18 +160,10 @@ class ProofCreate(BaseModel):
     caption: Optional[str] = None
 
 
-@router.post("/{group_id}/proofs", status_code=201)
-def upload_proof(
-    group_id: int,
-    payload: ProofCreate,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
-):
-    _ensure_proof_message_columns(session)
-    _ensure_proof_message_columns(session)
-    _ensure_proof_message_columns(session)
+def _proof_membership(session: Session, group_id: int, user_id: int) -> GroupMember:
+    """Membership of the uploader, or 403/400 if they may not post another proof this week."""
     membership = session.exec(
-        select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id)
+        select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
     ).first()
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
@@ -194,12 +171,33 @@ def upload_proof(
     # Enforce weekly proof limit
     today = date.today()
     monday = today - timedelta(days=today.weekday())
-    count = session.exec(select(Proof).where(Proof.group_id==group_id, Proof.user_id==user.id, Proof.day>=monday, Proof.day<=today)).all()
-    if len(count) >= (membership.frequency_per_week or 7):
+    count = session.exec(
+        select(func.count()).select_from(Proof).where(Proof.group_id==group_id, Proof.user_id==user_id, Proof.day>=monday, Proof.day<=today)
+    ).one()
+    if count >= (membership.frequency_per_week or 7):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Weekly proof limit reached")
-    p = Proof(group_id=group_id, user_id=user.id, day=today, image_url=payload.image_url, caption=payload.caption)
+    return membership
+
+
+def _blob_ref(session: Session, image_url: Optional[str]) -> Optional[str]:
+    """Reference a stored blob when a proof or message reuses an uploaded image by URL."""
+    sha = blobstore.sha_from_url(image_url)
+    return sha if sha and blobstore.acquire(session, sha) else None
+
+
+@router.post("/{group_id}/proofs", status_code=201)
+async def upload_proof(
+    group_id: int,
+    payload: ProofCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    await session.run_sync(_proof_membership, group_id, user.id)
+    p = Proof(group_id=group_id, user_id=user.id, day=date.today(), image_url=payload.image_url, caption=payload.caption)
+    p.blob_sha256 = await session.run_sync(_blob_ref, payload.image_url)
     session.add(p)
-    session.commit()
+    await session.commit()
+    await get_broker().publish_async(group_channel(group_id), _proof_event(p))
     return {"id": p.id}
 
 
@@ -209,50 +207,66 @@ def upload_proof_file(
     file: UploadFile = File(...),
     caption: Optional[str] = Form(None),
     session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_principal),
 ):
-    membership = session.exec(
-        select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id)
-    ).first()
-    if not membership:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    # Membership and quota first, so rejected uploads never touch the disk.
+    # Stays a sync endpoint on a sync Session: the chunked copy and hashing below
+    # are blocking file I/O and belong in the threadpool, off the event loop.
+    _proof_membership(session, group_id, user.id)
 
     settings = get_settings()
-    import os
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    import re
-    safe_name = os.path.basename(file.filename).replace(' ', '_')
-    filename = f"g{group_id}_u{user.id}_{date.today().isoformat()}_{safe_name}"
-    dest_path = os.path.join(settings.upload_dir, filename)
-    with open(dest_path, "wb") as f:
-        f.write(file.file.read())
-    url = f"/uploads/{filename}"
-
-    # Enforce weekly proof limit for file upload as well
-    today = date.today()
-    monday = today - timedelta(days=today.weekday())
-    count = session.exec(select(Proof).where(Proof.group_id==group_id, Proof.user_id==user.id, Proof.day>=monday, Proof.day<=today)).all()
-    if len(count) >= (membership.frequency_per_week or 7):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Weekly proof limit reached")
-    p = Proof(group_id=group_id, user_id=user.id, day=today, image_url=url, caption=caption)
+    blob = blobstore.store(session, file.file, settings.upload_dir, settings.proof_max_bytes)
+    url = blobstore.blob_url(blob)
+
+    p = Proof(group_id=group_id, user_id=user.id, day=date.today(), image_url=url, blob_sha256=blob.sha256, caption=caption)
     session.add(p)
-    session.commit()
+    try:
+        session.commit()
+    except Exception:
+        blobstore.discard_orphan(session, blob, settings.upload_dir)
+        raise
+    derivatives.schedule(blob)
+    get_broker().publish(group_channel(group_id), _proof_event(p))
     return {"id": p.id, "image_url": url}
 
 
+@router.delete("/{group_id}/proofs/{proof_id}", status_code=204)
+def delete_proof(
+    group_id: int,
+    proof_id: int,
+    session: Session = Depends(get_session),
+    user: Principal = Depends(get_principal),
+):
+    """The author removes a proof; its blob goes once no proof uses it. Sync: the release may unlink files."""
+    p = session.get(Proof, proof_id)
+    if not p or p.group_id != group_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if p.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    session.delete(p)
+    if p.blob_sha256:
+        blobstore.release(session, p.blob_sha256, get_settings().upload_dir)  # commits
+    else:
+        session.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/{group_id}/proofs/week")
-def list_week_proofs(group_id: int, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_proof_message_columns(session)
-    g = session.get(Group, group_id)
+async def list_week_proofs(group_id: int, session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
+    g = await session.get(Group, group_id)
     if not g:
         raise HTTPException(status_code=404)
     today = date.today()
     monday = today - timedelta(days=today.weekday())
     sunday = monday + timedelta(days=6)
-    proofs = session.exec(
+    proofs = (await session.exec(
         select(Proof).where(Proof.group_id == group_id, Proof.day >= monday, Proof.day <= sunday)
-    ).all()
-    return [{"user_id": p.user_id, "day": p.day.isoformat(), "image_url": p.image_url, "caption": p.caption} for p in proofs]
+    )).all()
+    variants = await session.run_sync(derivatives.variant_urls, [p.image_url for p in proofs])
+    return [
+        {"user_id": p.user_id, "day": p.day.isoformat(), "image_url": p.image_url, "caption": p.caption, **variants[p.image_url]}
+        for p in proofs
+    ]
 
 
 class MessageCreate(BaseModel):
@@ -262,42 +276,134 @@ class MessageCreate(BaseModel):
 
 
 @router.post("/{group_id}/messages", status_code=201)
-def post_message(
+async def post_message(
     group_id: int,
     payload: MessageCreate,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    membership = session.exec(
+    membership = (await session.exec(
         select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id)
-    ).first()
+    )).first()
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
     msg = Message(group_id=group_id, user_id=user.id, content=payload.content, type=payload.type, image_url=payload.image_url)
+    # the message shows the image too, so it keeps the blob alive after the proof goes
+    msg.blob_sha256 = await session.run_sync(_blob_ref, payload.image_url)
     # If content denotes a proof shortcut like '/proof <caption>' and an image_url is present, also create a Proof
     if payload.type == 'proof' and payload.image_url:
         p = Proof(group_id=group_id, user_id=user.id, day=date.today(), image_url=payload.image_url, caption=payload.content)
+        p.blob_sha256 = await session.run_sync(_blob_ref, payload.image_url)
         session.add(p)
     session.add(msg)
-    session.commit()
+    if msg.type == "learning":
+        await session.run_sync(versions.bump, "learnings")
+    await session.commit()
+    await get_broker().publish_async(group_channel(group_id), {"event": "message", "data": _message_dict(msg)})
     return {"id": msg.id}
 
 
+async def _set_like(session: AsyncSession, group_id: int, message_id: int, user_id: int, liked: bool) -> dict:
+    msg = await session.get(Message, message_id)
+    if not msg or msg.group_id != group_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    # learnings are public through /learnings; anything else only to members
+    if msg.type != "learning":
+        membership = (await session.exec(
+            select(GroupMember.id).where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+        )).first()
+        if not membership:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    changed = await session.run_sync(likes.record, message_id, user_id, liked)
+    await session.commit()
+    if changed:
+        likes.add(message_id, 1 if liked else -1)
+    return {"message_id": message_id, "liked": liked, "likes_count": msg.likes_count + likes.pending(message_id)}
+
+
+@router.post("/{group_id}/messages/{message_id}/like")
+async def like_message(
+    group_id: int,
+    message_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """Idempotent: liking again changes nothing. ``likes_count`` includes not-yet-flushed likes."""
+    return await _set_like(session, group_id, message_id, user.id, True)
+
+
+@router.delete("/{group_id}/messages/{message_id}/like")
+@router.post("/{group_id}/messages/{message_id}/unlike")
+async def unlike_message(
+    group_id: int,
+    message_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    return await _set_like(session, group_id, message_id, user.id, False)
+
+
+@router.get("/{group_id}/messages/search")
+async def search_messages(
+    group_id: int,
+    response: Response,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """Members only: messages in this group matching ``q``, best match first."""
+    membership = (await session.exec(
+        select(GroupMember).where(GroupMember.group_id == group_id, GroupMember.user_id == user.id)
+    )).first()
+    if not membership:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    ids = await session.run_sync(ranked_ids, "message", q, where=[Message.group_id == group_id], limit=limit, offset=offset)
+    msgs = await session.run_sync(load_ranked, "message", ids)
+    if len(msgs) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    variants = await session.run_sync(derivatives.variant_urls, [m.image_url for m in msgs])
+    return [_message_dict(m, variants) for m in msgs]
+
+
 @router.get("/{group_id}/messages")
-def list_messages(
+async def list_messages(
     group_id: int,
     msg_type: Optional[str] = Query(None, alias="type"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    before_id: Optional[int] = Query(None, description="Page back: messages older than this one"),
+    after_id: Optional[int] = Query(None, description="Poll: messages newer than this one"),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_proof_message_columns(session)
+    """Messages in chronological order.
+
+    Without a cursor this is the newest page. ``before_id`` walks back through
+    history and ``after_id`` returns what arrived since; both seek on the
+    ``(group_id[, type], created_at, id)`` index instead of scanning past an offset.
+    """
     q = select(Message).where(Message.group_id == group_id)
     if msg_type:
         q = q.where(Message.type == msg_type)
-    q = q.order_by(Message.created_at.desc())
-    msgs = session.exec(q.offset(offset).limit(limit)).all()
-    msgs = list(reversed(msgs))
-    return [{"id": m.id, "user_id": m.user_id, "content": m.content, "type": m.type, "image_url": m.image_url, "created_at": m.created_at.isoformat()} for m in msgs]
+    key = tuple_(Message.created_at, Message.id)
+    anchor_id = after_id if after_id is not None else before_id
+    if anchor_id is not None:
+        anchor = await session.get(Message, anchor_id)
+        if not anchor or anchor.group_id != group_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown cursor")
+        anchor_key = tuple_(literal(anchor.created_at), literal(anchor.id))
+    if after_id is not None:
+        q = q.where(key > anchor_key).order_by(Message.created_at.asc(), Message.id.asc())
+        msgs = (await session.exec(q.limit(limit))).all()
+    else:
+        if before_id is not None:
+            q = q.where(key < anchor_key)
+        q = q.order_by(Message.created_at.desc(), Message.id.desc())
+        if before_id is None and offset:
+            q = q.offset(offset)
+        msgs = list(reversed((await session.exec(q.limit(limit))).all()))
+    variants = await session.run_sync(derivatives.variant_urls, [m.image_url for m in msgs])
+    return [_message_dict(m, variants) for m in msgs]
@@ -2,18 +2,26 @@ from __future__ import annotations
 from datetime import date, timedelta, datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from pydantic import BaseModel
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..deps import get_current_user
-from ..db import get_session
+from .. import habit_bits, rollups, versions
+from ..config import get_settings
+from ..habit_calendar import MAX_RANGE_DAYS, completion_strings, run_lengths
+from ..deps import Principal, get_principal
+from ..db import get_async_session
 from ..models.habit import Habit, HabitLog, HabitSubscription, HabitToolLink
-from ..models.user import User
 from ..routers.toolbox import Tool
+from ..search import load_ranked, ranked_ids
+from ..streaks import apply_toggle, stored_streaks
 
 router = APIRouter(prefix="/habits", tags=["habits"]) 
 
+# Endpoints run on the event loop with an AsyncSession; the shared sync helpers
+# (streaks, calendar, search) go through ``session.run_sync`` on the same connection.
+
 
 class HabitCreate(BaseModel):
     title: str
@@ -51,12 +59,11 @@ class HabitDetail(BaseModel):
 
 
 @router.post("", response_model=HabitRead)
-def create_habit(
+async def create_habit(
     payload: HabitCreate,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_habit_columns(session)
     habit = Habit(
         user_id=user.id,
         title=payload.title,
@@ -68,24 +75,22 @@ def create_habit(
         is_public=(payload.is_public if payload.is_public is not None else True),
     )
     session.add(habit)
-    session.commit()
-    session.refresh(habit)
+    await session.run_sync(rollups.adjust_habit_count, user.id, habit.created_at, 1)
+    await session.run_sync(versions.bump, f"user:{user.id}", *(["habits:public"] if habit.is_public else []))
+    await session.commit()
+    await session.refresh(habit)
     return HabitRead(id=habit.id, title=habit.title, current_streak=0)
 
 
 @router.get("", response_model=List[HabitRead])
-def list_my_habits(
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+async def list_my_habits(
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_habit_columns(session)
-    habits = session.exec(select(Habit).where(Habit.user_id == user.id).order_by(Habit.created_at.desc())).all()
+    habits = (await session.exec(select(Habit).where(Habit.user_id == user.id).order_by(Habit.created_at.desc()))).all()
 
-    result: List[HabitRead] = []
-    for h in habits:
-        streak = _compute_current_streak(session, h.id)
-        result.append(HabitRead(id=h.id, title=h.title, current_streak=streak))
-    return result
+    streaks = await session.run_sync(stored_streaks, [h.id for h in habits])
+    return [HabitRead(id=h.id, title=h.title, current_streak=streaks[h.id].current) for h in habits]
 
 # Public habits discovery
 class HabitPublicBrief(BaseModel):
@@ -95,103 +100,159 @@ class HabitPublicBrief(BaseModel):
 
 @router.get("/discover", response_model=List[HabitPublicBrief])
 @router.get("/public/discover", response_model=List[HabitPublicBrief])
-def list_public_habits(
+async def list_public_habits(
+    response: Response,
     search: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_habit_columns(session)
-    q = select(Habit).where(Habit.is_public == True)  # noqa: E712
+    """Newest public habits, or with ``search`` the best full-text matches on title/why/identity goal."""
     if search:
-        try:
-            q = q.where(Habit.title.ilike(f"%{search}%"))
-        except Exception:
-            # Fallback for SQLite if ilike unavailable
-            q = q.where(Habit.title.contains(search))
-    q = q.order_by(Habit.created_at.desc()).limit(limit)
-    rows = session.exec(q).all()
+        ids = await session.run_sync(ranked_ids, "habit", search, where=[Habit.is_public == True], limit=limit, offset=offset)  # noqa: E712
+        rows = await session.run_sync(load_ranked, "habit", ids)
+    else:
+        q = select(Habit).where(Habit.is_public == True)  # noqa: E712
+        rows = (await session.exec(q.order_by(Habit.created_at.desc()).offset(offset).limit(limit))).all()
+    if len(rows) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
     return [HabitPublicBrief(id=h.id, title=h.title, user_id=h.user_id) for h in rows]
 
 
 @router.post("/{habit_id}/subscribe", response_model=SubscriptionRead)
-def subscribe_habit(
+async def subscribe_habit(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     if habit.user_id == user.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot subscribe to your own habit")
-    existing = session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id)).first()
+    existing = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id))).first()
     if not existing:
         session.add(HabitSubscription(user_id=user.id, habit_id=habit_id))
-        session.commit()
+        await session.commit()
     return SubscriptionRead(habit_id=habit_id)
 
 @router.delete("/{habit_id}/subscribe", response_model=SubscriptionRead)
-def unsubscribe_habit(
+async def unsubscribe_habit(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
     # Allow unsubscribing only from external habits; silently ignore if it's your own or not subscribed
-    sub = session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id)).first()
+    sub = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id))).first()
     if sub:
-        session.delete(sub)
-        session.commit()
+        await session.delete(sub)
+        await session.commit()
     return SubscriptionRead(habit_id=habit_id)
 
 # Some environments block DELETE or rewrite it. Provide POST alternative for unsubscribing.
 @router.post("/{habit_id}/unsubscribe", response_model=SubscriptionRead)
-def unsubscribe_habit_post(
+async def unsubscribe_habit_post(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    sub = session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id)).first()
+    sub = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id, HabitSubscription.habit_id==habit_id))).first()
     if sub:
-        session.delete(sub)
-        session.commit()
+        await session.delete(sub)
+        await session.commit()
     return SubscriptionRead(habit_id=habit_id)
 
 
 @router.get("/subscriptions", response_model=List[HabitRead])
-def list_subscribed(
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+async def list_subscribed(
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    subs = session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id)).all()
+    subs = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id==user.id))).all()
+    if not subs:
+        return []
+    by_id = {h.id: h for h in (await session.exec(select(Habit).where(Habit.id.in_([s.habit_id for s in subs])))).all()}
+    streaks = await session.run_sync(stored_streaks, list(by_id))
     result: List[HabitRead] = []
     for s in subs:
-        h = session.get(Habit, s.habit_id)
+        h = by_id.get(s.habit_id)
         if h:
-            streak = _compute_current_streak(session, h.id)
-            result.append(HabitRead(id=h.id, title=h.title, current_streak=streak))
+            result.append(HabitRead(id=h.id, title=h.title, current_streak=streaks[h.id].current))
     return result
 
 
+class CalendarHabit(BaseModel):
+    habit_id: int
+    completed: int
+    bits: Optional[str] = None
+    runs: Optional[List[List[int]]] = None
+
+
+class CalendarRange(BaseModel):
+    start: date
+    end: date
+    encoding: str
+    habits: List[CalendarHabit]
+
+
+@router.get("/calendar", response_model=CalendarRange)
+async def get_calendar(
+    habit_id: List[int] = Query(..., max_length=100),
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    encoding: str = Query("bits", pattern="^(bits|runs)$"),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """Completion history for up to a year of days across one or many of the user's habits.
+
+    ``bits`` has one character per day from ``start``; ``runs`` lists completed
+    stretches as ``[offset, length]``.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=MAX_RANGE_DAYS - 1)
+    if start > end or (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Range must be 1-{MAX_RANGE_DAYS} days")
+    ids = list(dict.fromkeys(habit_id))
+    owned = set((await session.exec(select(Habit.id).where(Habit.id.in_(ids), Habit.user_id == user.id))).all())
+    if len(owned) != len(ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    strings = await session.run_sync(completion_strings, ids, start, end)
+    habits = []
+    for hid in ids:
+        bits = strings[hid]
+        if encoding == "runs":
+            habits.append(CalendarHabit(habit_id=hid, completed=bits.count("1"), runs=run_lengths(bits)))
+        else:
+            habits.append(CalendarHabit(habit_id=hid, completed=bits.count("1"), bits=bits))
+    return CalendarRange(start=start, end=end, encoding=encoding, habits=habits)
+
+
+async def _linked_tools(session: AsyncSession, links: List[HabitToolLink]) -> List[dict]:
+    ids = [lk.tool_id for lk in links]
+    by_id = {t.id: t for t in (await session.exec(select(Tool).where(Tool.id.in_(ids)))).all()} if ids else {}
+    return [
+        {"id": t.id, "title": t.title, "keywords": t.keywords, "description": t.description}
+        for t in (by_id.get(i) for i in ids) if t
+    ]
+
+
 @router.get("/{habit_id}", response_model=HabitDetail)
-def get_habit(
+async def get_habit(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or habit.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    streak = _compute_current_streak(session, habit_id)
+    streak = (await session.run_sync(stored_streaks, [habit_id]))[habit_id].current
     # linked tools
-    links = session.exec(select(HabitToolLink).where(HabitToolLink.habit_id == habit_id)).all()
-    tools: List[dict] = []
-    for lk in links:
-        t = session.get(Tool, lk.tool_id)
-        if t:
-            tools.append({"id": t.id, "title": t.title, "keywords": t.keywords, "description": t.description})
+    links = (await session.exec(select(HabitToolLink).where(HabitToolLink.habit_id == habit_id))).all()
+    tools = await _linked_tools(session, links)
     # subscription state for current user
-    sub_exists = session.exec(select(HabitSubscription).where(HabitSubscription.user_id == user.id, HabitSubscription.habit_id == habit_id)).first() is not None
+    sub_exists = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id == user.id, HabitSubscription.habit_id == habit_id))).first() is not None
     return HabitDetail(
         id=habit.id,
         title=habit.title,
@@ -214,47 +275,52 @@ class WeekStatus(BaseModel):
 
 
 @router.get("/{habit_id}/week", response_model=WeekStatus)
-def get_week(
+async def get_week(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or habit.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
     today = date.today()
     monday = today - timedelta(days=(today.weekday()))
-    days = {}
-    for offset in range(7):
-        d = monday + timedelta(days=offset)
-        log = session.exec(
-            select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == d)
-        ).first()
-        days[d.isoformat()] = bool(log and log.completed)
+    bits = (await session.run_sync(completion_strings, [habit_id], monday, monday + timedelta(days=6)))[habit_id]
+    days = {(monday + timedelta(days=i)).isoformat(): flag == "1" for i, flag in enumerate(bits)}
     return WeekStatus(week_start=monday, days=days)
 
 
+def _toggle(session: Session, user_id: int, habit_id: int, day: date) -> bool:
+    """Flip one day's log and keep the derived streak/bitset/rollup rows in step (runs via ``run_sync``)."""
+    log = session.exec(select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == day)).first()
+    if not log:
+        log = HabitLog(habit_id=habit_id, day=day, completed=True)
+    else:
+        log.completed = not log.completed
+    session.add(log)
+    apply_toggle(session, habit_id, day, log.completed)
+    if get_settings().habit_bitmap_enabled:
+        habit_bits.set_day(session, habit_id, day, log.completed)
+    rollups.apply_toggle(session, user_id, habit_id, day, log.completed)
+    versions.bump(session, f"habit:{habit_id}")
+    return log.completed
+
+
 @router.post("/{habit_id}/toggle/{day}")
-def toggle_day(
+async def toggle_day(
     habit_id: int,
     day: date,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or habit.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    log = session.exec(select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == day)).first()
-    if not log:
-        log = HabitLog(habit_id=habit_id, day=day, completed=True)
-        session.add(log)
-    else:
-        log.completed = not log.completed
-    session.add(log)
-    session.commit()
-    return {"habit_id": habit_id, "day": day.isoformat(), "completed": log.completed}
+    completed = await session.run_sync(_toggle, user.id, habit_id, day)
+    await session.commit()
+    return {"habit_id": habit_id, "day": day.isoformat(), "completed": completed}
 
 
 class LinkRequest(BaseModel):
@@ -262,63 +328,59 @@ class LinkRequest(BaseModel):
 
 
 @router.post("/{habit_id}/tools")
-def link_tool(
+async def link_tool(
     habit_id: int,
     payload: LinkRequest,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or habit.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    tool = session.get(Tool, payload.tool_id)
+    tool = await session.get(Tool, payload.tool_id)
     if not tool:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tool not found")
-    exists = session.exec(
+    exists = (await session.exec(
         select(HabitToolLink).where(HabitToolLink.habit_id == habit_id, HabitToolLink.tool_id == payload.tool_id)
-    ).first()
+    )).first()
     if not exists:
         session.add(HabitToolLink(habit_id=habit_id, tool_id=payload.tool_id))
-        session.commit()
+        await session.commit()
     return {"linked": True}
 
 
 @router.delete("/{habit_id}/tools/{tool_id}")
-def unlink_tool(
+async def unlink_tool(
     habit_id: int,
     tool_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or habit.user_id != user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    lk = session.exec(
+    lk = (await session.exec(
         select(HabitToolLink).where(HabitToolLink.habit_id == habit_id, HabitToolLink.tool_id == tool_id)
-    ).first()
+    )).first()
     if not lk:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    session.delete(lk)
-    session.commit()
+    await session.delete(lk)
+    await session.commit()
     return {"unlinked": True}
 
 @router.get("/public/{habit_id}", response_model=HabitDetail)
-def get_public_habit(
+async def get_public_habit(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    habit = session.get(Habit, habit_id)
+    habit = await session.get(Habit, habit_id)
     if not habit or not habit.is_public:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    streak = _compute_current_streak(session, habit_id)
-    links = session.exec(select(HabitToolLink).where(HabitToolLink.habit_id == habit_id)).all()
-    tools: List[dict] = []
-    for lk in links:
-        t = session.get(Tool, lk.tool_id)
-        if t:
-            tools.append({"id": t.id, "title": t.title, "keywords": t.keywords, "description": t.description})
-    sub_exists = session.exec(select(HabitSubscription).where(HabitSubscription.user_id == user.id, HabitSubscription.habit_id == habit_id)).first() is not None
+    streak = (await session.run_sync(stored_streaks, [habit_id]))[habit_id].current
+    links = (await session.exec(select(HabitToolLink).where(HabitToolLink.habit_id == habit_id))).all()
+    tools = await _linked_tools(session, links)
+    sub_exists = (await session.exec(select(HabitSubscription).where(HabitSubscription.user_id == user.id, HabitSubscription.habit_id == habit_id))).first() is not None
     return HabitDetail(
         id=habit.id,
         title=habit.title,
@@ -335,12 +397,12 @@ def get_public_habit(
     )
 
 @router.post("/public/{habit_id}/clone", response_model=HabitRead)
-def clone_public_habit(
+async def clone_public_habit(
     habit_id: int,
-    session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
 ):
-    src = session.get(Habit, habit_id)
+    src = await session.get(Habit, habit_id)
     if not src:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     new_habit = Habit(
@@ -354,58 +416,21 @@ def clone_public_habit(
         is_public=True,
     )
     session.add(new_habit)
-    session.commit(); session.refresh(new_habit)
-    streak = _compute_current_streak(session, new_habit.id)
-    return HabitRead(id=new_habit.id, title=new_habit.title, current_streak=streak)
+    await session.run_sync(rollups.adjust_habit_count, user.id, new_habit.created_at, 1)
+    await session.run_sync(versions.bump, "habits:public", f"user:{user.id}")
+    await session.commit(); await session.refresh(new_habit)
+    # clones start without history
+    return HabitRead(id=new_habit.id, title=new_habit.title, current_streak=0)
 
 
-# Dev helper for SQLite to add new columns
-
-def _ensure_habit_columns(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection()
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(habit)")
-        cols = [r[1] for r in cur.fetchall()]
-        if "is_public" not in cols:
-            cur.execute("ALTER TABLE habit ADD COLUMN is_public BOOLEAN DEFAULT 1")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
-
 @router.post("/dev_seed_public")
-def dev_seed_public(session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+async def dev_seed_public(session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
     """Create a few demo public habits for the current user to test discovery."""
-    _ensure_habit_columns(session)
     titles = ["Read 10 minutes", "Walk 5k steps", "Stretch 5 minutes"]
-    created = []
-    for t in titles:
-        h = Habit(user_id=user.id, title=t, is_public=True)
-        session.add(h); session.commit(); session.refresh(h)
-        created.append({"id": h.id, "title": h.title})
-    return {"ok": True, "created": created}
-
-def _compute_current_streak(session: Session, habit_id: int) -> int:
-    """Return consecutive days streak ending at the most recent completed day (today or earlier)."""
-    today = date.today()
-    # Find the most recent completed day (up to 200 days back)
-    last_completed = None
-    for offset in range(0, 200):
-        d = today - timedelta(days=offset)
-        log = session.exec(select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == d)).first()
-        if log and log.completed:
-            last_completed = d
-            break
-    if last_completed is None:
-        return 0
-    # Count consecutive days backwards from last_completed
-    count = 0
-    d = last_completed
-    for _ in range(0, 200):
-        log = session.exec(select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == d)).first()
-        if log and log.completed:
-            count += 1
-            d = d - timedelta(days=1)
-        else:
-            break
-    return count
+    habits = [Habit(user_id=user.id, title=t, is_public=True) for t in titles]
+    session.add_all(habits)
+    await session.run_sync(rollups.adjust_habit_count, user.id, habits[0].created_at, len(habits))
+    # same transaction as the rows, so no revalidation sees the bump without them
+    await session.run_sync(versions.bump, "habits:public", f"user:{user.id}")
+    await session.commit()
+    return {"ok": True, "created": [{"id": h.id, "title": h.title} for h in habits]}
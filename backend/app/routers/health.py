@@ -1,8 +1,17 @@
 from fastapi import APIRouter
 
+from ..db import get_engine, pool_status
+from ..migrate import current_revision
+
 router = APIRouter(prefix="/health", tags=["health"]) 
 
 
 @router.get("")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/db")
+def db_pool_health():
+    """Connection pool sizing, checkout/wait metrics and the applied schema version."""
+    return {"status": "ok", "pool": pool_status(), "schema_version": current_revision(get_engine())}
@@ -1,14 +1,22 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel
+from sqlalchemy import literal, tuple_
 from sqlmodel import Session, select
 
+from .. import versions
+from ..cache import TTLCache
+from ..config import get_settings
 from ..db import get_session
 from ..models.group import Message
 
-router = APIRouter(prefix="/learnings", tags=["learnings"]) 
+router = APIRouter(prefix="/learnings", tags=["learnings"])
+
+# a literal, not a bound parameter, so SQLite can prove the partial index applies
+IS_LEARNING = Message.type == sa.literal_column("'learning'")
 
 
 class LearningRead(BaseModel):
@@ -19,7 +27,47 @@ class LearningRead(BaseModel):
     likes_count: int
 
 
+class _Page:
+    __slots__ = ("items", "next_before_id")
+
+    def __init__(self, items: List[LearningRead], next_before_id: Optional[int]) -> None:
+        self.items = items
+        self.next_before_id = next_before_id
+
+
+# newest page per (limit, "learnings" stamp); the feed is the same for everyone. Writes
+# bump the stamp (app.versions), so a new learning or like is a miss in every worker.
+_first_pages: TTLCache[_Page] = TTLCache(maxsize=16, ttl=get_settings().learnings_cache_ttl_seconds)
+
+
+def _load_page(session: Session, limit: int, before_id: Optional[int]) -> _Page:
+    q = select(Message).where(IS_LEARNING)
+    if before_id is not None:
+        anchor = session.get(Message, before_id)
+        if not anchor or anchor.type != "learning":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown cursor")
+        q = q.where(tuple_(Message.created_at, Message.id) < tuple_(literal(anchor.created_at), literal(anchor.id)))
+    msgs = session.exec(q.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)).all()
+    items = [LearningRead(id=m.id, group_id=m.group_id, user_id=m.user_id, content=m.content, likes_count=m.likes_count) for m in msgs]
+    return _Page(items, msgs[-1].id if len(msgs) == limit else None)
+
+
 @router.get("", response_model=List[LearningRead])
-def list_learnings(session: Session = Depends(get_session)):
-    msgs = session.exec(select(Message).where(Message.type == "learning").order_by(Message.created_at.desc())).all()
-    return [LearningRead(id=m.id, group_id=m.group_id, user_id=m.user_id, content=m.content, likes_count=m.likes_count) for m in msgs]
+def list_learnings(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before_id: Optional[int] = Query(None, description="Keyset cursor: learnings older than this one (X-Next-Before-Id)"),
+    session: Session = Depends(get_session),
+):
+    """Newest learnings across all groups, one page at a time (ETag/304 via app.http_cache)."""
+    key = (limit, versions.current(request, session, "learnings"))
+    page = _first_pages.get(key) if before_id is None else None
+    if page is None:
+        page = _load_page(session, limit, before_id)
+        # a write landing meanwhile moved the stamp on, so this key is never asked for again
+        if before_id is None:
+            _first_pages.put(key, page)
+    if page.next_before_id is not None:
+        response.headers["X-Next-Before-Id"] = str(page.next_before_id)
+    return page.items
@@ -0,0 +1,88 @@
+from __future__ import annotations
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..config import get_settings
+from ..db import get_async_engine
+from ..deps import decode_token_subject, get_stream_user_id, require_user
+from ..models.group import GroupMember
+from ..pubsub import get_broker, group_channel
+
+router = APIRouter(prefix="/groups", tags=["live"]) 
+
+
+async def _is_member(group_id: int, user_id: int) -> bool:
+    # short-lived session: a stream can stay open for hours and must not hold a pooled connection
+    async with AsyncSession(get_async_engine()) as session:
+        membership = (await session.exec(
+            select(GroupMember.id).where(GroupMember.group_id == group_id, GroupMember.user_id == user_id)
+        )).first()
+    return membership is not None
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    while True:
+        msg = await websocket.receive()
+        if msg["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/{group_id}/ws")
+async def group_socket(websocket: WebSocket, group_id: int, token: str = Query("")):
+    """Members only: push new messages and proofs of a group as JSON frames (``{"event": ..., "data": ...}``)."""
+    try:
+        user_id = await run_in_threadpool(require_user, decode_token_subject(token))
+    except HTTPException:
+        await websocket.close(code=4401)
+        return
+    if not await _is_member(group_id, user_id):
+        await websocket.close(code=4403)
+        return
+    settings = get_settings()
+    async with get_broker().subscribe(group_channel(group_id)) as sub:
+        await websocket.accept()
+        closed = asyncio.create_task(_until_disconnect(websocket))
+        try:
+            while True:
+                getter = asyncio.create_task(sub.get(timeout=settings.live_heartbeat_seconds))
+                done, _ = await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if closed in done:
+                    getter.cancel()
+                    return
+                event = getter.result() or {"event": "ping"}
+                # a client that stops reading is dropped instead of stalling the loop
+                await asyncio.wait_for(websocket.send_json(event), settings.live_send_timeout_seconds)
+        except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+            pass
+        finally:
+            closed.cancel()
+
+
+@router.get("/{group_id}/events")
+async def group_events(group_id: int, request: Request, user_id: int = Depends(get_stream_user_id)):
+    """Server-Sent Events variant of the group socket, for clients that only need to listen."""
+    if not await _is_member(group_id, user_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    settings = get_settings()
+
+    async def stream():
+        async with get_broker().subscribe(group_channel(group_id)) as sub:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                event = await sub.get(timeout=settings.live_heartbeat_seconds)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
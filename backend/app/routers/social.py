@@ -5,15 +5,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from ..db import get_session
-from ..deps import get_current_user
+from ..deps import Principal, get_principal
 from ..models.social import Trust
-from ..models.user import User
 
 router = APIRouter(prefix="/social", tags=["social"]) 
 
 
 @router.post("/trust/{user_id}")
-def trust_user(user_id: int, session: Session = Depends(get_session), me: User = Depends(get_current_user)):
+def trust_user(user_id: int, session: Session = Depends(get_session), me: Principal = Depends(get_principal)):
     if me.id == user_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot trust yourself")
     exists = session.exec(select(Trust).where(Trust.truster_id == me.id, Trust.trustee_id == user_id)).first()
@@ -26,7 +25,7 @@ def trust_user(user_id: int, session: Session = Depends(get_session), me: User =
 
 
 @router.delete("/trust/{user_id}")
-def untrust_user(user_id: int, session: Session = Depends(get_session), me: User = Depends(get_current_user)):
+def untrust_user(user_id: int, session: Session = Depends(get_session), me: Principal = Depends(get_principal)):
     t = session.exec(select(Trust).where(Trust.truster_id == me.id, Trust.trustee_id == user_id)).first()
     if t:
         session.delete(t)
@@ -35,6 +34,6 @@ def untrust_user(user_id: int, session: Session = Depends(get_session), me: User
 
 
 @router.get("/trusted", response_model=List[int])
-def list_trusted(session: Session = Depends(get_session), me: User = Depends(get_current_user)):
+def list_trusted(session: Session = Depends(get_session), me: Principal = Depends(get_principal)):
     rows = session.exec(select(Trust).where(Trust.truster_id == me.id)).all()
     return [r.trustee_id for r in rows]
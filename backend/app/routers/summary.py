@@ -1,45 +1,113 @@
 from __future__ import annotations
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import literal, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..db import get_session
-from ..deps import get_current_user
-from ..models.habit import Habit, HabitLog
+from ..config import get_settings
+from ..db import get_async_session
+from ..deps import Principal, get_principal
+from ..models.habit import Habit, UserWeekRollup
 from ..models.group import Message
 from ..models.social import Trust
-from ..models.user import User
+from ..rollups import WeekStats, trend, week_start
 
 router = APIRouter(prefix="/summary", tags=["summary"]) 
 
 
+def _week_dict(stats: WeekStats) -> dict:
+    return {
+        "week_start": stats.week_start.isoformat(),
+        "completions": stats.completions,
+        "completion_rate": stats.completion_rate,
+        "best_habit_id": stats.best_habit_id,
+    }
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    if cursor is None:
+        return None
+    try:
+        likes, msg_id = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Bad cursor")
+    return likes, msg_id
+
+
+async def _trusted_insights(
+    session: AsyncSession, user_id: int, limit: int, after: Optional[Tuple[int, int]] = None
+) -> Tuple[List[Message], Optional[str]]:
+    """Most-liked learnings from trusted users within the window, as (page, next cursor).
+
+    Ordered by ``(likes_count, id)`` descending and seeked past ``after`` on the
+    ``(type, user_id, likes_count, id)`` index, so a page never sorts more than
+    the trusted users' recent learnings.
+    """
+    since = datetime.utcnow() - timedelta(days=get_settings().trusted_insights_window_days)
+    trusted = select(Trust.trustee_id).where(Trust.truster_id == user_id)
+    q = select(Message).where(Message.type == "learning", Message.user_id.in_(trusted), Message.created_at >= since)
+    if after is not None:
+        q = q.where(tuple_(Message.likes_count, Message.id) < tuple_(literal(after[0]), literal(after[1])))
+    rows = (await session.exec(q.order_by(Message.likes_count.desc(), Message.id.desc()).limit(limit + 1))).all()
+    page = rows[:limit]
+    return page, (f"{page[-1].likes_count}:{page[-1].id}" if len(rows) > limit else None)
+
+
+def _insight_dict(m: Message) -> dict:
+    return {"id": m.id, "user_id": m.user_id, "content": m.content, "likes_count": m.likes_count}
+
+
 @router.get("")
-def weekly_summary(session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    # Stats
-    since = date.today() - timedelta(days=7)
-    logs = session.exec(select(HabitLog).join(Habit, Habit.id == HabitLog.habit_id).where(Habit.user_id == user.id, HabitLog.day >= since, HabitLog.completed == True)).all()  # noqa: E712
-    total_completions = len(logs)
-
-    # Best habit by completions
-    counts: dict[int, int] = {}
-    for l in logs:
-        counts[l.habit_id] = counts.get(l.habit_id, 0) + 1
-    best = None
-    if counts:
-        best_id = max(counts, key=counts.get)
-        best = session.get(Habit, best_id)
-
-    # Trusted insights
-    trusted_ids = [t.trustee_id for t in session.exec(select(Trust).where(Trust.truster_id == user.id)).all()]
-    insights = []
-    if trusted_ids:
-        insights = session.exec(
-            select(Message).where(Message.type == "learning", Message.user_id.in_(trusted_ids)).order_by(Message.likes_count.desc())
-        ).all()
+async def weekly_summary(session: AsyncSession = Depends(get_async_session), user: Principal = Depends(get_principal)):
+    """This ISO week so far, from the precomputed rollup (see app.rollups)."""
+    week = week_start(date.today())
+    found = (await session.exec(
+        select(UserWeekRollup, Habit.title)
+        .outerjoin(Habit, Habit.id == UserWeekRollup.best_habit_id)
+        .where(UserWeekRollup.user_id == user.id, UserWeekRollup.week_start == week)
+    )).first()
+    row, best_title = found if found else (None, None)
+    stats = WeekStats(week, row.completions, row.habit_count, row.best_habit_id, row.best_completions) if row else WeekStats(week)
+
+    insights, next_cursor = await _trusted_insights(session, user.id, get_settings().trusted_insights_k)
 
     return {
-        "total_completions": total_completions,
-        "best_habit": {"id": best.id, "title": best.title} if best else None,
-        "trusted_insights": [{"id": m.id, "user_id": m.user_id, "content": m.content, "likes_count": m.likes_count} for m in insights],
+        "week_start": week.isoformat(),
+        "total_completions": stats.completions,
+        "completion_rate": stats.completion_rate,
+        "best_habit": {"id": stats.best_habit_id, "title": best_title, "completions": stats.best_completions} if best_title else None,
+        "trusted_insights": [_insight_dict(m) for m in insights],
+        "trusted_insights_cursor": next_cursor,
     }
+
+
+@router.get("/insights")
+async def trusted_insights(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Resume after this item; sent as X-Next-Cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """Page through trusted insights; the first page is what ``/summary`` embeds."""
+    page, next_cursor = await _trusted_insights(
+        session, user.id, limit or get_settings().trusted_insights_k, _parse_cursor(cursor)
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_insight_dict(m) for m in page]
+
+
+@router.get("/trend")
+async def weekly_trend(
+    weeks: int = Query(12, ge=1, le=104),
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(get_principal),
+):
+    """The last ``weeks`` ISO weeks including this one, oldest first, from one range read."""
+    last = week_start(date.today())
+    stats = await session.run_sync(trend, user.id, last - timedelta(weeks=weeks - 1), last)
+    return [_week_dict(s) for s in stats]
@@ -5,9 +5,9 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlmodel import SQLModel, Field, Session, Column, JSON
 
+from .. import versions
 from ..db import get_session
-from ..deps import get_current_user
-from ..models.user import User
+from ..deps import Principal, get_principal
 
 router = APIRouter(prefix="/tools", tags=["toolbox"]) 
 
@@ -28,25 +28,8 @@ class ToolCreate(BaseModel):
     description: str
 
 
-def _ensure_created_by_column(session: Session) -> None:
-    """For SQLite dev: add created_by_user_id if missing (no full migrations)."""
-    try:
-        conn = session.get_bind().raw_connection()
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(tool)")
-        cols = [r[1] for r in cur.fetchall()]
-        if "created_by_user_id" not in cols:
-            cur.execute("ALTER TABLE tool ADD COLUMN created_by_user_id INTEGER")
-            conn.commit()
-        cur.close()
-    except Exception:
-        # Best-effort only
-        pass
-
-
 @router.get("", response_model=List[Tool])
 def list_tools(session: Session = Depends(get_session)):
-    _ensure_created_by_column(session)
     return session.query(Tool).all()
 
 
@@ -54,21 +37,27 @@ def list_tools(session: Session = Depends(get_session)):
 def create_tool(
     payload: ToolCreate,
     session: Session = Depends(get_session),
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_principal),
 ):
-    _ensure_created_by_column(session)
     tool = Tool(**payload.model_dump(), created_by_user_id=user.id)
     session.add(tool)
+    versions.bump(session, "tools")
     session.commit()
     session.refresh(tool)
+    _index_tools([tool])
     return tool
 
 
+def _index_tools(tools: List[Tool]) -> None:
+    # imported here: app.tool_index imports Tool from this module
+    from ..tool_index import get_index
+
+    get_index().add_many(tools)
+
+
 @router.post("/dev_seed")
 def dev_seed_tools(session: Session = Depends(get_session)):
     """Dev-only helper: seed research-backed habit tools if they don't exist."""
-    _ensure_created_by_column(session)
-
     curated = [
         {
             "title": "Pomodoro Technique",
@@ -176,7 +165,7 @@ def dev_seed_tools(session: Session = Depends(get_session)):
 
     # Insert missing by title
     existing_titles = {t.title for t in session.query(Tool).all()}
-    created = 0
+    created = []
     for t in curated:
         if t["title"] in existing_titles:
             continue
@@ -188,6 +177,10 @@ def dev_seed_tools(session: Session = Depends(get_session)):
             created_by_user_id=None,
         )
         session.add(tool)
-        created += 1
+        created.append(tool)
+    versions.bump(session, "tools")
     session.commit()
-    return {"ok": True, "created": created, "total": session.query(Tool).count()}
\ No newline at end of file
+    for tool in created:
+        session.refresh(tool)
+    _index_tools(created)
+    return {"ok": True, "created": len(created), "total": session.query(Tool).count()}
\ No newline at end of file
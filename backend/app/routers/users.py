@@ -1,56 +1,23 @@
 from __future__ import annotations
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import func
 from sqlmodel import Session, select
 
-from ..deps import get_current_user
+from .. import rollups, versions
+from ..deps import Principal, get_current_user, get_principal, invalidate_user
 from ..db import get_session
 from ..models.user import User
 from ..models.habit import Habit, HabitSubscription
 from ..models.group import Group, GroupMember
+from ..search import load_ranked, ranked_ids
 from ..core import hash_password
 
 router = APIRouter(prefix="/users", tags=["users"]) 
 
 
-def _ensure_user_profile_columns(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection(); cur = conn.cursor()
-        cur.execute("PRAGMA table_info(user)"); cols = [r[1] for r in cur.fetchall()]
-        if "description" not in cols:
-            cur.execute("ALTER TABLE user ADD COLUMN description TEXT")
-        if "big_why" not in cols:
-            cur.execute("ALTER TABLE user ADD COLUMN big_why TEXT")
-        if "lifebook" not in cols:
-            cur.execute("ALTER TABLE user ADD COLUMN lifebook JSON")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
-
-
-def _ensure_group_description_column(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection(); cur = conn.cursor()
-        cur.execute("PRAGMA table_info(\"group\")"); cols = [r[1] for r in cur.fetchall()]
-        if "description" not in cols:
-            cur.execute("ALTER TABLE \"group\" ADD COLUMN description TEXT")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
-
-def _ensure_habit_is_public_column(session: Session) -> None:
-    try:
-        conn = session.get_bind().raw_connection(); cur = conn.cursor()
-        cur.execute("PRAGMA table_info(habit)"); cols = [r[1] for r in cur.fetchall()]
-        if "is_public" not in cols:
-            cur.execute("ALTER TABLE habit ADD COLUMN is_public BOOLEAN DEFAULT 1")
-        conn.commit(); cur.close()
-    except Exception:
-        pass
-
-
 class UserRead(BaseModel):
     id: int
     email: EmailStr
@@ -101,6 +68,19 @@ class UserGroup(BaseModel):
     members: int
 
 
+def _profile_counts(session: Session, user_ids: List[int]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """Habit and group-membership counts for a page of users: two GROUP BY queries, whatever the page size."""
+    if not user_ids:
+        return {}, {}
+    habits = session.exec(
+        select(Habit.user_id, func.count()).where(Habit.user_id.in_(user_ids)).group_by(Habit.user_id)
+    ).all()
+    groups = session.exec(
+        select(GroupMember.user_id, func.count()).where(GroupMember.user_id.in_(user_ids)).group_by(GroupMember.user_id)
+    ).all()
+    return dict(habits), dict(groups)
+
+
 @router.get("/me", response_model=UserRead)
 def me(user: User = Depends(get_current_user)):
     return UserRead(
@@ -131,7 +111,9 @@ def update_me(
     if payload.lifebook is not None:
         user.lifebook = payload.lifebook
     session.add(user)
+    versions.bump(session, f"user:{user.id}")
     session.commit()
+    invalidate_user(user.id)
     session.refresh(user)
     return UserRead(
         id=user.id,
@@ -145,40 +127,48 @@ def update_me(
 
 
 @router.get("", response_model=List[PublicUser])
-def list_users(search: Optional[str] = None, limit: Optional[int] = 50, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
-    _ensure_user_profile_columns(session)
-    q = select(User)
-    if search:
-        like = f"%{search}%"
-        from sqlalchemy import or_  # type: ignore
-        q = q.where(or_(User.display_name.ilike(like), User.email.ilike(like)))  # type: ignore[attr-defined]
-    users = session.exec(q.order_by(User.created_at.desc()).limit(max(1, min(limit or 50, 100)))).all()
-    result: List[PublicUser] = []
-    for u in users:
-        habits_count = len(session.exec(select(Habit.id).where(Habit.user_id == u.id)).all())
-        groups_count = len(session.exec(select(GroupMember.id).where(GroupMember.user_id == u.id)).all())
-        result.append(PublicUser(
+def list_users(
+    response: Response,
+    search: Optional[str] = None,
+    limit: Optional[int] = 50,
+    offset: int = Query(0, ge=0),
+    session: Session = Depends(get_session),
+    user: Principal = Depends(get_principal),
+):
+    """Newest users, or with ``search`` full-text matches on name/description (an exact email also matches)."""
+    limit = max(1, min(limit or 50, 100))
+    if search and "@" in search:
+        # email lookups go through the unique index instead of the text index
+        users = session.exec(select(User).where(User.email == search.strip())).all() if offset == 0 else []
+    elif search:
+        users = load_ranked(session, "user", ranked_ids(session, "user", search, limit=limit, offset=offset))
+    else:
+        users = session.exec(select(User).order_by(User.created_at.desc()).offset(offset).limit(limit)).all()
+    if len(users) == limit:
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    habits_counts, groups_counts = _profile_counts(session, [u.id for u in users])
+    return [
+        PublicUser(
             id=u.id, display_name=u.display_name, email=u.email, photo_url=u.photo_url, description=u.description,
-            habits_count=habits_count, groups_count=groups_count,
-        ))
-    return result
+            habits_count=habits_counts.get(u.id, 0), groups_count=groups_counts.get(u.id, 0),
+        )
+        for u in users
+    ]
 
 
 @router.get("/{user_id}", response_model=PublicUser)
-def get_user_public(user_id: int, session: Session = Depends(get_session), _: User = Depends(get_current_user)):
-    _ensure_user_profile_columns(session)
+def get_user_public(user_id: int, session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
     u = session.get(User, user_id)
     if not u:
         from fastapi import HTTPException
         raise HTTPException(status_code=404)
-    habits_count = len(session.exec(select(Habit.id).where(Habit.user_id == user_id)).all())
-    groups_count = len(session.exec(select(GroupMember.id).where(GroupMember.user_id == user_id)).all())
+    habits_counts, groups_counts = _profile_counts(session, [user_id])
     return PublicUser(id=u.id, display_name=u.display_name, email=u.email, photo_url=u.photo_url, description=u.description,
-                      habits_count=habits_count, groups_count=groups_count)
+                      habits_count=habits_counts.get(user_id, 0), groups_count=groups_counts.get(user_id, 0))
 
 
 @router.get("/{user_id}/habits", response_model=List[HabitRead])
-def list_user_habits(user_id: int, public_only: Optional[bool] = None, session: Session = Depends(get_session), _: User = Depends(get_current_user)):
+def list_user_habits(user_id: int, public_only: Optional[bool] = None, session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
     q = select(Habit).where(Habit.user_id == user_id)
     if public_only:
         q = q.where(Habit.is_public == True)  # noqa: E712
@@ -186,7 +176,7 @@ def list_user_habits(user_id: int, public_only: Optional[bool] = None, session:
     return [HabitRead(id=h.id, title=h.title, is_public=getattr(h, 'is_public', True)) for h in rows]
 
 @router.get("/{user_id}/habits/{habit_id}", response_model=HabitDetailPublic)
-def get_user_habit_detail(user_id: int, habit_id: int, session: Session = Depends(get_session), _: User = Depends(get_current_user)):
+def get_user_habit_detail(user_id: int, habit_id: int, session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
     h = session.get(Habit, habit_id)
     if not h or h.user_id != user_id:
         from fastapi import HTTPException
@@ -202,7 +192,7 @@ def get_user_habit_detail(user_id: int, habit_id: int, session: Session = Depend
     )
 
 @router.post("/{user_id}/habits/{habit_id}/clone", response_model=HabitRead)
-def clone_user_habit(user_id: int, habit_id: int, session: Session = Depends(get_session), me: User = Depends(get_current_user)):
+def clone_user_habit(user_id: int, habit_id: int, session: Session = Depends(get_session), me: Principal = Depends(get_principal)):
     src = session.get(Habit, habit_id)
     if not src or src.user_id != user_id:
         from fastapi import HTTPException
@@ -217,28 +207,22 @@ def clone_user_habit(user_id: int, habit_id: int, session: Session = Depends(get
         implementation_intentions=src.implementation_intentions,
     )
     session.add(new_habit)
+    rollups.adjust_habit_count(session, me.id, new_habit.created_at, 1)
+    versions.bump(session, "habits:public", f"user:{me.id}")
     session.commit(); session.refresh(new_habit)
     return HabitRead(id=new_habit.id, title=new_habit.title)
 
 
 @router.get("/{user_id}/groups", response_model=List[UserGroup])
-def list_user_groups(user_id: int, session: Session = Depends(get_session), _: User = Depends(get_current_user)):
-    _ensure_group_description_column(session)
-    memberships = session.exec(select(GroupMember).where(GroupMember.user_id == user_id)).all()
-    group_ids = [m.group_id for m in memberships]
-    if not group_ids:
-        return []
-    groups = session.exec(select(Group).where(Group.id.in_(group_ids))).all()  # type: ignore[arg-type]
-    result: List[UserGroup] = []
-    for g in groups:
-        member_count = len(session.exec(select(GroupMember.id).where(GroupMember.group_id == g.id)).all())
-        result.append(UserGroup(id=g.id, name=g.name, description=getattr(g, 'description', None), members=member_count))
-    return result
+def list_user_groups(user_id: int, session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
+    groups = session.exec(
+        select(Group).join(GroupMember, GroupMember.group_id == Group.id).where(GroupMember.user_id == user_id)
+    ).all()
+    return [UserGroup(id=g.id, name=g.name, description=g.description, members=g.member_count) for g in groups]
 
 
 @router.post("/dev_seed")
 def dev_seed(session: Session = Depends(get_session)):
-    _ensure_user_profile_columns(session)
     email = "demo_inspo@example.com"
     u = session.exec(select(User).where(User.email == email)).first()
     if not u:
@@ -248,16 +232,15 @@ def dev_seed(session: Session = Depends(get_session)):
         h1 = Habit(user_id=u.id, title="Read 15 minutes")
         h2 = Habit(user_id=u.id, title="Walk 5k steps")
         session.add(h1); session.add(h2)
+        versions.bump(session, "habits:public")
         session.commit()
     return {"ok": True, "user_id": u.id}
 
 @router.post("/dev_seed_minimal")
-def dev_seed_minimal(session: Session = Depends(get_session), _: User = Depends(get_current_user)):
+def dev_seed_minimal(session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
     """Ensure each user has at least one public habit and one owned public group with membership.
     Also set simple profile defaults when missing.
     """
-    _ensure_habit_is_public_column(session)
-    _ensure_group_description_column(session)
     users = session.exec(select(User)).all()
     for u in users:
         # minimal profile
@@ -273,12 +256,14 @@ def dev_seed_minimal(session: Session = Depends(get_session), _: User = Depends(
         if not has_habit:
             h = Habit(user_id=u.id, title="Read 10 minutes", is_public=True)
             session.add(h)
+            rollups.adjust_habit_count(session, u.id, h.created_at, 1)
         # ensure at least one owned group and membership
         owned_group = session.exec(select(Group).where(Group.owner_id == u.id)).first()
         if not owned_group:
-            g = Group(name=f"{u.display_name or 'Demo'} group", is_public=True, owner_id=u.id, description="Demo community group")
-            session.add(g); session.commit(); session.refresh(g)
+            g = Group(name=f"{u.display_name or 'Demo'} group", is_public=True, owner_id=u.id, description="Demo community group", member_count=1)
+            session.add(g); session.flush()
             session.add(GroupMember(group_id=g.id, user_id=u.id, role="owner"))
+    versions.bump(session, "habits:public", "groups", *(f"user:{u.id}" for u in users))
     session.commit()
     # return counts for quick feedback
     total_users = len(users)
@@ -291,19 +276,19 @@ class AddHabitsReq(BaseModel):
     titles: Optional[List[str]] = None
 
 @router.post("/dev_add_habits_for_user")
-def dev_add_habits_for_user(payload: AddHabitsReq, session: Session = Depends(get_session), _: User = Depends(get_current_user)):
+def dev_add_habits_for_user(payload: AddHabitsReq, session: Session = Depends(get_session), _: Principal = Depends(get_principal)):
     """Add a few simple public habits for the given user (by email). Keep it basic for testing."""
-    _ensure_habit_is_public_column(session)
     u = session.exec(select(User).where(User.email == payload.email)).first()
     if not u:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="User not found")
     titles = payload.titles or ["Drink water", "Walk 10 minutes", "Read 5 minutes"]
-    created: List[Dict[str, int]] = []
-    for t in titles:
-        h = Habit(user_id=u.id, title=t, is_public=True)
-        session.add(h); session.commit(); session.refresh(h)
-        created.append({"id": h.id})
+    habits = [Habit(user_id=u.id, title=t, is_public=True) for t in titles]
+    session.add_all(habits)
+    rollups.adjust_habit_count(session, u.id, habits[0].created_at, len(habits))
+    versions.bump(session, "habits:public", f"user:{u.id}")
+    session.commit()
+    created: List[Dict[str, int]] = [{"id": h.id} for h in habits]
     return {"ok": True, "user_id": u.id, "created": created}
 
 @router.post("/dev_seed_community")
@@ -311,7 +296,6 @@ def dev_seed_community(session: Session = Depends(get_session)):
     """Reset demo community: keep exactly 10 demo users named community_demo_01..10.
     Only affects demo community accounts; does not touch real/dev login users.
     """
-    _ensure_user_profile_columns(session)
     base = "community_demo_"
     desired = [f"{base}{i:02d}@example.com" for i in range(1,11)]
     # create missing
@@ -321,10 +305,9 @@ def dev_seed_community(session: Session = Depends(get_session)):
             display = f"Demo {idx}"
             desc = "Shares routines and learnings." if idx % 2 else "Focuses on mindful productivity."
             u = User(email=email, password_hash=hash_password("x"), display_name=display, description=desc)
-            session.add(u); session.commit(); session.refresh(u)
+            session.add(u); session.flush()
             session.add(Habit(user_id=u.id, title="Read 10 minutes"))
             session.add(Habit(user_id=u.id, title="Stretch 5 minutes"))
-            session.commit()
     # delete any extra community_demo_* not in desired
     extras = session.exec(select(User).where(User.email.like(f"{base}%"))).all()
     for u in extras:
@@ -332,7 +315,13 @@ def dev_seed_community(session: Session = Depends(get_session)):
             # cascade-like manual delete of their habits
             hs = session.exec(select(Habit).where(Habit.user_id == u.id)).all()
             for h in hs: session.delete(h)
+            rollups.forget_user(session, u.id)
             session.delete(u)
+    removed = [u.id for u in extras if u.email not in desired]
+    versions.bump(session, "habits:public", *(f"user:{u.id}" for u in extras))
     session.commit()
+    for user_id in removed:
+        # their tokens stop working now, not when they expire
+        invalidate_user(user_id)
     kept = session.exec(select(User).where(User.email.in_(desired))).all()  # type: ignore[arg-type]
     return {"ok": True, "count": len(kept)}
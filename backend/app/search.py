@@ -0,0 +1,100 @@
+"""Ranked full-text search over habits, users, groups and messages.
+
+SQLite keeps an external-content FTS5 table per entity (``habit_fts`` ...),
+maintained by insert/update/delete triggers on the base table; Postgres gets a
+generated, GIN-indexed ``search_tsv`` column on the base table instead. Both
+are created by migration 0010, so writes need no application code.
+
+``ranked_ids`` turns free text into a safe match expression (terms ANDed, the
+last one as a prefix so results follow as-you-type input), applies extra
+filters on the base model and returns one page of ids, best match first.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Type
+
+import sqlalchemy as sa
+from sqlmodel import Session, SQLModel, select
+
+from .models.group import Group, Message
+from .models.habit import Habit
+from .models.user import User
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    model: Type[SQLModel]
+    table: str
+    columns: Sequence[str]
+    # per-column weights: bm25() multipliers on SQLite, setweight() classes on Postgres
+    weights: Sequence[float]
+    pg_classes: Sequence[str]
+
+
+SPECS = {
+    "habit": SearchSpec(Habit, "habit", ("title", "why", "identity_goal"), (10.0, 2.0, 4.0), ("A", "C", "B")),
+    "user": SearchSpec(User, "user", ("display_name", "description"), (10.0, 2.0), ("A", "C")),
+    "group": SearchSpec(Group, "group", ("name", "description"), (10.0, 2.0), ("A", "C")),
+    "message": SearchSpec(Message, "message", ("content",), (1.0,), ("A",)),
+}
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+
+def query_terms(text: Optional[str]) -> List[str]:
+    return _TERM.findall((text or "").lower())[:MAX_TERMS]
+
+
+def fts5_query(terms: Sequence[str]) -> str:
+    # every term quoted, so user input can never reach FTS5 operators or column filters
+    parts = [f'"{t}"' for t in terms]
+    parts[-1] += "*"
+    return " ".join(parts)
+
+
+def tsquery(terms: Sequence[str]) -> str:
+    return " & ".join(terms[:-1] + [terms[-1] + ":*"])
+
+
+def ranked_ids(
+    session: Session,
+    kind: str,
+    text: Optional[str],
+    *,
+    where: Sequence = (),
+    limit: int = 20,
+    offset: int = 0,
+) -> List[int]:
+    """Ids of ``kind`` rows matching ``text`` and ``where``, best first; empty for blank input."""
+    spec = SPECS[kind]
+    terms = query_terms(text)
+    if not terms:
+        return []
+    model = spec.model
+    q = select(model.id).where(*where)
+    if session.get_bind().dialect.name == "postgresql":
+        tsv = sa.literal_column(f'"{spec.table}".search_tsv')
+        tsq = sa.func.to_tsquery("english", tsquery(terms))
+        q = q.where(tsv.op("@@")(tsq)).order_by(sa.func.ts_rank_cd(tsv, tsq).desc(), model.id.desc())
+    else:
+        fts = sa.table(f"{spec.table}_fts", sa.column("rowid"))
+        weights = ", ".join(str(w) for w in spec.weights)
+        q = (
+            q.join(fts, fts.c.rowid == model.id)
+            .where(sa.text(f"{spec.table}_fts MATCH :fts_query").bindparams(fts_query=fts5_query(terms)))
+            # bm25() is lower-is-better
+            .order_by(sa.text(f"bm25({spec.table}_fts, {weights})"), model.id.desc())
+        )
+    return list(session.exec(q.limit(limit).offset(offset)).all())
+
+
+def load_ranked(session: Session, kind: str, ids: Sequence[int]) -> list:
+    """Fetch rows for ``ids`` and keep the ranking order."""
+    if not ids:
+        return []
+    model = SPECS[kind].model
+    rows = {r.id: r for r in session.exec(select(model).where(model.id.in_(ids))).all()}
+    return [rows[i] for i in ids if i in rows]
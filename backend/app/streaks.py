@@ -0,0 +1,166 @@
+"""Streak computation over completed habit days.
+
+Completed days are fetched with one range query per batch of habits and the
+runs are counted in memory, instead of probing ``HabitLog`` one day at a time.
+
+Reads normally don't touch history at all: ``HabitStreak`` holds the current
+and longest streak per habit and ``apply_toggle`` keeps it in step with
+``toggle_day``. ``rebuild_streak_state`` repairs it in bulk:
+
+    python -m app.streaks repair
+"""
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlmodel import Session, select
+
+from .models.habit import HabitLog, HabitStreak
+
+
+@dataclass(frozen=True)
+class StreakStats:
+    current: int = 0
+    longest: int = 0
+    last_completed: Optional[date] = None
+
+
+def compute_streaks(days: Iterable[date], today: Optional[date] = None) -> StreakStats:
+    """Current and longest streak for a set of completed days.
+
+    The current streak is the run of consecutive days ending at the most recent
+    completed day on or before ``today``. Days after ``today`` are ignored.
+    """
+    today = today or date.today()
+    ordered = sorted({d for d in days if d <= today})
+    if not ordered:
+        return StreakStats()
+    longest = run = 1
+    for prev, cur in zip(ordered, ordered[1:]):
+        run = run + 1 if cur - prev == timedelta(days=1) else 1
+        if run > longest:
+            longest = run
+    # after the loop ``run`` is the length of the run ending at ordered[-1]
+    return StreakStats(current=run, longest=longest, last_completed=ordered[-1])
+
+
+def completed_days(session: Session, habit_ids: List[int], until: Optional[date] = None) -> Dict[int, List[date]]:
+    """Completed days per habit, fetched with a single query."""
+    result: Dict[int, List[date]] = {hid: [] for hid in habit_ids}
+    if not habit_ids:
+        return result
+    q = select(HabitLog.habit_id, HabitLog.day).where(
+        HabitLog.habit_id.in_(habit_ids), HabitLog.completed == True  # noqa: E712
+    )
+    if until is not None:
+        q = q.where(HabitLog.day <= until)
+    for habit_id, day in session.exec(q):
+        result[habit_id].append(day)
+    return result
+
+
+def streaks_for_habits(session: Session, habit_ids: List[int], today: Optional[date] = None) -> Dict[int, StreakStats]:
+    """Streak stats for many habits from one range query."""
+    today = today or date.today()
+    days = completed_days(session, habit_ids, until=today)
+    return {hid: compute_streaks(ds, today) for hid, ds in days.items()}
+
+
+def streak_for_habit(session: Session, habit_id: int, today: Optional[date] = None) -> StreakStats:
+    return streaks_for_habits(session, [habit_id], today)[habit_id]
+
+
+def _as_stats(row: Optional[HabitStreak]) -> StreakStats:
+    if row is None:
+        return StreakStats()
+    return StreakStats(current=row.current, longest=row.longest, last_completed=row.last_completed)
+
+
+def _store(session: Session, habit_id: int, stats: StreakStats, row: Optional[HabitStreak] = None) -> HabitStreak:
+    row = row or session.get(HabitStreak, habit_id) or HabitStreak(habit_id=habit_id)
+    row.current = stats.current
+    row.longest = stats.longest
+    row.last_completed = stats.last_completed
+    row.updated_at = datetime.utcnow()
+    session.add(row)
+    return row
+
+
+def _recompute(session: Session, habit_id: int) -> StreakStats:
+    # stored state covers every completed day, including ones logged ahead of today
+    return compute_streaks(completed_days(session, [habit_id])[habit_id], today=date.max)
+
+
+def apply_toggle(session: Session, habit_id: int, day: date, completed: bool) -> StreakStats:
+    """Update the stored streak after ``day`` flipped to ``completed`` (caller commits).
+
+    Extending or trimming the newest run is O(1). Backdated toggles that can
+    split or join runs, or that may shrink the longest run, fall back to a
+    single-query recompute for this habit.
+    """
+    row = session.get(HabitStreak, habit_id)
+    old = _as_stats(row)
+    last = old.last_completed
+    stats: Optional[StreakStats] = None
+    if completed:
+        if last is None:
+            stats = StreakStats(current=1, longest=max(old.longest, 1), last_completed=day)
+        elif day == last + timedelta(days=1):
+            current = old.current + 1
+            stats = StreakStats(current=current, longest=max(old.longest, current), last_completed=day)
+        elif day > last + timedelta(days=1):
+            stats = StreakStats(current=1, longest=max(old.longest, 1), last_completed=day)
+    elif day == last and old.current > 1 and old.current < old.longest:
+        stats = StreakStats(current=old.current - 1, longest=old.longest, last_completed=day - timedelta(days=1))
+    if stats is None:
+        stats = _recompute(session, habit_id)
+    _store(session, habit_id, stats, row)
+    return stats
+
+
+def stored_streaks(session: Session, habit_ids: List[int], today: Optional[date] = None) -> Dict[int, StreakStats]:
+    """Streak stats for many habits read from ``HabitStreak`` (one point query).
+
+    Habits without a row have no completions. A row whose newest completion
+    lies after ``today`` was logged ahead of time, so that habit is computed
+    from history instead.
+    """
+    today = today or date.today()
+    if not habit_ids:
+        return {}
+    rows = {r.habit_id: r for r in session.exec(select(HabitStreak).where(HabitStreak.habit_id.in_(habit_ids))).all()}
+    result = {hid: _as_stats(rows.get(hid)) for hid in habit_ids}
+    ahead = [hid for hid, st in result.items() if st.last_completed is not None and st.last_completed > today]
+    if ahead:
+        result.update(streaks_for_habits(session, ahead, today))
+    return result
+
+
+def rebuild_streak_state(session: Session, habit_ids: Optional[List[int]] = None, batch_size: int = 500) -> int:
+    """Recompute ``HabitStreak`` from ``HabitLog`` in bulk; returns the number of habits written."""
+    if habit_ids is None:
+        known = set(session.exec(select(HabitLog.habit_id).distinct()).all())
+        known.update(session.exec(select(HabitStreak.habit_id)).all())
+        habit_ids = sorted(known)
+    written = 0
+    for i in range(0, len(habit_ids), batch_size):
+        batch = habit_ids[i:i + batch_size]
+        days = completed_days(session, batch)
+        rows = {r.habit_id: r for r in session.exec(select(HabitStreak).where(HabitStreak.habit_id.in_(batch))).all()}
+        for hid in batch:
+            _store(session, hid, compute_streaks(days[hid], today=date.max), rows.get(hid))
+            written += 1
+        session.commit()
+    return written
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["repair"]:
+        sys.exit("usage: python -m app.streaks repair")
+    from .db import get_engine
+
+    with Session(get_engine()) as session:
+        print(f"rebuilt streak state for {rebuild_streak_state(session)} habits")
@@ -0,0 +1,221 @@
+"""In-memory BM25 index over toolbox entries, behind ``POST /ai/suggest``.
+
+Title, keywords, steps and description are tokenized, stemmed and folded into
+one weighted term-frequency vector per tool (title and keywords count more).
+Queries look up only the postings of their own terms and stop early once the
+top k can no longer change: each term keeps its postings sorted by score
+contribution (computed lazily and cached until the next write), and the scan
+ends when the k-th best score beats the best any unseen tool could still get;
+lists of common, low-idf terms drop out of the scan even earlier.
+
+The index is built at startup and extended when tools are created. Tools are
+append-only, so before each search ``sync`` also picks up rows with a higher
+id than any indexed one, which covers writes made by other workers.
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import itertools
+import math
+import re
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .routers.toolbox import Tool
+
+FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "steps": 1.0, "description": 1.0}
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how i if in into is it its me my of on or so that the then this to "
+    "was what when where which while who why will with you your".split()
+)
+_SUFFIXES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("ousness", "ous"), ("iveness", "ive"),
+    ("ations", "ate"), ("ation", "ate"), ("ingly", ""), ("ities", "ity"), ("ments", "ment"), ("ness", ""),
+    ("edly", ""), ("ing", ""), ("ies", "i"), ("ied", "i"), ("sses", "ss"), ("ed", ""), ("ly", ""),
+)
+_UNDOUBLE = re.compile(r"([bdfgmnprt])\1$")
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Light suffix stripping so 'planning'/'plans'/'planned' and 'cue'/'cues' meet."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, repl in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[: -len(suffix)] + repl
+            if suffix in ("ing", "ed", "edly", "ingly"):
+                word = _UNDOUBLE.sub(r"\1", word)
+            break
+    else:
+        if word.endswith(("ches", "shes", "xes", "zes")) and len(word) > 5:
+            word = word[:-2]
+        elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+    if len(word) > 3 and word.endswith("y") and word[-2] not in "aeiou":
+        word = word[:-1] + "i"
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [stem(t) for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def tool_terms(tool: Tool) -> Dict[str, float]:
+    """Weighted term frequencies for one tool across its fields."""
+    tf: Dict[str, float] = defaultdict(float)
+    fields = {
+        "title": [tool.title],
+        "keywords": tool.keywords or [],
+        "steps": tool.steps or [],
+        "description": [tool.description],
+    }
+    for name, texts in fields.items():
+        weight = FIELD_WEIGHTS[name]
+        for text in texts:
+            for term in tokenize(text):
+                tf[term] += weight
+    return tf
+
+
+class ToolIndex:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_len: Dict[int, float] = {}
+        self._total_len = 0.0
+        self._impacts: Dict[str, Tuple[List[Tuple[float, int]], Dict[int, float]]] = {}
+        self.max_id = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def add(self, tool: Tool) -> None:
+        """Index (or re-index) one tool."""
+        with self._lock:
+            if tool.id in self._doc_len:
+                self._remove(tool.id)
+            tf = tool_terms(tool)
+            for term, freq in tf.items():
+                self._postings.setdefault(term, {})[tool.id] = freq
+            length = sum(tf.values())
+            self._doc_len[tool.id] = length
+            self._total_len += length
+            self.max_id = max(self.max_id, tool.id)
+            # N and avgdl moved, so every cached impact list is stale
+            self._impacts.clear()
+
+    def add_many(self, tools: Iterable[Tool]) -> None:
+        with self._lock:
+            for tool in tools:
+                self.add(tool)
+
+    def _remove(self, tool_id: int) -> None:
+        for term in [t for t, docs in self._postings.items() if tool_id in docs]:
+            del self._postings[term][tool_id]
+            if not self._postings[term]:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(tool_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_len.clear()
+            self._impacts.clear()
+            self._total_len = 0.0
+            self.max_id = 0
+
+    def _term_impacts(self, term: str):
+        cached = self._impacts.get(term)
+        if cached is not None:
+            return cached
+        docs = self._postings.get(term)
+        if not docs:
+            return None
+        n = len(self._doc_len)
+        avgdl = self._total_len / n if n else 1.0
+        idf = math.log(1.0 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+        scores = {}
+        for doc_id, tf in docs.items():
+            norm = K1 * (1.0 - B + B * self._doc_len[doc_id] / avgdl)
+            scores[doc_id] = idf * tf * (K1 + 1.0) / (tf + norm)
+        ranked = sorted(((s, d) for d, s in scores.items()), key=lambda x: (-x[0], x[1]))
+        self._impacts[term] = (ranked, scores)
+        return self._impacts[term]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[int, float]]:
+        """Top ``k`` ``(tool_id, score)`` pairs, best first."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            lists = [entry for entry in (self._term_impacts(t) for t in terms) if entry is not None]
+        if not lists or k <= 0:
+            return []
+        if len(lists) == 1:
+            return [(d, s) for s, d in lists[0][0][:k]]
+
+        # Threshold algorithm with a MaxScore twist: walk the impact-sorted lists in
+        # lockstep, fully scoring each new tool. Once the k-th best score beats the
+        # combined maximum of the weakest lists (common terms), a tool found only
+        # in those cannot make the cut, so they stop being walked.
+        lists.sort(key=lambda entry: entry[0][0][0])
+        ceilings = list(itertools.accumulate(entry[0][0][0] for entry in lists))
+        heap: List[Tuple[float, int]] = []  # k best as (score, -id): lowest score, then highest id, on top
+        seen = set()
+        depth = 0
+        while True:
+            threshold = heap[0][0] if len(heap) == k else 0.0
+            skipped = bisect.bisect_left(ceilings, threshold)
+            bound = ceilings[skipped - 1] if skipped else 0.0
+            walked = False
+            for ranked, _ in lists[skipped:]:
+                if depth >= len(ranked):
+                    continue
+                walked = True
+                impact, doc_id = ranked[depth]
+                bound += impact
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                entry = (sum(scores.get(doc_id, 0.0) for _, scores in lists), -doc_id)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            if not walked or (len(heap) == k and heap[0][0] >= bound):
+                break
+            depth += 1
+        return [(-neg_id, score) for score, neg_id in sorted(heap, reverse=True)]
+
+    def sync(self, session: Session) -> int:
+        """Index tools written since the last call (by any worker); returns how many."""
+        latest = session.exec(select(func.max(Tool.id))).one() or 0
+        if latest <= self.max_id:
+            return 0
+        with self._lock:
+            fresh = session.exec(select(Tool).where(Tool.id > self.max_id).order_by(Tool.id)).all()
+            self.add_many(fresh)
+        return len(fresh)
+
+    def rebuild(self, session: Session) -> int:
+        with self._lock:
+            self.clear()
+            return self.sync(session)
+
+
+_index = ToolIndex()
+
+
+def get_index() -> ToolIndex:
+    return _index
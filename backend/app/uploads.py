@@ -0,0 +1,96 @@
+"""Streaming, bounded writes for uploaded proof images.
+
+Uploads are copied in fixed-size chunks into a temp file inside the upload
+dir (hashed with SHA-256 on the way) and renamed into place only once
+complete, so readers never see partial files and rejected uploads leave
+nothing behind. Peak memory is one chunk.
+
+    with staged_upload(file.file, upload_dir, max_bytes) as staged:
+        staged.commit(os.path.join(upload_dir, f"name{extension_for(staged.content_type)}"))
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi import HTTPException, status
+
+CHUNK_SIZE = 64 * 1024
+
+_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/heic": ".heic",
+}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type from the file's magic bytes; the client-supplied type is not trusted."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    return None
+
+
+def extension_for(content_type: str) -> str:
+    return _EXTENSIONS[content_type]
+
+
+class StagedUpload:
+    """A fully written temp file waiting to be renamed into place."""
+
+    def __init__(self, tmp_path: str, size: int, content_type: str, sha256: str) -> None:
+        self.tmp_path = tmp_path
+        self.size = size
+        self.content_type = content_type
+        self.sha256 = sha256
+        self.committed_path: Optional[str] = None
+
+    def commit(self, dest_path: str) -> str:
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        os.replace(self.tmp_path, dest_path)
+        self.committed_path = dest_path
+        return dest_path
+
+
+@contextmanager
+def staged_upload(src: BinaryIO, dest_dir: str, max_bytes: int) -> Iterator[StagedUpload]:
+    """Stream ``src`` into a temp file in ``dest_dir``; it is removed unless committed.
+
+    Raises 415 if the data is not a supported image and 413 past ``max_bytes``.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=dest_dir)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            chunk = src.read(CHUNK_SIZE)
+            content_type = sniff_image_type(chunk)
+            if content_type is None:
+                raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Unsupported image type")
+            size = 0
+            digest = hashlib.sha256()
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="File too large")
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = src.read(CHUNK_SIZE)
+            out.flush()
+            os.fsync(out.fileno())
+        yield StagedUpload(tmp_path, size, content_type, digest.hexdigest())
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
@@ -0,0 +1,49 @@
+"""Version stamps for cacheable read endpoints.
+
+Each ``ResourceVersion`` row counts the changes to one resource key:
+
+    tools             the toolbox catalogue (``/tools``)
+    habits:public     public habit discovery (``/habits/discover``)
+    groups            the group directory (``/groups``)
+    user:<id>         a public profile (``/users/<id>``)
+    habit:<id>        a habit's logs (``/habits/<id>/week``)
+    learnings         the learnings feed (``/learnings``)
+
+Write handlers call ``bump`` inside their own transaction, so the stamp moves
+exactly when the change commits and every worker sees it. ``app.http_cache``
+reads the stamps to build ETags without running the handler. A key that was
+never bumped reads as 0.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from .models.version import ResourceVersion
+
+
+def bump(session: Session, *keys: str) -> None:
+    """Advance every key by one (caller commits)."""
+    if not keys:
+        return
+    insert = pg_insert if session.get_bind().dialect.name == "postgresql" else sqlite_insert
+    # sorted, so concurrent writers lock the rows in the same order
+    stmt = insert(ResourceVersion).values([{"key": k, "version": 1} for k in sorted(set(keys))])
+    session.exec(stmt.on_conflict_do_update(index_elements=["key"], set_={"version": ResourceVersion.version + 1}))
+
+
+def read(session: Session, keys: Iterable[str]) -> Dict[str, int]:
+    keys = list(keys)
+    found = dict(session.exec(select(ResourceVersion.key, ResourceVersion.version).where(ResourceVersion.key.in_(keys))).all())
+    return {k: found.get(k, 0) for k in keys}
+
+
+def current(request, session: Session, key: str) -> int:
+    """``key``'s stamp as read by the caching middleware for this request, else from ``session``."""
+    stamps = getattr(request.state, "versions", None) or {}
+    if key in stamps:
+        return stamps[key]
+    return read(session, [key])[key]
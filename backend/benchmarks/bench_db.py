@@ -0,0 +1,153 @@
+"""Throughput and tail latency of the async data layer against the sync (threadpool) path.
+
+Starts the app under uvicorn (temporary SQLite DB) with a ``/sync`` twin of the
+hot read endpoints — the same queries and helpers on a sync ``Session`` in the
+threadpool, i.e. how every router ran before — and drives both at high
+concurrency:
+
+    cd backend && python -m benchmarks.bench_db [--seconds 10] [--concurrency 256]
+
+Point ``DATABASE_URL`` at Postgres to measure psycopg instead of aiosqlite.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlmodel import Session, select
+
+from .bench_login import _free_port
+
+
+def create_app() -> FastAPI:
+    """The real app plus sync copies of ``GET /habits`` and ``GET /habits/{id}/week`` under ``/sync``."""
+    from app.db import get_session
+    from app.deps import Principal, get_principal
+    from app.habit_calendar import completion_strings
+    from app.main import app
+    from app.models.habit import Habit
+    from app.streaks import stored_streaks
+
+    router = APIRouter(prefix="/sync")
+
+    @router.get("/habits")
+    def list_my_habits(session: Session = Depends(get_session), user: Principal = Depends(get_principal)):
+        habits = session.exec(select(Habit).where(Habit.user_id == user.id).order_by(Habit.created_at.desc())).all()
+        streaks = stored_streaks(session, [h.id for h in habits])
+        return [{"id": h.id, "title": h.title, "current_streak": streaks[h.id].current} for h in habits]
+
+    @router.get("/habits/{habit_id}/week")
+    def get_week(habit_id: int, session: Session = Depends(get_session), user: Principal = Depends(get_principal)):
+        habit = session.get(Habit, habit_id)
+        if not habit or habit.user_id != user.id:
+            raise HTTPException(status_code=404)
+        monday = date.today() - timedelta(days=date.today().weekday())
+        bits = completion_strings(session, [habit_id], monday, monday + timedelta(days=6))[habit_id]
+        return {"week_start": monday, "days": {(monday + timedelta(days=i)).isoformat(): f == "1" for i, f in enumerate(bits)}}
+
+    app.include_router(router)
+    return app
+
+
+def _start(tmp: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = dict(os.environ, UPLOAD_DIR=os.path.join(tmp, "uploads"), BCRYPT_ROUNDS="4")
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/bench.db")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.bench_db:create_app", "--factory",
+         "--port", str(port), "--log-level", "warning", "--backlog", "4096"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(500):
+        try:
+            httpx.get(base + "/health").raise_for_status()
+            break
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    return proc, base
+
+
+async def _seed(client: httpx.AsyncClient, users: int, habits: int) -> list[tuple[dict, int]]:
+    """One (headers, habit id) per user, each user with ``habits`` habits and some history."""
+    seeded = []
+    for i in range(users):
+        r = await client.post("/auth/register", json={"email": f"bench{i}@example.com", "password": "benchpass"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        ids = [(await client.post("/habits", json={"title": f"Habit {j}"}, headers=headers)).json()["id"] for j in range(habits)]
+        for d in range(0, 14, 2):
+            day = (date.today() - timedelta(days=d)).isoformat()
+            await client.post(f"/habits/{ids[0]}/toggle/{day}", headers=headers)
+        seeded.append((headers, ids[0]))
+    return seeded
+
+
+async def _load(client: httpx.AsyncClient, prefix: str, seeded: list, seconds: float, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i: int) -> None:
+        nonlocal errors
+        headers, habit_id = seeded[i % len(seeded)]
+        paths = (f"{prefix}/habits", f"{prefix}/habits/{habit_id}/week")
+        n = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            r = await client.get(paths[n % 2], headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += r.status_code != 200
+            n += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "errors": errors,
+    }
+
+
+async def _run(base: str, args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=120.0, limits=limits) as client:
+        seeded = await _seed(client, args.users, args.habits)
+        print(f"{'path':<18}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for label, prefix in (("sync (threadpool)", "/sync"), ("async", "")):
+            await _load(client, prefix, seeded, min(2.0, args.seconds), args.concurrency)  # warm-up
+            r = await _load(client, prefix, seeded, args.seconds, args.concurrency)
+            print(f"{label:<18}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--habits", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proc, base = _start(tmp)
+        try:
+            asyncio.run(_run(base, args))
+        finally:
+            proc.send_signal(signal.SIGINT)
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Login throughput under concurrency, and what a login burst does to other requests.
+
+Starts the app under uvicorn (temporary SQLite DB) once with bcrypt inline in
+the threadpool (``PASSWORD_WORKERS=0``, the old behaviour) and once with the
+process pool, then runs concurrent ``/auth/login`` calls while probing a cheap
+authenticated endpoint:
+
+    cd backend && python -m benchmarks.bench_login [--seconds 10] [--concurrency 32] [--rounds 12]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(workers: int, rounds: int, tmp: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp}/bench-{workers}.db",
+        UPLOAD_DIR=os.path.join(tmp, "uploads"),
+        BCRYPT_ROUNDS=str(rounds),
+        PASSWORD_WORKERS=str(workers),
+        PASSWORD_MAX_PENDING="1000",
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(500):
+        try:
+            httpx.get(base + "/health").raise_for_status()
+            break
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    return proc, base
+
+
+async def _measure(base: str, users: int, seconds: float, concurrency: int) -> dict:
+    async with httpx.AsyncClient(base_url=base, timeout=120.0, limits=httpx.Limits(max_connections=concurrency + 4)) as client:
+        creds = [{"email": f"bench{i}@example.com", "password": "benchpass"} for i in range(users)]
+        token = None
+        for c in creds:
+            r = await client.post("/auth/register", json=c)
+            token = token or r.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        deadline = time.perf_counter() + seconds
+        logins = 0
+        probe_ms: list[float] = []
+
+        async def login_worker(i: int) -> None:
+            nonlocal logins
+            while time.perf_counter() < deadline:
+                r = await client.post("/auth/login", json=creds[i % users])
+                r.raise_for_status()
+                logins += 1
+
+        async def probe() -> None:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                (await client.get("/habits", headers=headers)).raise_for_status()
+                probe_ms.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        await asyncio.gather(probe(), *(login_worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    probe_ms.sort()
+    return {
+        "logins_per_s": logins / elapsed,
+        "probe_p50_ms": statistics.median(probe_ms),
+        "probe_p99_ms": probe_ms[min(len(probe_ms) - 1, int(len(probe_ms) * 0.99))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    print(f"{'mode':<22}{'logins/s':>10}{'probe p50 ms':>15}{'probe p99 ms':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, workers in (("inline (threadpool)", 0), (f"pool ({args.workers} procs)", args.workers)):
+            proc, base = _start(workers, args.rounds, tmp)
+            try:
+                r = asyncio.run(_measure(base, args.users, args.seconds, args.concurrency))
+            finally:
+                proc.send_signal(signal.SIGINT)  # graceful, so the app shuts its pools down
+                proc.wait()
+            print(f"{label:<22}{r['logins_per_s']:>10.1f}{r['probe_p50_ms']:>15.1f}{r['probe_p99_ms']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Throughput of ``/uploads`` serving: plain ``StaticFiles`` vs ``app.media.MediaFiles``.
+
+Serves the same files from both apps on local uvicorn servers and hits them
+with concurrent httpx clients:
+
+    cd backend && python -m benchmarks.bench_media [--seconds 5] [--concurrency 16]
+
+Scenarios: full GETs of a feed-sized (64 KiB) and a large (8 MiB) file, a
+1 MiB range of the large file, and revalidation with ``If-None-Match``. The
+numbers show server-side cost only: with ``Cache-Control: immutable`` a browser
+does not revalidate blob URLs at all, while the plain mount sends no
+Cache-Control, so browsers fall back to heuristic revalidation.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app.media import MediaFiles
+
+SMALL = "blobs/aa/bb/" + "aa" * 32 + ".webp"
+LARGE = "blobs/cc/dd/" + "cc" * 32 + ".png"
+
+
+def _populate(root: str) -> None:
+    for rel, size in ((SMALL, 64 * 1024), (LARGE, 8 * 1024 * 1024)):
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _app(kind: str, root: str) -> Starlette:
+    files = MediaFiles(directory=root) if kind == "MediaFiles" else StaticFiles(directory=root)
+    return Starlette(routes=[Mount("/uploads", files)])
+
+
+def _serve_forever(kind: str, root: str, port: int) -> None:
+    uvicorn.run(_app(kind, root), host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _serve(kind: str, root: str) -> tuple[multiprocessing.Process, str]:
+    """Run the server in its own process so it does not share a GIL with the client."""
+    port = _free_port()
+    proc = multiprocessing.get_context("spawn").Process(target=_serve_forever, args=(kind, root, port), daemon=True)
+    proc.start()
+    base = f"http://127.0.0.1:{port}/uploads/"
+    for _ in range(500):
+        try:
+            httpx.get(base + SMALL).raise_for_status()
+            break
+        except httpx.HTTPError:
+            time.sleep(0.02)
+    return proc, base
+
+
+async def _run(base: str, path: str, headers: dict, seconds: float, concurrency: int) -> tuple[float, float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60.0) as client:
+        if headers.get("If-None-Match") == "?":
+            headers = {"If-None-Match": (await client.get(path)).headers["etag"]}
+        count = 0
+        nbytes = 0
+        deadline = time.perf_counter() + seconds
+
+        async def worker() -> None:
+            nonlocal count, nbytes
+            while time.perf_counter() < deadline:
+                r = await client.get(path, headers=headers)
+                assert r.status_code in (200, 206, 304), r.status_code
+                count += 1
+                nbytes += len(r.content)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return count / elapsed, nbytes / elapsed / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        _populate(root)
+        scenarios = [
+            ("GET 64 KiB", SMALL, {}),
+            ("GET 8 MiB", LARGE, {}),
+            ("Range 1 MiB", LARGE, {"Range": "bytes=1048576-2097151"}),
+            ("If-None-Match", SMALL, {"If-None-Match": "?"}),
+        ]
+        servers = {kind: _serve(kind, root) for kind in ("StaticFiles", "MediaFiles")}
+        print(f"{'scenario':<16}{'server':<14}{'req/s':>10}{'MiB/s':>10}")
+        try:
+            for label, path, headers in scenarios:
+                for kind, (_, base) in servers.items():
+                    rps, mibps = asyncio.run(_run(base, path, dict(headers), args.seconds, args.concurrency))
+                    print(f"{label:<16}{kind:<14}{rps:>10.0f}{mibps:>10.1f}")
+        finally:
+            for proc, _ in servers.values():
+                proc.terminate()
+                proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Latency of ``ToolIndex.search`` against the old per-request scan of every tool.
+
+    cd backend && python -m benchmarks.bench_suggest [--tools 30000] [--queries 2000]
+
+Builds a synthetic corpus of tools in memory and times both code paths on
+the same queries (no database involved).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.routers.toolbox import Tool
+from app.tool_index import ToolIndex
+
+BASE_WORDS = (
+    "focus sleep water run read write plan morning evening habit cue reward friction stack identity journal "
+    "meditate stretch walk phone screen budget save cook clean study practice music language gym posture "
+    "breathe gratitude declutter inbox calendar routine streak energy mood caffeine sugar snack bedtime"
+).split()
+# a few thousand distinct terms with Zipf-like frequencies, like real prose
+VOCAB = BASE_WORDS + [f"{a}{b}" for a in BASE_WORDS for b in ("ly", "er", "ful", "less", "wise", "ward", "ish", "ness")] + [
+    f"t{i}x" for i in range(3000)
+]
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCAB))]
+
+
+def _words(rng: random.Random, k: int) -> str:
+    return " ".join(rng.choices(VOCAB, weights=WEIGHTS, k=k))
+
+
+def _corpus(n: int, rng: random.Random) -> list[Tool]:
+    return [
+        Tool(
+            id=i,
+            title=_words(rng, 3).title(),
+            keywords=[_words(rng, 1) for _ in range(3)],
+            steps=[_words(rng, 8) for _ in range(3)],
+            description=_words(rng, 20),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _scan(tools: list[Tool], query: str) -> list[Tool]:
+    # the previous /ai/suggest body, minus the SELECT
+    q = query.lower()
+    scored = []
+    for t in tools:
+        score = 0
+        if q in (t.title or "").lower():
+            score += 2
+        if t.keywords:
+            score += sum(1 for kw in t.keywords if kw.lower() in q)
+        if q in (t.description or "").lower():
+            score += 1
+        if score:
+            scored.append((score, t))
+    return [t for _, t in sorted(scored, key=lambda x: -x[0])][:3]
+
+
+def _timed(fn, queries) -> list[float]:
+    out = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        out.append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--tools", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    tools = _corpus(args.tools, rng)
+    start = time.perf_counter()
+    index = ToolIndex()
+    index.add_many(tools)
+    print(f"indexed {len(index)} tools in {time.perf_counter() - start:.2f}s")
+    queries = [_words(rng, rng.randint(1, 5)) for _ in range(args.queries)]
+    for q in set(queries):
+        index.search(q, k=args.k)  # warm the per-term impact lists, as steady-state traffic would
+
+    for name, fn, n in (
+        ("index", lambda q: index.search(q, k=args.k), len(queries)),
+        ("scan", lambda q: _scan(tools, q), min(len(queries), 50)),
+    ):
+        ms = sorted(_timed(fn, queries[:n]))
+        p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+        print(f"{name:<6} p50 {statistics.median(ms):8.3f} ms   p99 {p99:8.3f} ms   ({n} queries)")
+
+
+if __name__ == "__main__":
+    main()
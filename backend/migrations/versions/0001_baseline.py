@@ -0,0 +1,166 @@
+"""baseline schema
+
+Creates the tables that SQLModel.metadata.create_all() used to build at startup.
+Databases created before migrations existed already have them, so each table is
+only created when missing and the revision simply gets stamped.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-08-20 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create(name: str, *columns: sa.Column, indexes: Sequence[tuple] = ()) -> None:
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for col, unique in indexes:
+        op.create_index(f"ix_{name}_{col}", name, [col], unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _create(
+        "user",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("display_name", sa.String()),
+        sa.Column("photo_url", sa.String()),
+        sa.Column("description", sa.String()),
+        sa.Column("big_why", sa.String()),
+        sa.Column("lifebook", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("email", True)],
+    )
+    _create(
+        "habit",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("why", sa.String()),
+        sa.Column("identity_goal", sa.String()),
+        sa.Column("loop", sa.JSON()),
+        sa.Column("minimal_dose", sa.String()),
+        sa.Column("implementation_intentions", sa.String()),
+        sa.Column("reminders", sa.JSON()),
+        sa.Column("is_public", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("user_id", False)],
+    )
+    _create(
+        "habitlog",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("habit_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("completed", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("habit_id", False), ("day", False)],
+    )
+    _create(
+        "habitsubscription",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("habit_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("user_id", False), ("habit_id", False)],
+    )
+    _create(
+        "habittoollink",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("habit_id", sa.Integer(), nullable=False),
+        sa.Column("tool_id", sa.Integer(), nullable=False),
+        sa.Column("added_at", sa.DateTime(), nullable=False),
+        indexes=[("habit_id", False), ("tool_id", False)],
+    )
+    _create(
+        "group",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("is_public", sa.Boolean(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("owner_id", False)],
+    )
+    _create(
+        "groupmember",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("habit_title", sa.String()),
+        sa.Column("frequency_per_week", sa.Integer(), nullable=False, server_default="7"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("group_id", False), ("user_id", False)],
+    )
+    _create(
+        "proof",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("image_url", sa.String(), nullable=False),
+        sa.Column("caption", sa.String()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("group_id", False), ("user_id", False), ("day", False)],
+    )
+    _create(
+        "message",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("image_url", sa.String()),
+        sa.Column("likes_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("group_id", False), ("user_id", False)],
+    )
+    _create(
+        "messagereaction",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("message_id", False), ("user_id", False)],
+    )
+    _create(
+        "trust",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("truster_id", sa.Integer(), nullable=False),
+        sa.Column("trustee_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        indexes=[("truster_id", False), ("trustee_id", False)],
+    )
+    _create(
+        "tool",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("keywords", sa.JSON()),
+        sa.Column("steps", sa.JSON()),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("created_by_user_id", sa.Integer()),
+        indexes=[("created_by_user_id", False)],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in (
+        "tool", "trust", "messagereaction", "message", "proof", "groupmember",
+        "group", "habittoollink", "habitsubscription", "habitlog", "habit", "user",
+    ):
+        op.drop_table(name)
@@ -0,0 +1,51 @@
+"""backfill columns added after the first deploys
+
+Replaces the per-request ``_ensure_*_columns`` PRAGMA/ALTER helpers that used to
+live in the routers. Only columns missing from older databases are added.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-08-20 09:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = [
+    ("user", sa.Column("description", sa.String())),
+    ("user", sa.Column("big_why", sa.String())),
+    ("user", sa.Column("lifebook", sa.JSON())),
+    ("habit", sa.Column("is_public", sa.Boolean(), nullable=False, server_default=sa.true())),
+    ("group", sa.Column("description", sa.String())),
+    ("groupmember", sa.Column("habit_title", sa.String())),
+    ("groupmember", sa.Column("frequency_per_week", sa.Integer(), nullable=False, server_default="7")),
+    ("proof", sa.Column("caption", sa.String())),
+    ("message", sa.Column("image_url", sa.String())),
+    ("tool", sa.Column("created_by_user_id", sa.Integer())),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    insp = sa.inspect(op.get_bind())
+    existing = {}
+    for table, column in _COLUMNS:
+        if table not in existing:
+            existing[table] = {c["name"] for c in insp.get_columns(table)}
+        if column.name not in existing[table]:
+            op.add_column(table, column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The columns are part of the baseline models; nothing to undo.
+    pass
@@ -0,0 +1,27 @@
+"""composite (habit_id, day) index on habitlog for streak range scans
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-08-21 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_habitlog_habit_id_day", "habitlog", ["habit_id", "day"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_habitlog_habit_id_day", table_name="habitlog")
@@ -0,0 +1,65 @@
+"""habitstreak table holding maintained streak state, backfilled from habitlog
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-08-22 11:00:00
+
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _streaks(days):
+    """(current, longest, last_completed) over all of ``days``.
+
+    A frozen copy of what app.streaks.compute_streaks did when this revision
+    was written, so later changes there cannot alter this backfill.
+    """
+    ordered = sorted(set(days))
+    longest = run = 1
+    for prev, cur in zip(ordered, ordered[1:]):
+        run = run + 1 if cur - prev == timedelta(days=1) else 1
+        longest = max(longest, run)
+    return run, longest, ordered[-1]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    streak = op.create_table(
+        "habitstreak",
+        sa.Column("habit_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("current", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("longest", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_completed", sa.Date()),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    habitlog = sa.table("habitlog", sa.column("habit_id", sa.Integer()), sa.column("day", sa.Date()), sa.column("completed", sa.Boolean()))
+    days = defaultdict(list)
+    rows = op.get_bind().execute(sa.select(habitlog.c.habit_id, habitlog.c.day).where(habitlog.c.completed == sa.true()))
+    for habit_id, day in rows:
+        days[habit_id].append(day)
+    now = datetime.utcnow()
+    values = []
+    for habit_id, ds in days.items():
+        current, longest, last_completed = _streaks(ds)
+        values.append({
+            "habit_id": habit_id, "current": current, "longest": longest,
+            "last_completed": last_completed, "updated_at": now,
+        })
+    if values:
+        op.bulk_insert(streak, values)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("habitstreak")
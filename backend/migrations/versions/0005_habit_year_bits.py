@@ -0,0 +1,47 @@
+"""habityearbits: per-habit, per-year completion bitsets, backfilled from habitlog
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-08-25 09:30:00
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bits_table = op.create_table(
+        "habityearbits",
+        sa.Column("habit_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("year", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("bits", sa.LargeBinary(), nullable=False),
+        sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    habitlog = sa.table("habitlog", sa.column("habit_id", sa.Integer()), sa.column("day", sa.Date()), sa.column("completed", sa.Boolean()))
+    grouped = defaultdict(lambda: bytearray(46))
+    rows = op.get_bind().execute(sa.select(habitlog.c.habit_id, habitlog.c.day).where(habitlog.c.completed == sa.true()))
+    for habit_id, day in rows:
+        i = day.timetuple().tm_yday - 1
+        grouped[(habit_id, day.year)][i >> 3] |= 1 << (i & 7)
+    values = [
+        {"habit_id": hid, "year": year, "bits": bytes(b), "completed_count": int.from_bytes(b, "little").bit_count()}
+        for (hid, year), b in grouped.items()
+    ]
+    if values:
+        op.bulk_insert(bits_table, values)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("habityearbits")
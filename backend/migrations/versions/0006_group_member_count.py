@@ -0,0 +1,35 @@
+"""denormalized group.member_count and (is_public, id) index for keyset listing
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-08-26 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("group", sa.Column("member_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        'UPDATE "group" SET member_count = '
+        '(SELECT COUNT(*) FROM groupmember WHERE groupmember.group_id = "group".id)'
+    )
+    op.create_index("ix_group_is_public_id", "group", ["is_public", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_group_is_public_id", table_name="group")
+    with op.batch_alter_table("group") as batch:
+        batch.drop_column("member_count")
@@ -0,0 +1,29 @@
+"""composite message indexes for keyset pagination, with and without a type filter
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-08-27 16:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_message_group_created_id", "message", ["group_id", "created_at", "id"])
+    op.create_index("ix_message_group_type_created_id", "message", ["group_id", "type", "created_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_message_group_type_created_id", table_name="message")
+    op.drop_index("ix_message_group_created_id", table_name="message")
@@ -0,0 +1,41 @@
+"""content-addressed blob table and proof.blob_sha256
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-08-28 10:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "blob",
+        sa.Column("sha256", sa.String(length=64), primary_key=True),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    with op.batch_alter_table("proof") as batch:
+        batch.add_column(sa.Column("blob_sha256", sa.String(length=64), nullable=True))
+        batch.create_index("ix_proof_blob_sha256", ["blob_sha256"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("proof") as batch:
+        batch.drop_index("ix_proof_blob_sha256")
+        batch.drop_column("blob_sha256")
+    op.drop_table("blob")
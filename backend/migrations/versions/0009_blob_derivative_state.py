@@ -0,0 +1,30 @@
+"""blob.derivative_state for the thumbnail/medium WebP pipeline
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-08-28 15:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("blob") as batch:
+        batch.add_column(sa.Column("derivative_state", sa.String(), nullable=False, server_default="pending"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("blob") as batch:
+        batch.drop_column("derivative_state")
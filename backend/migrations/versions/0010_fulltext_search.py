@@ -0,0 +1,82 @@
+"""full-text search: FTS5 tables + triggers on SQLite, generated tsvector columns on Postgres
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-08-29 11:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> [(column, postgres weight class)]; mirrors app.search.SPECS
+TABLES = {
+    "habit": [("title", "A"), ("why", "C"), ("identity_goal", "B")],
+    "user": [("display_name", "A"), ("description", "C")],
+    "group": [("name", "A"), ("description", "C")],
+    "message": [("content", "A")],
+}
+
+
+def _sqlite_upgrade(table: str, columns: list) -> None:
+    fts = f"{table}_fts"
+    cols = ", ".join(c for c, _ in columns)
+    new = ", ".join(f"new.{c}" for c, _ in columns)
+    old = ", ".join(f"old.{c}" for c, _ in columns)
+    op.execute(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        "tokenize='porter unicode61')"
+    )
+    # the external-content pattern from the FTS5 docs: 'delete' needs the old values
+    op.execute(
+        f'CREATE TRIGGER {table}_fts_ai AFTER INSERT ON "{table}" BEGIN '
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    op.execute(
+        f'CREATE TRIGGER {table}_fts_ad AFTER DELETE ON "{table}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+    )
+    op.execute(
+        f'CREATE TRIGGER {table}_fts_au AFTER UPDATE OF {cols} ON "{table}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    )
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _postgres_upgrade(table: str, columns: list) -> None:
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({c}, '')), '{w}')" for c, w in columns
+    )
+    op.execute(f'ALTER TABLE "{table}" ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS ({vector}) STORED')
+    op.execute(f'CREATE INDEX ix_{table}_search_tsv ON "{table}" USING gin (search_tsv)')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table, columns in TABLES.items():
+        if dialect == "postgresql":
+            _postgres_upgrade(table, columns)
+        else:
+            _sqlite_upgrade(table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == "postgresql":
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_tsv")
+            op.execute(f'ALTER TABLE "{table}" DROP COLUMN IF EXISTS search_tsv')
+        else:
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
@@ -0,0 +1,42 @@
+"""refreshtoken table for rotating refresh tokens
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-08-30 09:45:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, Sequence[str], None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "refreshtoken",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("family_id", sa.String(length=32), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime()),
+        sa.Column("replaced_by_id", sa.Integer()),
+    )
+    op.create_index("ix_refreshtoken_user_id", "refreshtoken", ["user_id"])
+    op.create_index("ix_refreshtoken_family_id", "refreshtoken", ["family_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_refreshtoken_family_id", table_name="refreshtoken")
+    op.drop_index("ix_refreshtoken_user_id", table_name="refreshtoken")
+    op.drop_table("refreshtoken")
@@ -0,0 +1,90 @@
+"""habitweekrollup / userweekrollup: per-ISO-week completion aggregates, backfilled from habitlog
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2025-08-30 15:20:00
+
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    habit_weeks = op.create_table(
+        "habitweekrollup",
+        sa.Column("habit_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("completions", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_habitweekrollup_user_week", "habitweekrollup", ["user_id", "week_start"])
+    user_weeks = op.create_table(
+        "userweekrollup",
+        sa.Column("user_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("week_start", sa.Date(), primary_key=True),
+        sa.Column("completions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("habit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("best_habit_id", sa.Integer()),
+        sa.Column("best_completions", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+    # same aggregation as app.rollups.rebuild, inlined so the migration stays self-contained
+    bind = op.get_bind()
+    habit = sa.table("habit", sa.column("id", sa.Integer()), sa.column("user_id", sa.Integer()), sa.column("created_at", sa.DateTime()))
+    habitlog = sa.table("habitlog", sa.column("habit_id", sa.Integer()), sa.column("day", sa.Date()), sa.column("completed", sa.Boolean()))
+    per_habit = defaultdict(int)
+    rows = bind.execute(
+        sa.select(habit.c.user_id, habitlog.c.habit_id, habitlog.c.day)
+        .join(habit, habit.c.id == habitlog.c.habit_id)
+        .where(habitlog.c.completed == sa.true())
+    )
+    for user_id, habit_id, day in rows:
+        per_habit[(user_id, habit_id, day - timedelta(days=day.weekday()))] += 1
+    if not per_habit:
+        return
+    created = defaultdict(list)
+    for user_id, created_at in bind.execute(sa.select(habit.c.user_id, habit.c.created_at)):
+        created[user_id].append(created_at)
+    per_user = defaultdict(lambda: [0, None, 0])  # completions, best habit, best count
+    for (user_id, habit_id, week), n in sorted(per_habit.items()):
+        agg = per_user[(user_id, week)]
+        agg[0] += n
+        if n > agg[2]:
+            agg[1], agg[2] = habit_id, n
+    now = datetime.utcnow()
+    op.bulk_insert(habit_weeks, [
+        {"habit_id": hid, "week_start": week, "user_id": uid, "completions": n}
+        for (uid, hid, week), n in per_habit.items()
+    ])
+    op.bulk_insert(user_weeks, [
+        {
+            "user_id": uid,
+            "week_start": week,
+            "completions": total,
+            "habit_count": sum(1 for c in created[uid] if c is None or c < datetime.combine(week + timedelta(days=7), time.min)),
+            "best_habit_id": best,
+            "best_completions": best_n,
+            "updated_at": now,
+        }
+        for (uid, week), (total, best, best_n) in per_user.items()
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("userweekrollup")
+    op.drop_index("ix_habitweekrollup_user_week", table_name="habitweekrollup")
+    op.drop_table("habitweekrollup")
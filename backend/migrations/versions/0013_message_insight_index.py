@@ -0,0 +1,27 @@
+"""message (type, user_id, likes_count, id) index for the trusted-insights feed
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2025-08-31 10:05:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, Sequence[str], None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_message_type_user_likes", "message", ["type", "user_id", "likes_count", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_message_type_user_likes", table_name="message")
@@ -0,0 +1,32 @@
+"""partial index on learning messages for the global /learnings feed
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2025-08-31 14:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, Sequence[str], None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    learning = sa.text("type = 'learning'")
+    op.create_index(
+        "ix_message_learning_created_id", "message", ["created_at", "id"],
+        sqlite_where=learning, postgresql_where=learning,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_message_learning_created_id", table_name="message")
@@ -0,0 +1,32 @@
+"""unique (message_id, user_id) on messagereaction so likes are idempotent
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2025-09-01 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0015"
+down_revision: Union[str, Sequence[str], None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # keep the earliest reaction of any duplicate pair
+    op.execute(
+        "DELETE FROM messagereaction WHERE id NOT IN "
+        "(SELECT min_id FROM (SELECT MIN(id) AS min_id FROM messagereaction GROUP BY message_id, user_id) AS keep)"
+    )
+    op.create_index("uq_messagereaction_message_user", "messagereaction", ["message_id", "user_id"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_messagereaction_message_user", table_name="messagereaction")
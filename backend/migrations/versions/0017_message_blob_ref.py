@@ -0,0 +1,54 @@
+"""message.blob_sha256: chat messages hold a blob reference like proofs
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2025-09-03 09:40:00
+
+"""
+import re
+from collections import Counter
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0017"
+down_revision: Union[str, Sequence[str], None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# frozen copy of app.blobstore's URL pattern as of this revision
+_URL_RE = re.compile(r"^/uploads/blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z]+$")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("message") as batch:
+        batch.add_column(sa.Column("blob_sha256", sa.String(length=64), nullable=True))
+        batch.create_index("ix_message_blob_sha256", ["blob_sha256"])
+
+    # existing messages that show a stored blob take their reference now
+    conn = op.get_bind()
+    blobs = {row[0] for row in conn.execute(sa.text("SELECT sha256 FROM blob"))}
+    refs = Counter()
+    rows = conn.execute(sa.text("SELECT id, image_url FROM message WHERE image_url LIKE '/uploads/blobs/%'")).all()
+    for message_id, image_url in rows:
+        m = _URL_RE.match(image_url)
+        if m and m.group(1) in blobs:
+            conn.execute(sa.text("UPDATE message SET blob_sha256 = :sha WHERE id = :id"), {"sha": m.group(1), "id": message_id})
+            refs[m.group(1)] += 1
+    for sha, n in refs.items():
+        conn.execute(sa.text("UPDATE blob SET ref_count = ref_count + :n WHERE sha256 = :sha"), {"n": n, "sha": sha})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT blob_sha256, COUNT(*) FROM message WHERE blob_sha256 IS NOT NULL GROUP BY blob_sha256")).all()
+    for sha, n in rows:
+        conn.execute(sa.text("UPDATE blob SET ref_count = ref_count - :n WHERE sha256 = :sha"), {"n": n, "sha": sha})
+    with op.batch_alter_table("message") as batch:
+        batch.drop_index("ix_message_blob_sha256")
+        batch.drop_column("blob_sha256")
@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database and upload dir before app.config is imported,
+# so the process-wide engine never touches the developer's habit.db.
+_TMP = tempfile.mkdtemp(prefix="habit-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/test.db")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_TMP, "uploads"))
+os.makedirs(os.environ["UPLOAD_DIR"], exist_ok=True)
+# Minimum bcrypt cost keeps the many register/login calls fast; hashing still goes through the pool.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from collections import namedtuple  # noqa: E402
+
+import pytest  # noqa: E402
+import sqlalchemy as sa  # noqa: E402
+from sqlmodel import select  # noqa: E402
+
+Toggled = namedtuple("Toggled", "completed streak week")
+
+
+@pytest.fixture
+def auth_headers():
+    """``auth_headers(client, email)``: register a user and return its bearer header."""
+    def register(client, email, password="secret123"):
+        r = client.post("/auth/register", json={"email": email, "password": password})
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    return register
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A private SQLite database migrated to head, for tests that bypass the app."""
+    from app import migrate
+
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/private.db")
+    migrate.upgrade(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def toggle():
+    """``toggle(session, habit_id, day, user_id=1)``: flip one day like ``toggle_day`` and commit.
+
+    Returns the completed flag, the streak stats and the week rollup stats.
+    """
+    from app import rollups, streaks
+    from app.models.habit import HabitLog
+
+    def flip(session, habit_id, day, user_id=1):
+        log = session.exec(select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.day == day)).first()
+        if log is None:
+            log = HabitLog(habit_id=habit_id, day=day, completed=True)
+        else:
+            log.completed = not log.completed
+        session.add(log)
+        completed = log.completed
+        streak = streaks.apply_toggle(session, habit_id, day, completed)
+        week = rollups.apply_toggle(session, user_id, habit_id, day, completed)
+        session.commit()
+        return Toggled(completed, streak, week)
+
+    return flip
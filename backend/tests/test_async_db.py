@@ -0,0 +1,53 @@
+import asyncio
+
+import httpx
+from sqlalchemy import text
+
+from app.db import _async_url, dispose_async_engine, get_async_engine, get_async_session, init_db
+from app.main import app
+
+
+def test_async_url_picks_async_drivers():
+    assert _async_url("sqlite:///./habit.db") == "sqlite+aiosqlite:///./habit.db"
+    assert _async_url("postgresql://u:p@db/habits") == "postgresql+psycopg://u:p@db/habits"
+    assert _async_url("postgresql+psycopg://u:p@db/habits") == "postgresql+psycopg://u:p@db/habits"
+
+
+def test_async_engine_applies_sqlite_pragmas():
+    async def run():
+        engine = get_async_engine()
+        if engine.dialect.name != "sqlite":
+            return
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar().lower() == "wal"
+            assert int((await conn.execute(text("PRAGMA busy_timeout"))).scalar()) > 0
+        gen = get_async_session()
+        session = await gen.__anext__()
+        assert session.bind is engine
+        await gen.aclose()
+        await dispose_async_engine()
+
+    asyncio.run(run())
+
+
+def test_concurrent_requests_on_one_event_loop():
+    init_db()
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await client.post("/auth/register", json={"email": "async@example.com", "password": "secret123"})
+            headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+            habit_id = (await client.post("/habits", json={"title": "Async"}, headers=headers)).json()["id"]
+            days = [f"2025-03-{d:02d}" for d in range(1, 21)]
+            toggles = await asyncio.gather(*(client.post(f"/habits/{habit_id}/toggle/{d}", headers=headers) for d in days))
+            reads = await asyncio.gather(*(client.get("/habits", headers=headers) for _ in range(20)))
+            assert all(t.status_code == 200 and t.json()["completed"] for t in toggles)
+            assert all(r.status_code == 200 and r.json()[0]["id"] == habit_id for r in reads)
+            cal = await client.get(
+                "/habits/calendar", params={"habit_id": habit_id, "start": "2025-03-01", "end": "2025-03-31"}, headers=headers
+            )
+            assert cal.json()["habits"][0]["completed"] == 20
+        await dispose_async_engine()
+
+    asyncio.run(run())
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.core import create_access_token
+from app.db import get_async_engine, get_engine, init_db
+from app.deps import token_cache
+from app.main import app
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recent():
+    clock = _Clock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2, expires_at=clock.now + 1)
+    assert cache.get("a") == 1  # "b" is now least recent
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("c") == 3
+    clock.now += 11
+    assert cache.get("a") is None and len(cache) == 1
+
+
+def _user_selects(fn):
+    seen = []
+
+    def listener(conn, cursor, statement, *args):
+        if 'FROM "user"' in statement or "FROM user" in statement:
+            seen.append(statement)
+
+    engines = (get_engine(), get_async_engine().sync_engine)
+    for engine in engines:
+        sa.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        for engine in engines:
+            sa.event.remove(engine, "before_cursor_execute", listener)
+    return seen
+
+
+def test_authenticated_requests_skip_the_user_select(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "cache@example.com")
+    assert client.get("/users/me", headers=headers).status_code == 200  # warms both caches
+
+    assert _user_selects(lambda: client.get("/users/me", headers=headers)) == []
+    assert _user_selects(lambda: client.get("/habits", headers=headers)) == []
+
+    r = client.put("/users/me", json={"display_name": "Cached Carol"}, headers=headers)
+    assert r.json()["display_name"] == "Cached Carol"
+    assert client.get("/users/me", headers=headers).json()["display_name"] == "Cached Carol"
+
+
+def test_bad_and_expired_tokens_are_not_cached():
+    init_db()
+    client = TestClient(app)
+    before = len(token_cache)
+    assert client.get("/habits", headers={"Authorization": "Bearer nope"}).status_code == 401
+    expired = create_access_token("1", secret_key=get_settings().jwt_secret, expires_delta=timedelta(seconds=-5))
+    assert client.get("/habits", headers={"Authorization": f"Bearer {expired}"}).status_code == 401
+    assert len(token_cache) == before
+
+
+def test_deleted_users_lose_access_before_their_token_expires(auth_headers):
+    init_db()
+    client = TestClient(app)
+    # dev_seed_community deletes community_demo_* accounts outside its ten
+    headers = auth_headers(client, "community_demo_99@example.com")
+    assert client.get("/habits", headers=headers).status_code == 200
+    assert client.post("/users/dev_seed_community").status_code == 200
+    assert client.get("/habits", headers=headers).status_code == 401
+    assert client.get("/groups", headers={**headers, "If-None-Match": "*"}).status_code == 401
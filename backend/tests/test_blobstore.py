@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import blobstore
+from app.config import get_settings
+from app.db import get_engine, init_db
+from app.main import app
+from app.models.blob import Blob
+from app.models.group import Proof
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x01" * 300
+
+
+def _upload(client, gid, headers, data):
+    return client.post(f"/groups/{gid}/proofs/upload", files={"file": ("p.png", io.BytesIO(data), "image/png")}, headers=headers)
+
+
+def test_identical_uploads_share_one_blob(auth_headers):
+    init_db()
+    client = TestClient(app)
+    a = auth_headers(client, "blob-a@example.com")
+    b = auth_headers(client, "blob-b@example.com")
+    gid = client.post("/groups", json={"name": "Blobs"}, headers=a).json()["id"]
+    client.post(f"/groups/{gid}/join", json={"frequency_per_week": 1}, headers=b)
+
+    url_a = _upload(client, gid, a, PNG).json()["image_url"]
+    url_b = _upload(client, gid, b, PNG).json()["image_url"]
+    sha = hashlib.sha256(PNG).hexdigest()
+    assert url_a == url_b == f"/uploads/blobs/{sha[:2]}/{sha[2:4]}/{sha}.png"
+    assert os.listdir(os.path.join(get_settings().upload_dir, "blobs", sha[:2], sha[2:4])) == [f"{sha}.png"]
+    with Session(get_engine()) as session:
+        assert session.get(Blob, sha).ref_count == 2
+
+    # reusing the URL in a proof message takes one reference for the proof and one for the message
+    r = client.post(f"/groups/{gid}/messages", json={"type": "proof", "content": "again", "image_url": url_a}, headers=a)
+    assert r.status_code in (200, 201), r.text
+    with Session(get_engine()) as session:
+        assert session.get(Blob, sha).ref_count == 4
+
+
+def test_store_and_release(tmp_path, engine):
+    upload_dir = str(tmp_path / "uploads")
+    other = PNG + b"\x02"
+    with Session(engine) as session:
+        one = blobstore.store(session, io.BytesIO(PNG), upload_dir, 1 << 20)
+        two = blobstore.store(session, io.BytesIO(PNG), upload_dir, 1 << 20)
+        three = blobstore.store(session, io.BytesIO(other), upload_dir, 1 << 20)
+        session.commit()
+        assert one.sha256 == two.sha256 != three.sha256
+        assert blobstore.sha_from_url(blobstore.blob_url(one)) == one.sha256
+        assert blobstore.sha_from_url("/uploads/legacy.png") is None
+        path = blobstore.blob_path(upload_dir, one)
+        sha = one.sha256
+
+        blobstore.release(session, sha, upload_dir)
+        assert os.path.exists(path)
+        blobstore.release(session, sha, upload_dir)
+        assert not os.path.exists(path)
+        assert session.get(Blob, sha) is None
+        assert os.path.exists(blobstore.blob_path(upload_dir, three))
+
+
+def test_uncommitted_store_leaves_no_file_behind(tmp_path, engine):
+    upload_dir = str(tmp_path / "uploads")
+    with Session(engine) as session:
+        kept = blobstore.store(session, io.BytesIO(PNG), upload_dir, 1 << 20)
+        session.commit()
+        # the same bytes again, then the caller's commit fails: the committed blob stays
+        again = blobstore.store(session, io.BytesIO(PNG), upload_dir, 1 << 20)
+        blobstore.discard_orphan(session, again, upload_dir)
+        assert os.path.exists(blobstore.blob_path(upload_dir, kept))
+
+        fresh = blobstore.store(session, io.BytesIO(PNG + b"\x03"), upload_dir, 1 << 20)
+        path, sha = blobstore.blob_path(upload_dir, fresh), fresh.sha256
+        assert os.path.exists(path)
+        blobstore.discard_orphan(session, fresh, upload_dir)
+        assert not os.path.exists(path)
+        assert session.get(Blob, sha) is None
+
+
+def test_deleting_proofs_releases_their_blob(auth_headers):
+    init_db()
+    client = TestClient(app)
+    a = auth_headers(client, "blob-del-a@example.com")
+    b = auth_headers(client, "blob-del-b@example.com")
+    gid = client.post("/groups", json={"name": "Deletes"}, headers=a).json()["id"]
+    client.post(f"/groups/{gid}/join", headers=b)
+    data = PNG + b"\x04"
+    first = _upload(client, gid, a, data).json()
+    second = _upload(client, gid, b, data).json()
+    sha = hashlib.sha256(data).hexdigest()
+    path = os.path.join(get_settings().upload_dir, *first["image_url"].split("/")[2:])
+
+    assert client.delete(f"/groups/{gid}/proofs/{first['id']}", headers=b).status_code == 403
+    assert client.delete(f"/groups/{gid}/proofs/{first['id']}", headers=a).status_code == 204
+    with Session(get_engine()) as session:
+        assert session.get(Blob, sha).ref_count == 1
+    assert os.path.exists(path)
+    assert client.delete(f"/groups/{gid}/proofs/{second['id']}", headers=b).status_code == 204
+    assert not os.path.exists(path)
+    with Session(get_engine()) as session:
+        assert session.get(Blob, sha) is None
+
+
+def test_a_message_keeps_its_image_after_the_proof_is_deleted(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "blob-message@example.com")
+    gid = client.post("/groups", json={"name": "Shown"}, headers=h).json()["id"]
+    data = PNG + b"\x05"
+    uploaded = _upload(client, gid, h, data).json()
+    client.post(f"/groups/{gid}/messages", json={"type": "proof", "content": "look", "image_url": uploaded["image_url"]}, headers=h)
+
+    for proof in client.get(f"/groups/{gid}/proofs/week", headers=h).json():
+        assert proof["image_url"] == uploaded["image_url"]
+    with Session(get_engine()) as session:
+        proof_ids = [p.id for p in session.exec(select(Proof).where(Proof.group_id == gid))]
+    assert len(proof_ids) == 2
+    for proof_id in proof_ids:
+        assert client.delete(f"/groups/{gid}/proofs/{proof_id}", headers=h).status_code == 204
+
+    image_url = client.get(f"/groups/{gid}/messages", headers=h).json()[-1]["image_url"]
+    assert image_url == uploaded["image_url"]
+    assert client.get(image_url).content == data
+    with Session(get_engine()) as session:
+        assert session.get(Blob, hashlib.sha256(data).hexdigest()).ref_count == 1
+
+
+def test_release_commits_when_the_blob_is_already_gone(tmp_path, engine):
+    with Session(engine) as session:
+        p = Proof(group_id=1, user_id=1, day=date(2025, 3, 10), image_url="/uploads/blobs/x.png", blob_sha256="0" * 64)
+        session.add(p)
+        session.commit()
+        proof_id = p.id
+        session.delete(p)
+        blobstore.release(session, "0" * 64, str(tmp_path))
+    with Session(engine) as session:
+        assert session.get(Proof, proof_id) is None
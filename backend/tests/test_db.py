@@ -0,0 +1,31 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.db import get_engine, get_session
+from app.main import app
+
+
+def test_engine_is_shared_across_sessions():
+    gen_a = get_session(); sa = next(gen_a)
+    gen_b = get_session(); sb = next(gen_b)
+    assert sa.get_bind() is sb.get_bind() is get_engine()
+    for g in (gen_a, gen_b):
+        g.close()
+
+
+def test_sqlite_connect_pragmas_applied():
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar().lower() == "wal"
+        assert int(conn.execute(text("PRAGMA busy_timeout")).scalar()) > 0
+
+
+def test_pool_metrics_endpoint():
+    client = TestClient(app)
+    r = client.get("/health/db")
+    assert r.status_code == 200
+    pool = r.json()["pool"]
+    assert pool["checkouts"] >= pool["checked_out"]
+    assert "wait_avg_ms" in pool
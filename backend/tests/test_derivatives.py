@@ -0,0 +1,77 @@
+import io
+import os
+
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlmodel import Session
+
+from app import blobstore, derivatives
+from app.config import get_settings
+from app.db import get_engine, init_db
+from app.main import app
+from app.models.blob import Blob
+
+
+def _jpeg_with_exif(size=(2000, 1000)):
+    im = Image.new("RGB", size, (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "SecretCam"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90 on display
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def test_render_resizes_strips_exif_and_applies_orientation(tmp_path):
+    src = tmp_path / "in.jpg"
+    src.write_bytes(_jpeg_with_exif())
+    thumb, medium = str(tmp_path / "t.webp"), str(tmp_path / "m.webp")
+    derivatives.render(str(src), [(thumb, 320), (medium, 1280)], 80)
+    with Image.open(thumb) as t, Image.open(medium) as m:
+        assert t.format == m.format == "WEBP"
+        assert t.size == (160, 320)  # rotated to portrait
+        assert m.size == (640, 1280)
+        assert not t.getexif() and "exif" not in t.info
+
+
+def test_proof_reads_fall_back_until_variants_exist(monkeypatch, auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "variants@example.com")
+    gid = client.post("/groups", json={"name": "Variants"}, headers=headers).json()["id"]
+
+    # a queued render has not finished yet: originals are served
+    monkeypatch.setattr(derivatives, "schedule", lambda blob: None)
+    data = _jpeg_with_exif((800, 600))
+    url = client.post(f"/groups/{gid}/proofs/upload", files={"file": ("a.jpg", io.BytesIO(data), "image/jpeg")}, headers=headers).json()["image_url"]
+    client.post(f"/groups/{gid}/messages", json={"content": "look", "image_url": url}, headers=headers)
+    week = client.get(f"/groups/{gid}/proofs/week", headers=headers).json()
+    assert week[0]["thumb_url"] == week[0]["medium_url"] == url
+    assert client.get(f"/groups/{gid}/messages", headers=headers).json()[-1]["thumb_url"] == url
+    monkeypatch.undo()
+
+    with Session(get_engine()) as session:
+        blob = session.get(Blob, blobstore.sha_from_url(url))
+        derivatives.schedule(blob)
+    assert derivatives.wait_idle()
+    week = client.get(f"/groups/{gid}/proofs/week", headers=headers).json()
+    assert week[0]["image_url"] == url
+    assert week[0]["thumb_url"].endswith(".thumb.webp") and week[0]["medium_url"].endswith(".medium.webp")
+    path = os.path.join(get_settings().upload_dir, *week[0]["thumb_url"][len("/uploads/"):].split("/"))
+    assert os.path.exists(path)
+    msgs = client.get(f"/groups/{gid}/messages", headers=headers).json()
+    assert msgs[-1]["medium_url"] == week[0]["medium_url"]
+
+
+def test_unreadable_image_is_marked_failed(tmp_path, monkeypatch, engine):
+    monkeypatch.setattr(get_settings(), "upload_dir", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "derivative_workers", 0)
+    monkeypatch.setattr("app.db.get_engine", lambda: engine)
+    with Session(engine) as session:
+        blob = blobstore.store(session, io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"\x00" * 64), str(tmp_path), 1 << 20)
+        session.commit()
+        derivatives.schedule(blob)
+        session.refresh(blob)
+        assert blob.derivative_state == "failed"
+        url = blobstore.blob_url(blob)
+        assert derivatives.variant_urls(session, [url])[url] == {"thumb_url": url, "medium_url": url}
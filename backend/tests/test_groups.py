@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from app.db import init_db
+from app.main import app
+
+
+def test_member_counts_follow_create_and_join(auth_headers):
+    init_db()
+    client = TestClient(app)
+    owner = auth_headers(client, "grp-owner@example.com")
+    joiner = auth_headers(client, "grp-joiner@example.com")
+    gid = client.post("/groups", json={"name": "Runners"}, headers=owner).json()["id"]
+    client.post(f"/groups/{gid}/join", json={}, headers=joiner)
+    client.post(f"/groups/{gid}/join", json={}, headers=joiner)  # idempotent
+
+    listed = {g["id"]: g["members"] for g in client.get("/groups", headers=owner).json()}
+    assert listed[gid] == 2
+    mine = client.get("/groups/me/list", headers=joiner).json()
+    assert [g["members"] for g in mine if g["id"] == gid] == [2]
+    me = client.get("/users/me", headers=joiner).json()["id"]
+    assert [g["members"] for g in client.get(f"/users/{me}/groups", headers=owner).json()] == [2]
+
+
+def test_list_groups_keyset_pagination(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "grp-pager@example.com")
+    created = [client.post("/groups", json={"name": f"G{i}"}, headers=headers).json()["id"] for i in range(5)]
+
+    first = client.get("/groups", params={"limit": 2}, headers=headers)
+    assert [g["id"] for g in first.json()] == created[::-1][:2]
+    cursor = first.headers["X-Next-Before-Id"]
+    second = client.get("/groups", params={"limit": 2, "before_id": cursor}, headers=headers).json()
+    assert [g["id"] for g in second] == created[::-1][2:4]
+
+
+def test_message_cursor_pagination_and_polling(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "grp-chat@example.com")
+    gid = client.post("/groups", json={"name": "Chatty"}, headers=headers).json()["id"]
+    ids = []
+    for i in range(6):
+        msg_type = "learning" if i % 2 else "chat"
+        ids.append(client.post(f"/groups/{gid}/messages", json={"content": f"m{i}", "type": msg_type}, headers=headers).json()["id"])
+
+    newest = client.get(f"/groups/{gid}/messages", params={"limit": 2}, headers=headers).json()
+    assert [m["id"] for m in newest] == ids[4:]
+    older = client.get(f"/groups/{gid}/messages", params={"limit": 3, "before_id": newest[0]["id"]}, headers=headers).json()
+    assert [m["id"] for m in older] == ids[1:4]
+    newer = client.get(f"/groups/{gid}/messages", params={"after_id": ids[2]}, headers=headers).json()
+    assert [m["id"] for m in newer] == ids[3:]
+    learnings = client.get(f"/groups/{gid}/messages", params={"type": "learning", "before_id": ids[5]}, headers=headers).json()
+    assert [m["id"] for m in learnings] == [ids[1], ids[3]]
+    assert client.get(f"/groups/{gid}/messages", params={"after_id": 10**9}, headers=headers).status_code == 400
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from sqlmodel import Session, select
+
+from app import habit_bits
+from app.models.habit import HabitLog, HabitYearBits
+
+
+def test_set_and_clear_days_across_year_boundary(engine):
+    with Session(engine) as session:
+        for d in (date(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1), date(2024, 2, 29)):
+            habit_bits.set_day(session, 1, d, True)
+        habit_bits.set_day(session, 1, date(2024, 12, 30), False)
+        session.commit()
+
+        years = habit_bits.year_bits(session, [1], 2024, 2025)[1]
+        days = [date(2024, 12, 29) + timedelta(days=i) for i in range(5)]
+        assert [d.year in years and habit_bits.is_set(years[d.year], d) for d in days] == [False, False, True, True, False]
+        assert habit_bits.is_set(years[2024], date(2024, 2, 29))
+        counts = {r.year: r.completed_count for r in session.exec(select(HabitYearBits).where(HabitYearBits.habit_id == 1))}
+        assert counts == {2024: 2, 2025: 1}
+
+
+def test_rebuild_matches_habitlog(engine):
+    with Session(engine) as session:
+        session.add(HabitLog(habit_id=3, day=date(2025, 3, 1), completed=True))
+        session.add(HabitLog(habit_id=3, day=date(2025, 3, 2), completed=False))
+        session.add(HabitYearBits(habit_id=3, year=2025, bits=b"\xff" * habit_bits.YEAR_BYTES, completed_count=368))
+        session.commit()
+        assert habit_bits.rebuild(session) == 1
+        row = session.get(HabitYearBits, (3, 2025))
+        assert row.completed_count == habit_bits.popcount(row.bits) == 1
+        assert habit_bits.is_set(row.bits, date(2025, 3, 1)) and not habit_bits.is_set(row.bits, date(2025, 3, 2))
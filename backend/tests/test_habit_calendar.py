@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.db import init_db
+from app.habit_calendar import run_lengths
+from app.main import app
+
+
+def test_run_lengths():
+    assert run_lengths("0110111") == [[1, 2], [4, 3]]
+    assert run_lengths("000") == []
+
+
+def test_calendar_range_and_week_agree(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "calendar@example.com")
+    a = client.post("/habits", json={"title": "Read"}, headers=headers).json()["id"]
+    b = client.post("/habits", json={"title": "Walk"}, headers=headers).json()["id"]
+    today = date.today()
+    for offset in (0, 1, 40):
+        client.post(f"/habits/{a}/toggle/{today - timedelta(days=offset)}", headers=headers)
+    client.post(f"/habits/{b}/toggle/{today}", headers=headers)
+
+    start = today - timedelta(days=59)
+    r = client.get("/habits/calendar", params={"habit_id": [a, b], "start": start.isoformat()}, headers=headers)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    bits = {h["habit_id"]: h["bits"] for h in body["habits"]}
+    assert len(bits[a]) == 60
+    assert bits[a].endswith("11") and bits[a][19] == "1" and bits[a].count("1") == 3
+    assert bits[b] == "0" * 59 + "1"
+
+    runs = client.get("/habits/calendar", params={"habit_id": a, "start": start.isoformat(), "encoding": "runs"}, headers=headers)
+    assert runs.json()["habits"][0]["runs"] == [[19, 1], [58, 2]]
+
+    week = client.get(f"/habits/{a}/week", headers=headers).json()["days"]
+    assert week[today.isoformat()] is True
+
+    too_long = client.get("/habits/calendar", params={"habit_id": a, "start": (today - timedelta(days=400)).isoformat()}, headers=headers)
+    assert too_long.status_code == 400
+
+
+def test_calendar_rejects_other_users_habits(auth_headers):
+    init_db()
+    client = TestClient(app)
+    owner = auth_headers(client, "cal-owner@example.com")
+    other = auth_headers(client, "cal-other@example.com")
+    hid = client.post("/habits", json={"title": "Mine"}, headers=owner).json()["id"]
+    assert client.get("/habits/calendar", params={"habit_id": hid}, headers=other).status_code == 404
+
+
+def test_row_and_bitmap_paths_match(monkeypatch, auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "cal-paths@example.com")
+    hid = client.post("/habits", json={"title": "Stretch"}, headers=headers).json()["id"]
+    today = date.today()
+    for offset in (0, 3, 4, 200):
+        client.post(f"/habits/{hid}/toggle/{today - timedelta(days=offset)}", headers=headers)
+    params = {"habit_id": hid}
+    from_bits = client.get("/habits/calendar", params=params, headers=headers).json()
+    monkeypatch.setattr(get_settings(), "habit_bitmap_enabled", False)
+    from_rows = client.get("/habits/calendar", params=params, headers=headers).json()
+    assert from_bits == from_rows
+    assert from_rows["habits"][0]["completed"] == 4
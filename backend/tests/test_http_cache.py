@@ -0,0 +1,140 @@
+from datetime import date
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import likes, versions
+from app.db import get_async_engine, get_engine, init_db
+from app.main import app
+
+
+def _statements(fn):
+    seen = []
+    listener = lambda *a: seen.append(a[2])  # noqa: E731
+    engines = (get_engine(), get_async_engine().sync_engine)
+    for engine in engines:
+        sa.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        for engine in engines:
+            sa.event.remove(engine, "before_cursor_execute", listener)
+    return result, seen
+
+
+def _revalidate(client, path, etag, headers=None, **params):
+    return client.get(path, params=params, headers={**(headers or {}), "If-None-Match": etag})
+
+
+def test_bump_counts_per_key():
+    init_db()
+    with Session(get_engine()) as session:
+        before = versions.read(session, ["test:a", "test:b"])
+        versions.bump(session, "test:a", "test:a", "test:b")
+        versions.bump(session, "test:a")
+        session.commit()
+        after = versions.read(session, ["test:a", "test:b", "test:never"])
+    assert after == {"test:a": before["test:a"] + 2, "test:b": before["test:b"] + 1, "test:never": 0}
+
+
+def test_tools_answer_304_from_the_stamp_until_a_tool_is_added(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "etag-tools@example.com")
+    r = client.get("/tools")
+    etag = r.headers["ETag"]
+    assert etag.startswith('W/"') and r.headers["Cache-Control"] == "public, max-age=60"
+
+    again, statements = _statements(lambda: _revalidate(client, "/tools", etag))
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.content
+    assert len(statements) == 1 and "resourceversion" in statements[0]
+
+    client.post("/tools", json={"title": "Habit stacking", "description": "After X, do Y"}, headers=h)
+    fresh = _revalidate(client, "/tools", etag)
+    assert fresh.status_code == 200 and fresh.headers["ETag"] != etag
+    assert "Habit stacking" in [t["title"] for t in fresh.json()]
+
+
+def test_private_routes_need_a_valid_token_and_tag_per_caller(auth_headers):
+    init_db()
+    client = TestClient(app)
+    alice, bob = auth_headers(client, "etag-alice@example.com"), auth_headers(client, "etag-bob@example.com")
+    r = client.get("/groups", headers=alice)
+    etag = r.headers["ETag"]
+    assert r.headers["Cache-Control"] == "private, no-cache" and "Authorization" in r.headers["Vary"]
+
+    assert client.get("/groups", headers={"If-None-Match": "*"}).status_code == 401
+    assert _revalidate(client, "/groups", etag, {"Authorization": "Bearer junk"}).status_code == 401
+    assert _revalidate(client, "/groups", etag, bob).status_code == 200
+    assert _revalidate(client, "/groups", etag, alice).status_code == 304
+    # the query string is part of the tag
+    assert _revalidate(client, "/groups", etag, alice, limit=5).status_code == 200
+
+    gid = client.post("/groups", json={"name": "Stamped"}, headers=bob).json()["id"]
+    assert _revalidate(client, "/groups", etag, alice).status_code == 200
+    etag = client.get("/groups", headers=alice).headers["ETag"]
+    client.post(f"/groups/{gid}/join", headers=alice)
+    changed = _revalidate(client, "/groups", etag, alice)
+    assert changed.status_code == 200 and next(g for g in changed.json() if g["id"] == gid)["members"] == 2
+
+
+def test_profile_and_discover_follow_their_writes(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "etag-profile@example.com")
+    viewer = auth_headers(client, "etag-viewer@example.com")
+    uid = client.get("/users/me", headers=h).json()["id"]
+
+    profile = client.get(f"/users/{uid}", headers=viewer)
+    assert profile.headers["Cache-Control"] == "private, max-age=30"
+    discover = client.get("/habits/discover", headers=viewer)
+
+    client.post("/habits", json={"title": "Private habit", "is_public": False}, headers=h)
+    assert _revalidate(client, "/habits/discover", discover.headers["ETag"], viewer).status_code == 304
+    changed = _revalidate(client, f"/users/{uid}", profile.headers["ETag"], viewer)
+    assert changed.status_code == 200 and changed.json()["habits_count"] == 1
+
+    profile_etag = changed.headers["ETag"]
+    client.put("/users/me", json={"display_name": "Renamed"}, headers=h)
+    renamed = _revalidate(client, f"/users/{uid}", profile_etag, viewer)
+    assert renamed.status_code == 200 and renamed.json()["display_name"] == "Renamed"
+
+    client.post("/habits", json={"title": "Public habit"}, headers=h)
+    assert _revalidate(client, "/habits/discover", discover.headers["ETag"], viewer).status_code == 200
+
+
+def test_week_view_revalidates_per_habit_and_owner(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "etag-week@example.com")
+    other = auth_headers(client, "etag-week-other@example.com")
+    hid = client.post("/habits", json={"title": "Stamped week"}, headers=h).json()["id"]
+    sibling = client.post("/habits", json={"title": "Sibling"}, headers=h).json()["id"]
+
+    r = client.get(f"/habits/{hid}/week", headers=h)
+    etag = r.headers["ETag"]
+    assert _revalidate(client, f"/habits/{hid}/week", etag, h).status_code == 304
+    assert _revalidate(client, f"/habits/{hid}/week", etag, other).status_code == 404
+
+    today = date.today().isoformat()
+    client.post(f"/habits/{sibling}/toggle/{today}", headers=h)
+    assert _revalidate(client, f"/habits/{hid}/week", etag, h).status_code == 304
+    client.post(f"/habits/{hid}/toggle/{today}", headers=h)
+    fresh = _revalidate(client, f"/habits/{hid}/week", etag, h)
+    assert fresh.status_code == 200 and fresh.json()["days"][today] is True
+
+
+def test_flushed_likes_move_the_learnings_tag(auth_headers):
+    init_db()
+    likes.shutdown()
+    client = TestClient(app)
+    h = auth_headers(client, "etag-likes@example.com")
+    gid = client.post("/groups", json={"name": "Liked"}, headers=h).json()["id"]
+    mid = client.post(f"/groups/{gid}/messages", json={"content": "tag me", "type": "learning"}, headers=h).json()["id"]
+    etag = client.get("/learnings").headers["ETag"]
+
+    client.post(f"/groups/{gid}/messages/{mid}/like", headers=h)
+    likes.shutdown()  # flushes
+    fresh = _revalidate(client, "/learnings", etag)
+    assert fresh.status_code == 200 and next(m for m in fresh.json() if m["id"] == mid)["likes_count"] == 1
@@ -0,0 +1,73 @@
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from sqlmodel import select
+
+from app.db import get_async_engine, get_engine, init_db
+from app.main import app
+from app.models.group import Message
+from app.routers.learnings import IS_LEARNING
+
+
+def _post(client, gid, headers, content, type="learning"):
+    return client.post(f"/groups/{gid}/messages", json={"content": content, "type": type}, headers=headers).json()["id"]
+
+
+def test_learnings_page_by_cursor_newest_first(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "learn-pages@example.com")
+    gid = client.post("/groups", json={"name": "Learners"}, headers=h).json()["id"]
+    ids = [_post(client, gid, h, f"lesson {i}") for i in range(5)]
+    _post(client, gid, h, "just chatting", type="chat")
+
+    first = client.get("/learnings", params={"limit": 3})
+    assert [m["id"] for m in first.json()] == ids[::-1][:3]
+    cursor = first.headers["X-Next-Before-Id"]
+    rest = client.get("/learnings", params={"limit": 3, "before_id": cursor}).json()
+    assert [m["id"] for m in rest][:2] == ids[::-1][3:5]
+
+
+def test_first_page_is_cached_revalidated_and_invalidated_by_new_learnings(auth_headers):
+    init_db()
+    client = TestClient(app)
+    h = auth_headers(client, "learn-cache@example.com")
+    gid = client.post("/groups", json={"name": "Cache"}, headers=h).json()["id"]
+    _post(client, gid, h, "first lesson")
+
+    r = client.get("/learnings", params={"limit": 7})
+    etag = r.headers["ETag"]
+    statements = []
+    listener = lambda *a: statements.append(a[2])  # noqa: E731
+    engines = (get_engine(), get_async_engine().sync_engine)
+    for engine in engines:
+        sa.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        again = client.get("/learnings", params={"limit": 7}, headers={"If-None-Match": etag})
+    finally:
+        for engine in engines:
+            sa.event.remove(engine, "before_cursor_execute", listener)
+    assert again.status_code == 304 and again.headers["ETag"] == etag and not again.content
+    # only the version stamp is read
+    assert len(statements) == 1 and "resourceversion" in statements[0]
+
+    new_id = _post(client, gid, h, "second lesson")
+    fresh = client.get("/learnings", params={"limit": 7}, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.json()[0]["id"] == new_id
+    assert fresh.headers["ETag"] != etag
+
+
+def test_learnings_query_uses_the_partial_index(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text("INSERT INTO message (group_id, user_id, content, type, likes_count, created_at) "
+                    "VALUES (1, :u, 'x', :t, 0, '2025-03-10 00:00:00')"),
+            [{"u": i % 50, "t": "learning" if i % 10 == 0 else "chat"} for i in range(2000)],
+        )
+        conn.execute(sa.text("ANALYZE"))
+    query = select(Message.id).where(IS_LEARNING).order_by(Message.created_at.desc(), Message.id.desc()).limit(50)
+    with engine.connect() as conn:
+        sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+        plan = conn.execute(sa.text("EXPLAIN QUERY PLAN " + sql)).all()
+    assert any("ix_message_learning_created_id" in row[-1] for row in plan)
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
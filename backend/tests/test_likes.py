@@ -0,0 +1,81 @@
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import likes
+from app.config import get_settings
+from app.db import get_engine, init_db
+from app.main import app
+from app.models.group import Message
+
+
+def _likes_count(message_id):
+    with Session(get_engine()) as session:
+        return session.get(Message, message_id).likes_count
+
+
+def _quiet_flusher(monkeypatch):
+    # stop the background thread so the test decides when deltas are flushed
+    likes.shutdown()
+    monkeypatch.setattr(get_settings(), "likes_flush_interval_seconds", 3600.0)
+
+
+def test_likes_are_idempotent_and_flushed_write_behind(monkeypatch, auth_headers):
+    init_db()
+    _quiet_flusher(monkeypatch)
+    client = TestClient(app)
+    owner, fan = auth_headers(client, "like-owner@example.com"), auth_headers(client, "like-fan@example.com")
+    gid = client.post("/groups", json={"name": "Likes"}, headers=owner).json()["id"]
+    mid = client.post(f"/groups/{gid}/messages", json={"content": "tip", "type": "learning"}, headers=owner).json()["id"]
+    url = f"/groups/{gid}/messages/{mid}/like"
+
+    assert client.post(url, headers=owner).json()["likes_count"] == 1
+    assert client.post(url, headers=owner).json()["likes_count"] == 1  # again: no change
+    assert client.post(url, headers=fan).json()["likes_count"] == 2  # non-members may like learnings
+    assert _likes_count(mid) == 0  # not flushed yet
+    assert client.delete(url, headers=fan).json() == {"message_id": mid, "liked": False, "likes_count": 1}
+    assert client.post(f"/groups/{gid}/messages/{mid}/unlike", headers=fan).json()["likes_count"] == 1
+
+    assert likes.flush() == 1
+    assert _likes_count(mid) == 1 and likes.pending(mid) == 0
+    listed = client.get(f"/groups/{gid}/messages", headers=owner).json()
+    assert [m["likes_count"] for m in listed if m["id"] == mid] == [1]
+    assert client.get("/learnings").json()[0]["likes_count"] == 1
+
+
+def test_hot_message_costs_one_counter_update_per_flush(monkeypatch, auth_headers):
+    init_db()
+    _quiet_flusher(monkeypatch)
+    client = TestClient(app)
+    owner = auth_headers(client, "hot-owner@example.com")
+    gid = client.post("/groups", json={"name": "Viral"}, headers=owner).json()["id"]
+    mid = client.post(f"/groups/{gid}/messages", json={"content": "viral", "type": "learning"}, headers=owner).json()["id"]
+    for i in range(12):
+        client.post(f"/groups/{gid}/messages/{mid}/like", headers=auth_headers(client, f"hot-fan{i}@example.com"))
+
+    updates = []
+    listener = lambda *a: updates.append(a[2]) if a[2].startswith("UPDATE message") else None  # noqa: E731
+    sa.event.listen(get_engine(), "before_cursor_execute", listener)
+    try:
+        likes.flush()
+    finally:
+        sa.event.remove(get_engine(), "before_cursor_execute", listener)
+    assert len(updates) == 1 and _likes_count(mid) == 12
+
+
+def test_chat_likes_are_members_only_and_recount_repairs(monkeypatch, auth_headers):
+    init_db()
+    _quiet_flusher(monkeypatch)
+    client = TestClient(app)
+    owner, outsider = auth_headers(client, "chat-owner@example.com"), auth_headers(client, "chat-outsider@example.com")
+    gid = client.post("/groups", json={"name": "Private chat"}, headers=owner).json()["id"]
+    mid = client.post(f"/groups/{gid}/messages", json={"content": "hi"}, headers=owner).json()["id"]
+    assert client.post(f"/groups/{gid}/messages/{mid}/like", headers=outsider).status_code == 403
+    assert client.post(f"/groups/{gid + 1000}/messages/{mid}/like", headers=owner).status_code == 404
+    client.post(f"/groups/{gid}/messages/{mid}/like", headers=owner)
+
+    with Session(get_engine()) as session:
+        session.get(Message, mid).likes_count = 40  # drifted, e.g. deltas lost in a crash
+        session.commit()
+        likes.recount(session)
+    assert _likes_count(mid) == 1
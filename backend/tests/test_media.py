@@ -0,0 +1,73 @@
+import gzip
+import hashlib
+import io
+import os
+
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.db import init_db
+from app.main import app
+from app.media import IMMUTABLE, MediaFiles
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 8
+
+
+def test_blob_urls_are_immutable_with_conditional_and_range_requests(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "media@example.com")
+    gid = client.post("/groups", json={"name": "Media"}, headers=headers).json()["id"]
+    url = client.post(f"/groups/{gid}/proofs/upload", files={"file": ("p.png", io.BytesIO(PNG), "image/png")}, headers=headers).json()["image_url"]
+
+    r = client.get(url)
+    assert r.status_code == 200 and r.content == PNG
+    assert r.headers["cache-control"] == IMMUTABLE
+    assert r.headers["etag"] == f'"{hashlib.sha256(PNG).hexdigest()}"'
+    assert r.headers["accept-ranges"] == "bytes"
+
+    r304 = client.get(url, headers={"If-None-Match": r.headers["etag"]})
+    assert r304.status_code == 304 and r304.content == b""
+    assert r304.headers["etag"] == r.headers["etag"] and r304.headers["cache-control"] == IMMUTABLE
+
+    part = client.get(url, headers={"Range": "bytes=8-15"})
+    assert part.status_code == 206
+    assert part.content == PNG[8:16]
+    assert part.headers["content-range"] == f"bytes 8-15/{len(PNG)}"
+    assert client.get(url, headers={"Range": f"bytes={len(PNG) + 10}-"}).status_code == 416
+
+
+def test_legacy_files_precompressed_variants_and_hidden_files(tmp_path):
+    (tmp_path / "old.svg").write_bytes(b"<svg>" + b" " * 500 + b"</svg>")
+    (tmp_path / "old.svg.gz").write_bytes(gzip.compress((tmp_path / "old.svg").read_bytes()))
+    (tmp_path / ".upload-abc").write_bytes(b"partial")
+    (tmp_path / "x.thumb.webp.part").write_bytes(b"partial")
+    media = MediaFiles(directory=str(tmp_path), max_age=60, precompressed=True)
+    client = TestClient(Starlette(routes=[Mount("/uploads", media)]))
+
+    plain = client.get("/uploads/old.svg", headers={"Accept-Encoding": "identity"})
+    assert plain.headers["cache-control"] == "public, max-age=60"
+    assert "content-encoding" not in plain.headers and plain.headers["vary"] == "Accept-Encoding"
+
+    gz = client.get("/uploads/old.svg", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert gz.headers["content-encoding"] == "gzip"
+    assert gz.headers["content-type"].startswith("image/svg+xml")
+    assert gz.content == plain.content  # the client inflates it
+    assert gz.headers["etag"] != plain.headers["etag"]
+
+    assert client.get("/uploads/.upload-abc").status_code == 404
+    assert client.get("/uploads/x.thumb.webp.part").status_code == 404
+
+
+def test_accel_redirect_hands_the_body_to_the_proxy(tmp_path):
+    os.makedirs(tmp_path / "blobs" / "ab" / "cd")
+    name = "abcd" + "0" * 60 + ".png"
+    (tmp_path / "blobs" / "ab" / "cd" / name).write_bytes(PNG)
+    media = MediaFiles(directory=str(tmp_path), accel_redirect_prefix="/_media/")
+    client = TestClient(Starlette(routes=[Mount("/uploads", media)]))
+    r = client.get(f"/uploads/blobs/ab/cd/{name}")
+    assert r.content == b""
+    assert r.headers["x-accel-redirect"] == f"/_media/blobs/ab/cd/{name}"
+    assert r.headers["cache-control"] == IMMUTABLE
+    assert client.get(f"/uploads/blobs/ab/cd/{name}", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
@@ -0,0 +1,67 @@
+import sqlalchemy as sa
+
+from app import migrate
+
+
+def test_upgrade_creates_schema_and_records_version(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    migrate.upgrade(engine)
+    assert migrate.current_revision(engine) == migrate.head_revision()
+    tables = set(sa.inspect(engine).get_table_names())
+    assert {"user", "habit", "habitlog", "group", "groupmember", "message", "tool"} <= tables
+    # Second run is a no-op
+    migrate.upgrade(engine)
+    assert migrate.current_revision(engine) == migrate.head_revision()
+
+
+def test_upgrade_adopts_legacy_database_and_adds_missing_columns(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with engine.begin() as conn:
+        # Shape of an early create_all() database, before the dev ALTER helpers
+        conn.execute(sa.text(
+            "CREATE TABLE habit (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, title VARCHAR NOT NULL, "
+            "why VARCHAR, identity_goal VARCHAR, loop JSON, minimal_dose VARCHAR, "
+            "implementation_intentions VARCHAR, reminders JSON, created_at DATETIME NOT NULL)"
+        ))
+        conn.execute(sa.text("INSERT INTO habit (user_id, title, created_at) VALUES (1, 'Read', '2025-01-01')"))
+    migrate.upgrade(engine)
+    cols = {c["name"] for c in sa.inspect(engine).get_columns("habit")}
+    assert "is_public" in cols
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT is_public FROM habit")).scalar() in (1, True)
+
+
+def test_streak_backfill_counts_runs_in_history(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/streaks.db")
+    migrate.upgrade(engine, "0003")
+    with engine.begin() as conn:
+        for day, completed in (("2025-03-01", 1), ("2025-03-02", 1), ("2025-03-03", 1), ("2025-03-05", 1), ("2025-03-06", 0)):
+            conn.execute(
+                sa.text("INSERT INTO habitlog (habit_id, day, completed, created_at) VALUES (1, :d, :c, '2025-03-06')"),
+                {"d": day, "c": completed},
+            )
+    migrate.upgrade(engine, "0004")
+    with engine.connect() as conn:
+        row = conn.execute(sa.text("SELECT current, longest, last_completed FROM habitstreak WHERE habit_id = 1")).one()
+    assert tuple(row) == (1, 3, "2025-03-05")
+
+
+def test_existing_messages_take_a_reference_on_their_blob(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/message_refs.db")
+    migrate.upgrade(engine, "0016")
+    sha = "ab" * 32
+    url = f"/uploads/blobs/ab/ab/{sha}.png"
+    with engine.begin() as conn:
+        conn.execute(sa.text(
+            "INSERT INTO blob (sha256, content_type, size, ref_count, derivative_state, created_at) "
+            "VALUES (:sha, 'image/png', 10, 1, 'ready', '2025-03-01')"
+        ), {"sha": sha})
+        for image_url in (url, url, "https://example.com/elsewhere.png", None):
+            conn.execute(sa.text(
+                "INSERT INTO message (group_id, user_id, content, type, image_url, likes_count, created_at) "
+                "VALUES (1, 1, 'x', 'chat', :url, 0, '2025-03-01')"
+            ), {"url": image_url})
+    migrate.upgrade(engine)
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT ref_count FROM blob")).scalar() == 3
+        assert conn.execute(sa.text("SELECT COUNT(*) FROM message WHERE blob_sha256 = :sha"), {"sha": sha}).scalar() == 2
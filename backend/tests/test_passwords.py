@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import passwords
+from app.config import get_settings
+from app.db import get_engine, init_db
+from app.main import app
+from app.models.user import User
+
+
+def test_pool_hash_and_verify_round_trip():
+    h = passwords.hash_password("hunter22")
+    assert h.startswith(f"$2b$0{get_settings().bcrypt_rounds}$")
+    assert passwords.verify_password("hunter22", h)
+    assert asyncio.run(passwords.verify_password_async("hunter22", h))
+    assert not asyncio.run(passwords.verify_password_async("wrong", h))
+
+
+def test_login_rehashes_when_the_cost_changes(monkeypatch):
+    init_db()
+    client = TestClient(app)
+    client.post("/auth/register", json={"email": "rehash@example.com", "password": "secret123"})
+    monkeypatch.setattr(get_settings(), "bcrypt_rounds", 5)
+
+    assert client.post("/auth/login", json={"email": "rehash@example.com", "password": "secret123"}).status_code == 200
+    with Session(get_engine()) as session:
+        stored = session.exec(select(User).where(User.email == "rehash@example.com")).one().password_hash
+    assert stored.startswith("$2b$05$") and not passwords.needs_rehash(stored)
+    assert client.post("/auth/login", json={"email": "rehash@example.com", "password": "secret123"}).status_code == 200
+    assert client.post("/auth/login", json={"email": "rehash@example.com", "password": "nope"}).status_code == 401
+
+
+def test_full_queue_answers_503(monkeypatch):
+    init_db()
+    client = TestClient(app)
+    client.post("/auth/register", json={"email": "busy@example.com", "password": "secret123"})
+    passwords._pool()
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(1))
+    passwords._slots.acquire()
+    r = client.post("/auth/login", json={"email": "busy@example.com", "password": "secret123"})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.db import init_db
+from app.main import app
+from app.pubsub import InProcessBroker, RedisBroker, get_broker, set_broker
+
+
+def test_slow_consumer_drops_oldest_and_gets_lagged_notice():
+    async def run():
+        broker = InProcessBroker(queue_size=2)
+        async with broker.subscribe("group:1") as sub:
+            for i in range(5):
+                broker.publish("group:1", {"event": "message", "n": i})
+            assert await sub.get(timeout=1) == {"event": "lagged", "dropped": 3}
+            assert [(await sub.get(timeout=1))["n"] for _ in range(2)] == [3, 4]
+            assert await sub.get(timeout=0.01) is None
+
+    asyncio.run(run())
+
+
+def test_publish_from_worker_thread_reaches_subscriber():
+    async def run():
+        broker = InProcessBroker()
+        async with broker.subscribe("group:2") as sub:
+            t = threading.Thread(target=broker.publish, args=("group:2", {"event": "message"}))
+            t.start(); t.join()
+            assert await sub.get(timeout=1) == {"event": "message"}
+
+    asyncio.run(run())
+
+
+def test_redis_broker_fans_out_between_instances():
+    server = fakeredis.FakeServer()
+
+    def factory(async_=False):
+        if async_:
+            return fakeredis.aioredis.FakeRedis(server=server)
+        return fakeredis.FakeRedis(server=server)
+
+    async def run():
+        worker_a, worker_b = RedisBroker(factory), RedisBroker(factory)
+        async with worker_b.subscribe("group:3") as sub:
+            await asyncio.to_thread(worker_a.publish, "group:3", {"event": "proof", "data": {"id": 9}})
+            assert await sub.get(timeout=2) == {"event": "proof", "data": {"id": 9}}
+        await worker_a.close()
+        await worker_b.close()
+
+    asyncio.run(run())
+
+
+def test_redis_reader_recovers_from_a_failed_read():
+    server = fakeredis.FakeServer()
+
+    def factory(async_=False):
+        if async_:
+            return fakeredis.aioredis.FakeRedis(server=server)
+        return fakeredis.FakeRedis(server=server)
+
+    async def run():
+        publisher, worker = RedisBroker(factory), RedisBroker(factory)
+        async with worker.subscribe("group:4") as sub:
+            broken = worker._pubsub
+            failed = asyncio.Event()
+
+            async def get_message(**kwargs):
+                failed.set()
+                raise ConnectionError("connection reset")
+
+            broken.get_message = get_message
+            await asyncio.wait_for(failed.wait(), 2)
+            # the reader swaps in a fresh subscription after its backoff
+            for _ in range(50):
+                if worker._pubsub not in (None, broken):
+                    break
+                await asyncio.sleep(0.05)
+            await asyncio.to_thread(publisher.publish, "group:4", {"event": "message", "n": 1})
+            assert await sub.get(timeout=3) == {"event": "message", "n": 1}
+        await publisher.close()
+        await worker.close()
+
+    asyncio.run(run())
+
+
+def test_redis_reader_stops_with_the_last_channel_and_restarts():
+    server = fakeredis.FakeServer()
+
+    def factory(async_=False):
+        if async_:
+            return fakeredis.aioredis.FakeRedis(server=server)
+        return fakeredis.FakeRedis(server=server)
+
+    async def run():
+        publisher, worker = RedisBroker(factory), RedisBroker(factory)
+        async with worker.subscribe("group:5"):
+            reader = worker._reader
+        await asyncio.wait_for(reader, 3)
+        async with worker.subscribe("group:5") as sub:
+            assert not worker._reader.done()
+            await asyncio.to_thread(publisher.publish, "group:5", {"event": "message"})
+            assert await sub.get(timeout=2) == {"event": "message"}
+        await publisher.close()
+        await worker.close()
+
+    asyncio.run(run())
+
+
+def test_redis_outage_fails_neither_writes_nor_leaves_subscribers_behind():
+    class Down:
+        def publish(self, *args):
+            raise ConnectionError("redis is down")
+
+        def pubsub(self, **kwargs):
+            return self
+
+        async def subscribe(self, *channels):
+            raise ConnectionError("redis is down")
+
+    broker = RedisBroker(lambda async_=False: Down())
+
+    async def run():
+        with pytest.raises(ConnectionError):
+            async with broker.subscribe("group:6"):
+                pass
+        assert not broker._subs and broker._reader is None
+
+    asyncio.run(run())
+    broker.publish("group:6", {"event": "message"})  # logged and dropped
+
+    init_db()
+    set_broker(broker)
+    try:
+        client = TestClient(app)
+        token = client.post("/auth/register", json={"email": "live-outage@example.com", "password": "secret123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        gid = client.post("/groups", json={"name": "Outage"}, headers=headers).json()["id"]
+        r = client.post(f"/groups/{gid}/messages", json={"content": "still saved"}, headers=headers)
+        assert r.status_code == 201
+        assert client.post(f"/groups/{gid}/proofs", json={"image_url": "https://example.com/p.png"}, headers=headers).status_code == 201
+    finally:
+        set_broker(None)
+
+
+def test_group_socket_receives_posted_messages():
+    init_db()
+    set_broker(None)
+    client = TestClient(app)
+    token = client.post("/auth/register", json={"email": "live@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    gid = client.post("/groups", json={"name": "Live"}, headers=headers).json()["id"]
+
+    with client.websocket_connect(f"/groups/{gid}/ws?token={token}") as ws:
+        client.post(f"/groups/{gid}/messages", json={"content": "hello", "type": "learning"}, headers=headers)
+        event = ws.receive_json()
+    assert event["event"] == "message"
+    assert event["data"]["content"] == "hello"
+    assert isinstance(get_broker(), InProcessBroker)
+
+
+def test_live_streams_refuse_non_members():
+    init_db()
+    set_broker(None)
+    client = TestClient(app)
+    owner = client.post("/auth/register", json={"email": "live-owner@example.com", "password": "secret123"}).json()["access_token"]
+    outsider = client.post("/auth/register", json={"email": "live-outsider@example.com", "password": "secret123"}).json()["access_token"]
+    gid = client.post("/groups", json={"name": "Private", "is_public": False}, headers={"Authorization": f"Bearer {owner}"}).json()["id"]
+
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(f"/groups/{gid}/ws?token={outsider}") as ws:
+            ws.receive_json()
+    assert refused.value.code == 4403
+    assert client.get(f"/groups/{gid}/events", params={"token": outsider}).status_code == 403
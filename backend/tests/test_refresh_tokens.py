@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import refresh_tokens
+from app.db import get_async_engine, get_engine, init_db
+from app.main import app
+from app.models.user import RefreshToken
+
+
+def _register(client, email):
+    r = client.post("/auth/register", json={"email": email, "password": "secret123"})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_login_returns_refresh_token_stored_only_as_hash():
+    init_db()
+    client = TestClient(app)
+    body = _register(client, "rt_hash@example.com")
+    assert body["refresh_token"] and body["expires_in"] == 30 * 60
+    with Session(get_engine()) as session:
+        row = session.exec(
+            select(RefreshToken).where(RefreshToken.token_hash == refresh_tokens.digest(body["refresh_token"]))
+        ).one()
+        assert row.revoked_at is None
+        assert session.exec(select(RefreshToken).where(RefreshToken.token_hash == body["refresh_token"])).first() is None
+
+
+def test_refresh_rotates_and_skips_bcrypt():
+    init_db()
+    client = TestClient(app)
+    first = _register(client, "rt_rotate@example.com")
+    seen = []
+    listener = lambda *a: seen.append(a[2])  # noqa: E731
+    engine = get_async_engine().sync_engine
+    sa.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", listener)
+    assert r.status_code == 200
+    second = r.json()
+    assert second["refresh_token"] != first["refresh_token"]
+    assert seen and not any("password_hash" in s for s in seen)
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {second['access_token']}"})
+    assert me.status_code == 200 and me.json()["email"] == "rt_rotate@example.com"
+
+
+def test_reusing_a_spent_token_revokes_the_family():
+    init_db()
+    client = TestClient(app)
+    first = _register(client, "rt_reuse@example.com")
+    second = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).json()
+    replay = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert replay.status_code == 401 and "reused" in replay.json()["detail"]
+    # the legitimate holder is signed out too
+    assert client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+
+
+def test_expired_and_unknown_tokens_are_rejected():
+    init_db()
+    client = TestClient(app)
+    body = _register(client, "rt_expired@example.com")
+    with Session(get_engine()) as session:
+        session.exec(
+            sa.update(RefreshToken)
+            .where(RefreshToken.token_hash == refresh_tokens.digest(body["refresh_token"]))
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        session.commit()
+    r = client.post("/auth/refresh", json={"refresh_token": body["refresh_token"]})
+    assert r.status_code == 401 and "expired" in r.json()["detail"]
+    assert client.post("/auth/refresh", json={"refresh_token": "nope"}).status_code == 401
+
+
+def test_logout_and_revoke_all_sessions():
+    init_db()
+    client = TestClient(app)
+    a = _register(client, "rt_logout@example.com")
+    b = client.post("/auth/login", json={"email": "rt_logout@example.com", "password": "secret123"}).json()
+    assert client.post("/auth/logout", json={"refresh_token": a["refresh_token"]}).status_code == 204
+    assert client.post("/auth/refresh", json={"refresh_token": a["refresh_token"]}).status_code == 401
+    # other device still works until everything is revoked
+    b = client.post("/auth/refresh", json={"refresh_token": b["refresh_token"]}).json()
+    r = client.delete("/auth/sessions", headers={"Authorization": f"Bearer {b['access_token']}"})
+    assert r.status_code == 204
+    assert client.post("/auth/refresh", json={"refresh_token": b["refresh_token"]}).status_code == 401
@@ -0,0 +1,91 @@
+from datetime import date, datetime, timedelta
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import migrate, rollups
+from app.db import get_async_engine, init_db
+from app.main import app
+from app.models.habit import Habit, UserWeekRollup
+
+MONDAY = date(2025, 3, 10)
+
+
+def test_incremental_rollups_match_rebuild(engine, toggle):
+    with Session(engine) as session:
+        old = datetime(2025, 1, 1)
+        session.add_all([Habit(id=1, user_id=7, title="a", created_at=old), Habit(id=2, user_id=7, title="b", created_at=old)])
+        session.commit()
+        for d in range(3):
+            toggle(session, 1, MONDAY + timedelta(days=d), user_id=7).week
+        stats = toggle(session, 2, MONDAY + timedelta(days=6), user_id=7).week
+        assert (stats.week_start, stats.completions, stats.best_habit_id, stats.best_completions) == (MONDAY, 4, 1, 3)
+        assert stats.completion_rate == round(4 / 14, 4)
+        toggle(session, 2, MONDAY + timedelta(days=8), user_id=7)  # next week
+        for d in range(2):
+            stats = toggle(session, 1, MONDAY + timedelta(days=d), user_id=7).week  # un-complete
+        assert (stats.completions, stats.best_habit_id) == (2, 1)
+        stats = toggle(session, 1, MONDAY + timedelta(days=2), user_id=7).week
+        assert (stats.completions, stats.best_habit_id) == (1, 2)
+
+        incremental = rollups.trend(session, 7, MONDAY - timedelta(weeks=1), MONDAY + timedelta(weeks=1))
+        assert [w.completions for w in incremental] == [0, 1, 1]
+        assert rollups.rebuild(session) == 2
+        assert rollups.trend(session, 7, MONDAY - timedelta(weeks=1), MONDAY + timedelta(weeks=1)) == incremental
+
+
+def test_summary_is_one_point_read_and_trend_fills_gaps(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "rollup@example.com")
+    a = client.post("/habits", json={"title": "Read"}, headers=headers).json()["id"]
+    b = client.post("/habits", json={"title": "Run"}, headers=headers).json()["id"]
+    monday = rollups.week_start(date.today())
+    for hid, day in ((a, monday), (b, monday), (b, monday + timedelta(days=1)), (a, monday - timedelta(weeks=2))):
+        client.post(f"/habits/{hid}/toggle/{day.isoformat()}", headers=headers)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    engine = get_async_engine().sync_engine
+    sa.event.listen(engine, "before_cursor_execute", listener)
+    try:
+        body = client.get("/summary", headers=headers).json()
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", listener)
+    assert body["week_start"] == monday.isoformat()
+    assert body["total_completions"] == 3
+    assert body["completion_rate"] == round(3 / 14, 4)
+    assert body["best_habit"] == {"id": b, "title": "Run", "completions": 2}
+    assert not any("habitlog" in s.lower() for s in statements)
+    assert sum("userweekrollup" in s.lower() for s in statements) == 1
+
+    weeks = client.get("/summary/trend", params={"weeks": 3}, headers=headers).json()
+    assert [w["week_start"] for w in weeks] == [(monday - timedelta(weeks=n)).isoformat() for n in (2, 1, 0)]
+    assert [w["completions"] for w in weeks] == [1, 0, 3]
+
+
+def test_new_habits_count_in_the_completion_rate_without_a_toggle(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "rollup-denominator@example.com")
+    a = client.post("/habits", json={"title": "Read"}, headers=headers).json()["id"]
+    client.post(f"/habits/{a}/toggle/{date.today().isoformat()}", headers=headers)
+    assert client.get("/summary", headers=headers).json()["completion_rate"] == round(1 / 7, 4)
+
+    client.post("/habits", json={"title": "Run"}, headers=headers)
+    client.post(f"/habits/public/{a}/clone", headers=headers)
+    assert client.get("/summary", headers=headers).json()["completion_rate"] == round(1 / 21, 4)
+
+
+def test_migration_backfills_existing_history(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path}/m.db")
+    migrate.upgrade(engine, "0011")
+    with engine.begin() as conn:
+        conn.execute(sa.text("INSERT INTO habit (id, user_id, title, is_public, created_at) VALUES (1, 5, 'x', 1, '2025-01-01 00:00:00')"))
+        for d in (MONDAY, MONDAY + timedelta(days=1)):
+            conn.execute(sa.text("INSERT INTO habitlog (habit_id, day, completed, created_at) VALUES (1, :d, 1, '2025-03-10 00:00:00')"), {"d": d})
+    migrate.upgrade(engine)
+    with Session(engine) as session:
+        row = session.get(UserWeekRollup, (5, MONDAY))
+        assert (row.completions, row.habit_count, row.best_habit_id) == (2, 1, 1)
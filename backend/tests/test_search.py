@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.db import init_db
+from app.main import app
+from app.models.habit import Habit
+from app.search import fts5_query, query_terms, ranked_ids, tsquery
+
+
+def test_query_building_quotes_every_term():
+    terms = query_terms('medit" OR title:x NEAR(a b) *')
+    assert fts5_query(terms) == '"medit" "or" "title" "x" "near" "a" "b"*'
+    assert tsquery(["morning", "run"]) == "morning & run:*"
+    assert query_terms("  ") == []
+
+
+def test_triggers_keep_index_in_sync_and_rank_title_first(engine):
+    with Session(engine) as session:
+        why = Habit(user_id=1, title="Evening walk", why="helps me meditate")
+        title = Habit(user_id=1, title="Meditate daily")
+        private = Habit(user_id=2, title="Meditation", is_public=False)
+        session.add_all([why, title, private])
+        session.commit()
+        assert ranked_ids(session, "habit", "meditation", where=[Habit.is_public == True]) == [title.id, why.id]  # noqa: E712
+        assert ranked_ids(session, "habit", "meditating") == ranked_ids(session, "habit", "meditate")  # porter stems
+
+        title.title = "Read daily"
+        session.add(title)
+        session.delete(why)
+        session.commit()
+        assert ranked_ids(session, "habit", "meditate", where=[Habit.is_public == True]) == []  # noqa: E712
+        assert ranked_ids(session, "habit", "read") == [title.id]
+        assert ranked_ids(session, "habit", "daily", limit=1, offset=1) == []
+
+
+def test_search_endpoints(auth_headers):
+    init_db()
+    client = TestClient(app)
+    alice = auth_headers(client, "search-alice@example.com")
+    bob = auth_headers(client, "search-bob@example.com")
+    client.put("/users/me", json={"display_name": "Alice Marathoner", "description": "runs every morning"}, headers=alice)
+
+    client.post("/habits", json={"title": "Zettelkasten notes", "why": "remember what I read"}, headers=alice)
+    r = client.get("/habits/public/discover", params={"search": "zettel"}, headers=bob)
+    assert [h["title"] for h in r.json()] == ["Zettelkasten notes"]
+
+    assert [u["display_name"] for u in client.get("/users", params={"search": "marathon"}, headers=bob).json()] == ["Alice Marathoner"]
+    assert [u["email"] for u in client.get("/users", params={"search": "search-bob@example.com"}, headers=alice).json()] == ["search-bob@example.com"]
+
+    gid = client.post("/groups", json={"name": "Quokka readers", "description": "weekly chapters"}, headers=alice).json()["id"]
+    r = client.get("/groups", params={"search": "quokka chapter"}, headers=bob)
+    assert [g["id"] for g in r.json()] == [gid]
+
+    other = client.post("/groups", json={"name": "Other"}, headers=bob).json()["id"]
+    client.post(f"/groups/{other}/messages", json={"content": "tapioca pudding recipe"}, headers=bob)
+    for text in ("tapioca tea anyone?", "no tapioca today", "see you monday"):
+        client.post(f"/groups/{gid}/messages", json={"content": text}, headers=alice)
+    r = client.get(f"/groups/{gid}/messages/search", params={"q": "tapioca", "limit": 1}, headers=alice)
+    assert r.status_code == 200 and len(r.json()) == 1 and r.headers["x-next-offset"] == "1"
+    r = client.get(f"/groups/{gid}/messages/search", params={"q": "tapioca", "limit": 5}, headers=alice)
+    assert sorted(m["content"] for m in r.json()) == ["no tapioca today", "tapioca tea anyone?"]
+    assert client.get(f"/groups/{gid}/messages/search", params={"q": "tapioca"}, headers=bob).status_code == 403
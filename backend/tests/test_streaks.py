@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from app.models.habit import HabitLog, HabitStreak
+from app.streaks import compute_streaks, rebuild_streak_state, stored_streaks, streaks_for_habits
+
+TODAY = date(2025, 3, 10)
+
+
+def _days(*offsets):
+    return [TODAY - timedelta(days=o) for o in offsets]
+
+
+def test_compute_streaks_current_and_longest():
+    stats = compute_streaks(_days(0, 1, 2, 5, 6, 7, 8), TODAY)
+    assert stats.current == 3
+    assert stats.longest == 4
+    assert stats.last_completed == TODAY
+
+
+def test_current_streak_ends_at_last_completed_day():
+    stats = compute_streaks(_days(3, 4), TODAY)
+    assert stats.current == 2
+    assert stats.last_completed == TODAY - timedelta(days=3)
+
+
+def test_future_days_are_ignored_and_empty_is_zero():
+    assert compute_streaks([TODAY + timedelta(days=1)], TODAY).current == 0
+    assert compute_streaks([], TODAY).longest == 0
+
+
+def test_streaks_for_habits_uses_one_query(engine):
+    with Session(engine) as session:
+        for d in _days(0, 1, 2):
+            session.add(HabitLog(habit_id=1, day=d, completed=True))
+        session.add(HabitLog(habit_id=1, day=TODAY - timedelta(days=3), completed=False))
+        session.add(HabitLog(habit_id=2, day=TODAY - timedelta(days=1), completed=True))
+        session.commit()
+
+        statements = []
+        sa.event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+        stats = streaks_for_habits(session, [1, 2, 3], TODAY)
+        assert len(statements) == 1
+    assert stats[1].current == 3
+    assert stats[2].current == 1
+    assert stats[3].current == 0
+
+
+def test_apply_toggle_matches_recompute_for_backdated_splits_and_joins(engine, toggle):
+    # forward extends and tip trims (fast paths) mixed with backdated splits and joins
+    sequence = [10, 9, 8, 6, 5, 5, 4, 3, 3, 2, 0, 1, 7, 7, 0, 0, 4, 12, 11]
+    with Session(engine) as session:
+        for offset in sequence:
+            stats = toggle(session, 1, TODAY - timedelta(days=offset)).streak
+            assert stats == streaks_for_habits(session, [1], date.max)[1]
+        assert stored_streaks(session, [1], TODAY)[1] == streaks_for_habits(session, [1], TODAY)[1]
+
+
+def test_stored_streaks_treat_missing_rows_as_empty(engine):
+    with Session(engine) as session:
+        assert stored_streaks(session, [42], TODAY)[42].current == 0
+
+
+def test_rebuild_streak_state_repairs_rows(engine):
+    with Session(engine) as session:
+        for d in _days(0, 1, 2, 7, 8, 9, 10):
+            session.add(HabitLog(habit_id=5, day=d, completed=True))
+        session.add(HabitStreak(habit_id=5, current=99, longest=99, last_completed=TODAY))
+        session.commit()
+        assert rebuild_streak_state(session) == 1
+        row = session.get(HabitStreak, 5)
+        assert (row.current, row.longest) == (3, 4)
@@ -0,0 +1,50 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from app.db import init_db
+from app.main import app
+from app.routers.toolbox import Tool
+from app.tool_index import ToolIndex, stem, tokenize
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("Planning the plans I planned") == ["plan", "plan", "plan"]
+    assert stem("cues") == stem("cue") and stem("motivation") == stem("motivated")
+    assert stem("strategies") == stem("strategy")
+    assert tokenize("Time-blocking, 25 minutes!") == ["tim", "block", "25", "minut"]
+
+
+def test_early_terminating_search_matches_exhaustive_scoring():
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(60)] + ["focus"] * 20
+    index = ToolIndex()
+    for i in range(1, 801):
+        words = rng.choices(vocab, k=rng.randint(3, 25))
+        index.add(Tool(id=i, title=" ".join(words[:3]), keywords=words[3:5], steps=[" ".join(words[5:])], description=""))
+    for query in ("focus w1", "w3 w7 w11", "w5 focus w59 w2"):
+        got = index.search(query, k=5)
+        terms = list(dict.fromkeys(tokenize(query)))
+        exhaustive = sorted(
+            (sum(index._term_impacts(t)[1].get(d, 0.0) for t in terms) for d in index._doc_len),
+            reverse=True,
+        )[:5]
+        assert [round(s, 9) for _, s in got] == [round(s, 9) for s in exhaustive]
+
+
+def test_suggest_ranks_with_bm25_and_sees_new_tools(auth_headers):
+    init_db()
+    client = TestClient(app)
+    client.post("/tools/dev_seed")
+
+    r = client.post("/ai/suggest", json={"query": "I keep procrastinating and can't focus"})
+    assert r.status_code == 200
+    assert r.json()[0]["title"] == "Pomodoro Technique"
+    assert "server-timing" in r.headers
+    assert len(client.post("/ai/suggest", json={"query": "planning", "k": 2}).json()) == 2
+    assert client.post("/ai/suggest", json={"query": "the and of"}).json() == []
+
+    headers = auth_headers(client, "tools@example.com")
+    client.post("/tools", json={"title": "Hydration tracker", "description": "Drink water through the day", "keywords": ["water"]}, headers=headers)
+    top = client.post("/ai/suggest", json={"query": "drinking more water"}).json()
+    assert top[0]["title"] == "Hydration tracker"
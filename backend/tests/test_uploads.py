@@ -0,0 +1,64 @@
+import io
+import os
+
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.db import init_db
+from app.main import app
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+
+
+def _group(client, headers):
+    return client.post("/groups", json={"name": "Proofs"}, headers=headers).json()["id"]
+
+
+def _files():
+    return set(os.listdir(get_settings().upload_dir))
+
+
+def _upload(client, gid, headers, data, name="photo.png"):
+    return client.post(f"/groups/{gid}/proofs/upload", files={"file": (name, io.BytesIO(data), "image/png")}, headers=headers)
+
+
+def test_upload_streams_image_to_disk(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "upload-ok@example.com")
+    gid = _group(client, headers)
+    r = _upload(client, gid, headers, PNG, name="my photo.jpeg")
+    assert r.status_code == 201, r.text
+    url = r.json()["image_url"]
+    assert url.endswith(".png")
+    with open(os.path.join(get_settings().upload_dir, *url[len("/uploads/"):].split("/")), "rb") as f:
+        assert f.read() == PNG
+
+
+def test_rejected_uploads_leave_no_files(monkeypatch, auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "upload-reject@example.com")
+    outsider = auth_headers(client, "upload-outsider@example.com")
+    gid = _group(client, headers)
+    before = _files()
+
+    assert _upload(client, gid, outsider, PNG).status_code == 403
+    assert _upload(client, gid, headers, b"not an image").status_code == 415
+    monkeypatch.setattr(get_settings(), "proof_max_bytes", 100)
+    assert _upload(client, gid, headers, PNG).status_code == 413
+    assert _files() == before
+
+
+def test_quota_is_checked_before_writing(auth_headers):
+    init_db()
+    client = TestClient(app)
+    owner = auth_headers(client, "upload-quota-owner@example.com")
+    member = auth_headers(client, "upload-quota@example.com")
+    gid = _group(client, owner)
+    client.post(f"/groups/{gid}/join", json={"frequency_per_week": 1}, headers=member)
+    assert _upload(client, gid, member, PNG, name="first.png").status_code == 201
+    before = _files()
+    r = _upload(client, gid, member, PNG, name="second.png")
+    assert r.status_code == 400
+    assert _files() == before
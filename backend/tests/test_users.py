@@ -0,0 +1,34 @@
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from app.db import get_engine, init_db
+from app.main import app
+
+
+def test_user_directory_counts_with_constant_queries(auth_headers):
+    init_db()
+    client = TestClient(app)
+    headers = auth_headers(client, "dir-a@example.com")
+    client.post("/habits", json={"title": "One"}, headers=headers)
+    client.post("/habits", json={"title": "Two"}, headers=headers)
+    client.post("/groups", json={"name": "Dir"}, headers=headers)
+    for i in range(4):
+        auth_headers(client, f"dir-extra{i}@example.com")
+
+    statements = []
+    listener = lambda *a: statements.append(a[2])  # noqa: E731
+    sa.event.listen(get_engine(), "before_cursor_execute", listener)
+    try:
+        small = client.get("/users", params={"limit": 2}, headers=headers)
+        n_small = len(statements)
+        statements.clear()
+        big = client.get("/users", params={"limit": 50}, headers=headers)
+        n_big = len(statements)
+    finally:
+        sa.event.remove(get_engine(), "before_cursor_execute", listener)
+    assert small.status_code == big.status_code == 200
+    assert n_small == n_big
+
+    me = next(u for u in big.json() if u["email"] == "dir-a@example.com")
+    assert (me["habits_count"], me["groups_count"]) == (2, 1)
+    assert client.get(f"/users/{me['id']}", headers=headers).json()["habits_count"] == 2
@@ -1,13 +1,14 @@
 "use client"
 import Link from 'next/link'
 import { useEffect, useState } from 'react'
+import { apiBaseFromWindow, signOut } from './lib/auth'
 
 export default function AuthButtonClient(){
   const [token,setToken] = useState<string | null>(null)
   useEffect(()=>{ try{ setToken(localStorage.getItem('habitlink_token')) }catch{} },[])
-  function logout(){
+  async function logout(){
     try{
-      localStorage.removeItem('habitlink_token')
+      await signOut(apiBaseFromWindow())
       localStorage.setItem('habitlink_disable_auto_login','1')
     }catch{}
     if(typeof window!=='undefined') window.location.href = '/'
@@ -1,4 +1,4 @@
-import { ensureToken } from './lib/auth'
+import { clearTokens, ensureToken, refreshAccessToken } from './lib/auth'
 
 export const API_BASE = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8050'
 
@@ -10,11 +10,12 @@ export async function api(path: string, opts: RequestInit = {}) {
     headers: { 'Content-Type': 'application/json', Authorization: token ? `Bearer ${token}` : '', ...(opts.headers || {}) },
   })
   if (res.status === 401 && typeof window !== 'undefined') {
-    // clear and retry once
-    try { localStorage.removeItem('habitlink_token') } catch {}
+    // access token expired: rotate the refresh token, else clear and re-acquire; retry once
+    token = await refreshAccessToken(API_BASE)
+    if (!token) try { clearTokens() } catch {}
     // If user explicitly logged out, respect it
-    if (!localStorage.getItem('habitlink_disable_auto_login')) {
-      token = await ensureToken(API_BASE)
+    if (token || !localStorage.getItem('habitlink_disable_auto_login')) {
+      token = token || await ensureToken(API_BASE)
       res = await fetch(`${API_BASE}${path}`, {
         ...opts,
         headers: { 'Content-Type': 'application/json', Authorization: token ? `Bearer ${token}` : '', ...(opts.headers || {}) },
@@ -1,6 +1,6 @@
 "use client"
 import { useEffect, useState } from 'react'
-import { apiBaseFromWindow } from '../lib/auth'
+import { apiBaseFromWindow, signOut, storeTokens } from '../lib/auth'
 
 export default function AuthPage(){
   const [email,setEmail] = useState('')
@@ -17,7 +17,7 @@ export default function AuthPage(){
     const ok = res.ok
     const data = ok? await res.json(): null
     if(ok){
-      try{ localStorage.setItem('habitlink_token', data.access_token); localStorage.removeItem('habitlink_disable_auto_login') }catch{}
+      try{ storeTokens(data); localStorage.removeItem('habitlink_disable_auto_login') }catch{}
       setMsg(mode==='login'? 'Logged in. You can close this tab.':'Registered and logged in.')
       window.location.href = '/profile'
     }else{
@@ -27,8 +27,8 @@ export default function AuthPage(){
 
   useEffect(()=>{ try{ localStorage.setItem('habitlink_disable_auto_login','1') } catch{} },[])
 
-  function logout(){
-    try{ localStorage.removeItem('habitlink_token'); localStorage.setItem('habitlink_disable_auto_login','1') }catch{}
+  async function logout(){
+    try{ await signOut(apiBaseFromWindow()); localStorage.setItem('habitlink_disable_auto_login','1') }catch{}
     setMsg('Logged out.')
   }
 
@@ -5,8 +5,8 @@ import { Button } from '@/components/ui/Button'
 import { Card } from '@/components/ui/Card'
 import { ensureToken } from '@/app/lib/auth'
 
-interface ProofItem { user_id: number; day: string; image_url: string; caption?: string }
-interface MessageItem { id: number; user_id: number; content: string; type: string; created_at: string }
+interface ProofItem { user_id: number; day: string; image_url: string; thumb_url?: string; medium_url?: string; caption?: string }
+interface MessageItem { id: number; user_id: number; content: string; type: string; image_url?: string|null; medium_url?: string|null; created_at: string }
 interface GroupDetail { id: number; name: string; description?: string | null; members: { user_id: number; role: string; habit_title?: string|null; frequency_per_week?: number }[] }
 
 function useToast(){
@@ -148,7 +148,7 @@ export default function GroupClient({ groupId }: { groupId: number }) {
                               >
                                 {arr[i] ? (
                                   <div className="flex flex-col items-center">
-                                    <img src={arr[i].image_url} alt={arr[i].caption||'proof'} className="max-h-12 rounded cursor-zoom-in" />
+                                    <img src={arr[i].thumb_url||arr[i].image_url} alt={arr[i].caption||'proof'} className="max-h-12 rounded cursor-zoom-in" />
                                     {arr[i].caption? <div className="text-[10px] text-neutral-500 mt-1 line-clamp-1" title={arr[i].caption}>{arr[i].caption}</div>: null}
                                   </div>
                                 ) : <span className="text-neutral-300 text-3xl">?</span>}
@@ -175,7 +175,7 @@ export default function GroupClient({ groupId }: { groupId: number }) {
                               <div className={`text-[11px] mb-1 ${m.user_id===me?.id ? 'text-white/80' : 'text-neutral-600'}`}>{userMap[m.user_id]?.display_name || userMap[m.user_id]?.email || `User ${m.user_id}`}</div>
                               {m.image_url ? (
                                 <div className="mb-1">
-                                  <img src={m.image_url} alt="attachment" className="max-h-40 rounded cursor-zoom-in" onClick={()=>setLightbox({open:true,img:m.image_url, caption:m.content, userId:m.user_id})} />
+                                  <img src={m.medium_url||m.image_url} alt="attachment" className="max-h-40 rounded cursor-zoom-in" onClick={()=>setLightbox({open:true,img:m.image_url, caption:m.content, userId:m.user_id})} />
                                 </div>
                               ) : null}
                               {m.content}
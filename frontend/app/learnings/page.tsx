@@ -5,6 +5,12 @@ import { api } from '../api'
 export default function LearningsPage() {
   const [items,setItems] = useState<any[]>([])
   useEffect(()=>{ (async()=>{ try{ setItems(await api('/learnings')) }catch{} })() },[])
+  async function like(m:any){
+    try{
+      const r = await api(`/groups/${m.group_id}/messages/${m.id}/like`, { method: 'POST' })
+      setItems(items.map(x => x.id===m.id ? { ...x, likes_count: r.likes_count } : x))
+    }catch{}
+  }
   return (
     <div className="space-y-6">
       <div className="rounded-2xl overflow-hidden border bg-[rgb(var(--card))]">
@@ -16,6 +22,7 @@ export default function LearningsPage() {
           {items.map((m:any)=> (
             <li key={m.id} className="rounded-xl border p-3 bg-white">
               <div className="text-sm text-neutral-800">{m.content}</div>
+              <button onClick={()=>like(m)} className="mt-1 text-xs text-neutral-500 hover:text-neutral-800">♥ {m.likes_count}</button>
             </li>
           ))}
         </ul>
@@ -31,11 +31,59 @@ export async function ensureToken(apiBase: string): Promise<string> {
   }
   if (!res.ok) throw new Error('Unable to acquire token')
   const data = await res.json()
-  const token = data.access_token as string
-  localStorage.setItem(storageKey, token)
+  storeTokens(data)
   // clear the disable flag if present
   try { localStorage.removeItem(disableKey) } catch {}
-  return token
+  return data.access_token as string
+}
+
+const refreshKey = 'habitlink_refresh'
+
+export function storeTokens(data: { access_token: string; refresh_token?: string }) {
+  localStorage.setItem('habitlink_token', data.access_token)
+  if (data.refresh_token) localStorage.setItem(refreshKey, data.refresh_token)
+}
+
+export function clearTokens() {
+  localStorage.removeItem('habitlink_token')
+  localStorage.removeItem(refreshKey)
+}
+
+// Refresh tokens are single-use and replaying one revokes the whole session,
+// so concurrent 401s must share a single /auth/refresh call.
+let refreshing: Promise<string> | null = null
+
+export function refreshAccessToken(apiBase: string): Promise<string> {
+  if (!refreshing) {
+    refreshing = (async () => {
+      const refresh_token = localStorage.getItem(refreshKey)
+      if (!refresh_token) return ''
+      const res = await fetch(`${apiBase}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token }),
+      })
+      if (!res.ok) { clearTokens(); return '' }
+      const data = await res.json()
+      storeTokens(data)
+      return data.access_token as string
+    })().finally(() => { refreshing = null })
+  }
+  return refreshing
+}
+
+export async function signOut(apiBase: string) {
+  const refresh_token = localStorage.getItem(refreshKey)
+  if (refresh_token) {
+    try {
+      await fetch(`${apiBase}/auth/logout`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token }),
+      })
+    } catch {}
+  }
+  clearTokens()
 }
 
 export function apiBaseFromWindow(): string {
@@ -107,7 +107,7 @@ export default function Page() {
             <div className="font-semibold mb-1">Your Weekly Summary</div>
             <div className="text-sm text-neutral-600">A calm overview of your recent progress</div>
             <ul className="text-sm space-y-1 text-neutral-800 mt-3">
-              <li>• Total completions (last 7 days): {summary?.total_completions ?? '—'}</li>
+              <li>• Total completions (this week): {summary?.total_completions ?? '—'}</li>
               <li>• Best current streak: {summary?.best_streak ?? '—'}</li>
               <li>• Most consistent habit: {summary?.best_habit?.title ?? '—'}</li>
             </ul>
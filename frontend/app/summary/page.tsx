@@ -17,6 +17,7 @@ export default function SummaryPage() {
             <div className="font-medium mb-1">Weekly Stats</div>
             <ul className="text-sm text-neutral-800 space-y-1">
               <li>• Total completions: {data?.total_completions ?? '—'}</li>
+              <li>• Completion rate: {data ? `${Math.round((data.completion_rate || 0) * 100)}%` : '—'}</li>
               <li>• Best current streak: {data?.best_streak ?? '—'}</li>
             </ul>
           </div>